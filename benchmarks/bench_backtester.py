@@ -0,0 +1,80 @@
+"""
+Time the funding farming backtester on synthetic minute snapshots, by
+default a year of data for 80 farms against 256 parameter sets.
+
+    python benchmarks/bench_backtester.py [--days 365] [--farms 80]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from gmx_python_sdk.scripts.v2.farming_backtester import (  # noqa: E402
+    FarmingBacktester, MarketSnapshots, parameter_grid
+)
+
+
+def make_snapshots(days: int, farms: int, seed: int = 0) -> MarketSnapshots:
+    """
+    Random walk rates, liquidity and open interest at one minute intervals
+    """
+    rng = np.random.default_rng(seed)
+    steps = days * 24 * 60
+
+    markets = ["M{}".format(i) for i in range(farms // 2)]
+    farm_keys = [(market, side) for market in markets for side in ['long', 'short']]
+
+    def _walk(scale, start, low=None):
+        walk = start + np.cumsum(rng.normal(0, scale, (steps, len(farm_keys))), axis=0)
+        return walk if low is None else np.maximum(walk, low)
+
+    return MarketSnapshots(
+        np.arange(steps, dtype=np.float64) * 60,
+        farm_keys,
+        _walk(1e-4, 0.0),
+        _walk(5e-5, 0.002, low=0),
+        _walk(1e4, 5e6, low=0),
+        _walk(1e4, 2e7, low=0)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--farms", type=int, default=80)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshots = make_snapshots(args.days, args.farms)
+    print("Generated {} snapshots x {} farms in {:.1f}s".format(
+        len(snapshots), len(snapshots.farms), time.perf_counter() - start
+    ))
+
+    parameters = parameter_grid(
+        entry_threshold=[0, 0.001, 0.002, 0.005],
+        exit_threshold=[-0.001, 0, 0.001, 0.002],
+        rotation_margin=[0, 0.001, 0.002, 0.005],
+        position_size_usd=[1e4, 5e4, 1e5, 5e5]
+    )
+
+    start = time.perf_counter()
+    results = FarmingBacktester(snapshots, parameters).run()
+    elapsed = time.perf_counter() - start
+
+    best = int(np.argmax(results['net_pnl_usd']))
+    print("Backtested {} parameter sets in {:.1f}s ({:.1f}us per snapshot)".format(
+        len(results['net_pnl_usd']), elapsed, elapsed / len(snapshots) * 1e6
+    ))
+    print("Best: {}".format({
+        name: results[name][best]
+        for name in ['entry_threshold', 'exit_threshold', 'rotation_margin',
+                     'position_size_usd', 'net_pnl_usd', 'trades']
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Benchmark every collector and the order build path against a recorded
+cassette. Each benchmark reports wall time, RPC calls, HTTP calls, bytes
+transferred and peak Python memory, and is compared to the JSON baselines.
+
+Record the fixture once against a live RPC, or against the synthetic
+chain in synthetic_chain.py where no RPC is available, then replay offline:
+
+    python benchmarks/bench_collectors.py --record [--synthetic]
+    python benchmarks/bench_collectors.py --update-baselines
+    python benchmarks/bench_collectors.py --latency 0.05
+
+The committed fixture and baselines were recorded against the synthetic
+chain. Every run starts from empty process wide caches, as a fresh process
+would. Exits non zero if any metric regresses past its threshold or a
+benchmark has no baseline.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from gmx_python_sdk.scripts.v2 import (  # noqa: E402
+    approve_token_for_spend, fee_oracle, gas_utils, token_resolver
+)
+from gmx_python_sdk.scripts.v2.approve_token_for_spend import AllowanceCache  # noqa: E402
+from gmx_python_sdk.scripts.v2.cassette import Cassette  # noqa: E402
+from gmx_python_sdk.scripts.v2.fee_oracle import FeeOracle  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_available_liquidity import (  # noqa: E402
+    GetAvailableLiquidity
+)
+from gmx_python_sdk.scripts.v2.get.get_borrow_apr import GetBorrowAPR  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_claimable_fees import GetClaimableFees  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_funding_apr import GetFundingFee  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_gm_prices import GMPrices  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_markets import Markets  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.metric_graph import MetricGraph  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_open_interest import OpenInterest  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_open_positions import GetOpenPositions  # noqa: E402
+from gmx_python_sdk.scripts.v2.get.get_pool_tvl import GetPoolTVL  # noqa: E402
+from gmx_python_sdk.scripts.v2.gmx_utils import ConfigManager  # noqa: E402
+from gmx_python_sdk.scripts.v2.order.create_increase_order import IncreaseOrder  # noqa: E402
+from synthetic_chain import synthetic_chain  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PATH = os.path.join(BENCHMARK_DIR, "fixtures", "arbitrum.json.gz")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines.json")
+
+# Allowed relative increase over baseline before a metric counts as a
+# regression. Call counts and bytes are deterministic under replay, as no
+# benchmark starts a background refresh thread.
+THRESHOLDS = {
+    'wall_time_ms': 0.25,
+    'rpc_calls': 0,
+    'http_calls': 0,
+    'bytes_transferred': 0.05,
+    'peak_memory_kb': 0.25
+}
+
+# Increases below these are run to run noise whatever the baseline
+NOISE_FLOORS = {
+    'wall_time_ms': 1,
+    'peak_memory_kb': 256
+}
+
+ETH_ADDRESS = "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1"
+USDC_ADDRESS = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+
+
+class _BenchmarkIncreaseOrder(IncreaseOrder):
+
+    def _get_fee_oracle(self):
+        # Refreshed once on first use, rather than by the shared oracle's
+        # thread issuing eth_feeHistory at its own pace during later runs
+        return FeeOracle(self.config, refresh_interval=float('inf'))
+
+
+def build_increase_order(config):
+    market_key = Markets(config).find_market_key(ETH_ADDRESS)
+
+    return _BenchmarkIncreaseOrder(
+        config=config,
+        market_key=market_key,
+        collateral_address=USDC_ADDRESS,
+        index_token_address=ETH_ADDRESS,
+        is_long=False,
+        size_delta=10 * 10**30,
+        initial_collateral_delta_amount=10 * 10**6,
+        slippage_percent=0.003,
+        swap_path=[],
+        debug_mode=True
+    )
+
+
+BENCHMARKS = {
+    'markets': lambda config: Markets(config).info,
+    'open_interest': lambda config: OpenInterest(config).get_data(),
+    'funding_fee': lambda config: GetFundingFee(config).get_data(),
+    'borrow_apr': lambda config: GetBorrowAPR(config).get_data(),
+    'available_liquidity': lambda config: GetAvailableLiquidity(config).get_data(),
+    'gm_prices': lambda config: GMPrices(config).get_price_traders(),
+    'claimable_fees': lambda config: GetClaimableFees(config).get_data(),
+    'pool_tvl': lambda config: GetPoolTVL(config).get_pool_balances(),
+    'open_positions': lambda config: GetOpenPositions(
+        config,
+        config.user_wallet_address
+    ).get_data(),
+    'order_builder': build_increase_order,
+    'farming_scan': lambda config: MetricGraph(config).get(
+        'funding', 'borrow', 'liquidity', 'open_interest'
+    )
+}
+
+
+def reset_caches(config):
+    """
+    Drop the process wide token lists, gas limits, fee oracles, allowances
+    and approvals, so no benchmark is served from what an earlier one loaded
+    """
+    token_resolver._token_resolvers.clear()
+    gas_utils._gas_parameters.clear()
+
+    for stateful in list(fee_oracle._fee_oracles.values()) + \
+            list(approve_token_for_spend._allowance_caches.values()):
+        stateful.stop()
+    fee_oracle._fee_oracles.clear()
+    approve_token_for_spend._allowance_caches.clear()
+    approve_token_for_spend._approval_planners.clear()
+
+    # Loaded on demand without a background log sync issuing requests
+    approve_token_for_spend._allowance_caches[config.chain] = AllowanceCache(
+        config,
+        sync_interval=float('inf')
+    )
+
+
+def run_benchmark(cassette: Cassette, function, config, repeats: int) -> dict:
+    """
+    Run one benchmark from cold caches, counting traffic and peak memory on
+    the first run and taking the median wall time over all runs
+    """
+    # An untimed run first, so modules and ABIs loaded on first use are not
+    # charged to whichever benchmark happens to run first
+    reset_caches(config)
+    function(config)
+
+    timings = []
+    for i in range(repeats):
+        reset_caches(config)
+        if i == 0:
+            cassette.reset_counters()
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        function(config)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        if i == 0:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result = {
+                'rpc_calls': cassette.rpc_calls,
+                'http_calls': cassette.http_calls,
+                'bytes_transferred': cassette.bytes_transferred,
+                'peak_memory_kb': peak / 1024
+            }
+
+    result['wall_time_ms'] = float(np.median(timings))
+
+    return result
+
+
+def check_regressions(results: dict, baselines: dict, wall_time_threshold: float) -> list:
+    """
+    Compare results to baselines, returning a message per regressed metric
+    """
+    thresholds = dict(THRESHOLDS, wall_time_ms=wall_time_threshold)
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baselines:
+            regressions.append(
+                "{}: no baseline, run with --update-baselines".format(name)
+            )
+            continue
+        for metric, threshold in thresholds.items():
+            baseline = baselines[name][metric]
+            if result[metric] > baseline * (1 + threshold) and \
+                    result[metric] - baseline > NOISE_FLOORS.get(metric, 0):
+                regressions.append(
+                    "{} {}: {:.1f} vs baseline {:.1f} (+{:.0f}% allowed)".format(
+                        name, metric, result[metric], baseline, threshold * 100
+                    )
+                )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--record", action="store_true",
+        help="record the fixture against the configured RPC"
+    )
+    parser.add_argument(
+        "--synthetic", action="store_true",
+        help="record against the synthetic chain rather than the configured RPC"
+    )
+    parser.add_argument(
+        "--update-baselines", action="store_true",
+        help="overwrite baselines with this run"
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS),
+        help="run a subset of benchmarks"
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0,
+        help="seconds added to each replayed request"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLDS['wall_time_ms'],
+        help="allowed relative wall time increase over baseline"
+    )
+    args = parser.parse_args()
+
+    config = ConfigManager(chain='arbitrum')
+    config.set_config()
+
+    names = args.only or list(BENCHMARKS)
+    if args.record:
+        os.makedirs(os.path.dirname(FIXTURE_PATH), exist_ok=True)
+    elif not os.path.exists(FIXTURE_PATH):
+        sys.exit("No fixture at {}, run with --record first".format(FIXTURE_PATH))
+
+    results = {}
+    with contextlib.ExitStack() as stack:
+        if args.record and args.synthetic:
+            stack.enter_context(synthetic_chain(config))
+        cassette = stack.enter_context(
+            Cassette(
+                FIXTURE_PATH,
+                mode="record" if args.record else "replay",
+                latency=args.latency
+            )
+        )
+        for name in names:
+            results[name] = run_benchmark(
+                cassette,
+                BENCHMARKS[name],
+                config,
+                1 if args.record else args.repeats
+            )
+            print(
+                "{:<20} {:>9.1f}ms {:>5} rpc {:>3} http {:>10} bytes {:>9.0f}kb".format(
+                    name,
+                    results[name]['wall_time_ms'],
+                    results[name]['rpc_calls'],
+                    results[name]['http_calls'],
+                    results[name]['bytes_transferred'],
+                    results[name]['peak_memory_kb']
+                )
+            )
+
+    if args.record:
+        return
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+        print("Baselines written to {}".format(BASELINE_PATH))
+        return
+
+    regressions = check_regressions(results, baselines, args.threshold)
+    for regression in regressions:
+        print("REGRESSION {}".format(regression))
+
+    if len(regressions) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
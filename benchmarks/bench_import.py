@@ -0,0 +1,164 @@
+"""
+Measure cold import time of the SDK entry points in fresh interpreters.
+web3 is imported first in each, and what the SDK adds on top of it is
+gated against the 300ms target for the order path and the JSON baselines,
+so a slow host or web3 release does not fail the SDK. Also fails if an
+import pulls in pandas, prints, or configures logging.
+
+    python benchmarks/bench_import.py [--repeats 5] [--update-baselines]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "import_baselines.json")
+
+# Budget for the order path on top of web3
+TARGET_MS = 300
+
+# Allowed relative increase over baseline, ignoring increases below
+# NOISE_MS which are run to run noise
+THRESHOLD = 0.2
+NOISE_MS = 20
+
+MODULES = {
+    'order': "gmx_python_sdk.scripts.v2.order.create_increase_order",
+    'order_client': "gmx_python_sdk.scripts.v2.order.order_client",
+    'gmx_utils': "gmx_python_sdk.scripts.v2.gmx_utils",
+    'keys': "gmx_python_sdk.scripts.v2.keys",
+    'markets': "gmx_python_sdk.scripts.v2.get.get_markets",
+    'open_interest': "gmx_python_sdk.scripts.v2.get.get_open_interest"
+}
+
+# Heavy dependencies that must only load on demand
+LAZY_MODULES = ['pandas', 'yaml']
+
+CHECK_SCRIPT = """
+import json, logging, sys, time
+start = time.perf_counter()
+import web3
+floor = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{
+    'floor_ms': floor,
+    'sdk_ms': elapsed,
+    'eager': [m for m in {lazy} if m in sys.modules],
+    'logging_configured': len(logging.getLogger().handlers) > 0
+}}))
+"""
+
+
+def measure(module: str, repeats: int) -> dict:
+    """
+    Median import time of web3 and of module on top of it over fresh
+    interpreters, plus any import side effects seen
+
+    """
+    floor_timings = []
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [
+                sys.executable, "-c",
+                CHECK_SCRIPT.format(module=module, lazy=LAZY_MODULES)
+            ],
+            cwd=os.path.join(BENCHMARK_DIR, '..'),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip().split("\n")
+
+        result = json.loads(output[-1])
+        floor_timings.append(result['floor_ms'])
+        timings.append(result['sdk_ms'])
+
+    return {
+        'floor_ms': float(np.median(floor_timings)),
+        'sdk_ms': float(np.median(timings)),
+        'eager': result['eager'],
+        'logging_configured': result['logging_configured'],
+        'printed': output[:-1]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--update-baselines", action="store_true",
+        help="overwrite baselines with this run"
+    )
+    args = parser.parse_args()
+
+    failures = []
+    results = {}
+    for name, module in MODULES.items():
+        result = measure(module, args.repeats)
+        results[name] = {'sdk_ms': result['sdk_ms']}
+        print(
+            "{:<16} web3 {:>6.0f}ms  sdk {:>6.0f}ms".format(
+                name, result['floor_ms'], result['sdk_ms']
+            )
+        )
+
+        for side_effect, present in [
+            ("imports {}".format(", ".join(result['eager'])), result['eager']),
+            ("configures logging", result['logging_configured']),
+            ("prints on import", result['printed'])
+        ]:
+            if present:
+                failures.append("{} {}".format(name, side_effect))
+
+    order_ms = results['order']['sdk_ms']
+    print("Order path target {}ms over web3: {}".format(
+        TARGET_MS,
+        "PASS" if order_ms < TARGET_MS else "FAIL"
+    ))
+    if order_ms >= TARGET_MS:
+        failures.append(
+            "order import {:.0f}ms over web3 vs target {}ms".format(
+                order_ms, TARGET_MS
+            )
+        )
+
+    if args.update_baselines:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        print("Baselines written to {}".format(BASELINE_PATH))
+    elif not os.path.exists(BASELINE_PATH):
+        failures.append(
+            "no baselines at {}, run with --update-baselines".format(BASELINE_PATH)
+        )
+    else:
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+        for name, result in results.items():
+            baseline = baselines.get(name, {}).get('sdk_ms')
+            if baseline is None:
+                failures.append(
+                    "{}: no baseline, run with --update-baselines".format(name)
+                )
+            elif result['sdk_ms'] > baseline * (1 + THRESHOLD) and \
+                    result['sdk_ms'] - baseline > NOISE_MS:
+                failures.append(
+                    "{} import {:.0f}ms over web3 vs baseline {:.0f}ms".format(
+                        name, result['sdk_ms'], baseline
+                    )
+                )
+
+    for failure in failures:
+        print("REGRESSION {}".format(failure))
+
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure OrderClient build-and-sign latency for increase orders against the
+200ms target. Orders are signed but never broadcast.
+
+    python benchmarks/bench_order_client.py [iterations]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from gmx_python_sdk.scripts.v2.gmx_utils import ConfigManager  # noqa: E402
+from gmx_python_sdk.scripts.v2.order.order_client import OrderClient  # noqa: E402
+
+TARGET_MS = 200
+
+ETH_ADDRESS = "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1"
+USDC_ADDRESS = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+
+
+def run(iterations: int = 20):
+    config = ConfigManager(chain='arbitrum')
+    config.set_config()
+
+    start = time.perf_counter()
+    client = OrderClient(config).warm(tokens=[USDC_ADDRESS])
+    client.start()
+    print("Warm up: {:.0f}ms".format((time.perf_counter() - start) * 1000))
+
+    market_key = client.get_market_registry().find_by_index_token(ETH_ADDRESS)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        client.increase(
+            market_key=market_key,
+            collateral_address=USDC_ADDRESS,
+            index_token_address=ETH_ADDRESS,
+            is_long=False,
+            size_delta=10 * 10**30,
+            initial_collateral_delta_amount=10 * 10**6,
+            slippage_percent=0.003,
+            swap_path=[],
+            broadcast=False
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+
+    client.stop()
+
+    p50 = np.percentile(timings, 50)
+    p99 = np.percentile(timings, 99)
+    print("Build and sign over {} orders: p50 {:.1f}ms, p99 {:.1f}ms, max {:.1f}ms".format(
+        iterations, p50, p99, max(timings)
+    ))
+    print("Target {}ms: {}".format(TARGET_MS, "PASS" if p50 < TARGET_MS else "FAIL"))
+
+    return timings
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,216 @@
+"""
+Synthetic GMX chain for recording benchmark fixtures without a live RPC.
+
+Serves a small fixed market universe from a LocalNode. Reader and other
+contract calls the state model does not cover are answered with values
+derived from the calldata, valid for the function's ABI but not
+meaningful. The GMX REST endpoints are answered with a matching token list
+and signed prices. Traffic, call counts and code paths match a live
+recording, so the fixture can back regression baselines, but absolute values
+in the output cannot be trusted.
+
+    with synthetic_chain(config):
+        with Cassette(path, mode="record"):
+            ...
+"""
+import contextlib
+import json
+import os
+import sys
+
+import requests
+from eth_abi import decode, encode
+from eth_abi.grammar import parse
+from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.abi import get_abi_input_types, get_abi_output_types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from gmx_python_sdk.scripts.v2.gmx_utils import contract_map  # noqa: E402
+from gmx_python_sdk.scripts.v2.local_node import (  # noqa: E402
+    LocalChainState, LocalNode, LocalNodeError, _function_abis, _load_abi
+)
+
+TOKENS = [
+    {'symbol': 'ETH', 'address': "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1", 'decimals': 18},
+    {'symbol': 'BTC', 'address': "0x47904963fc8b2340414262125aF798B9655E58Cd", 'decimals': 8, 'synthetic': True},
+    {'symbol': 'WBTC', 'address': "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f", 'decimals': 8},
+    {'symbol': 'ARB', 'address': "0x912CE59144191C1204E64559FE8253a0e49E6548", 'decimals': 18},
+    {'symbol': 'USDC', 'address': "0xaf88d065e77c8cC2239327C5EDb3A432268e5831", 'decimals': 6}
+]
+
+# Index token USD prices, stored as price * 10**(30 - decimals)
+PRICES = {'ETH': 3000, 'BTC': 60000, 'WBTC': 60000, 'ARB': 1, 'USDC': 1}
+
+# (market token, index token, long token, short token)
+MARKETS = [
+    ("0x70d95587d40A2caf56bd97485aB3Eec10Bee6336", "ETH", "ETH", "USDC"),
+    ("0x47c031236e19d024b42f8AE6780E44A573170703", "BTC", "WBTC", "USDC"),
+    ("0xC25cEf6061Cf5dE5eb761b50E4743c1F5D7E5407", "ARB", "ARB", "USDC")
+]
+
+# Datastore values nothing has written, eg gas limits and factors
+DEFAULT_UINT = 10**6
+
+
+class SyntheticChainState(LocalChainState):
+    """
+    LocalChainState answering any call on a known ABI instead of reverting,
+    seeded with MARKETS and token balances for wallet_address
+    """
+
+    def __init__(self, wallet_address: str, chain: str = 'arbitrum'):
+        super().__init__(chain=chain, block_number=10**6)
+
+        addresses = {token['symbol']: token['address'] for token in TOKENS}
+        self.markets = [
+            tuple(
+                [Web3.to_checksum_address(market)] +
+                [addresses[symbol] for symbol in symbols]
+            )
+            for market, *symbols in MARKETS
+        ]
+
+        wallet_address = wallet_address.lower()
+        self.eth_balances[wallet_address] = 10**21
+        for token in TOKENS:
+            self._set_token_value(
+                token['address'].lower(),
+                'balanceOf',
+                (wallet_address,),
+                10**12 * 10**token['decimals']
+            )
+
+        self._abis = {}
+        for contract in contract_map[chain].values():
+            self._abis.update(_function_abis(_load_abi(contract['abi_path'])))
+        self._abis.update(_function_abis(_load_abi('contracts/token_approval.json')))
+
+    def call(self, transaction: dict) -> bytes:
+        try:
+            return super().call(transaction)
+        except LocalNodeError:
+            data = HexBytes(transaction.get('data', transaction.get('input', '0x')))
+            function_abi = self._abis.get(bytes(data[:4]))
+            if function_abi is None:
+                raise
+
+            if function_abi['name'] == 'decimals':
+                return encode(["uint8"], [18])
+
+            if function_abi['name'] == 'getAccountPositions':
+                return self._get_account_positions(function_abi, data)
+
+            seed = int.from_bytes(Web3.keccak(data), "big")
+            types = get_abi_output_types(function_abi)
+            return encode(types, [_synthetic_value(parse(t), seed) for t in types])
+
+    def _get_account_positions(self, function_abi: dict, data: bytes) -> bytes:
+        """
+        A 10 USD short with 10 USDC collateral in every market
+        """
+        _, account, _, _ = decode(get_abi_input_types(function_abi), data[4:])
+        tokens = {token['symbol']: token for token in TOKENS}
+
+        positions = []
+        for market, index_symbol, _, short_symbol in MARKETS:
+            size_usd = 10 * 10**30
+            size_in_tokens = size_usd // (
+                PRICES[index_symbol] * 10**(30 - tokens[index_symbol]['decimals'])
+            )
+            positions.append((
+                (account, market, tokens[short_symbol]['address']),
+                (size_usd, size_in_tokens, 10 * 10**6, 0, 0, 0, 0, 0, 0),
+                (False,)
+            ))
+
+        return encode(get_abi_output_types(function_abi), [positions])
+
+    def _default_value(self, value_type: str):
+        if value_type in ['uint', 'int']:
+            return DEFAULT_UINT
+
+        return super()._default_value(value_type)
+
+
+def _synthetic_value(abi_type, seed: int):
+    """
+    Deterministic positive value of an eth_abi grammar type. Dynamic arrays
+    are empty.
+    """
+    if abi_type.arrlist:
+        size = abi_type.arrlist[-1]
+        if len(size) == 0:
+            return []
+        return [_synthetic_value(abi_type.item_type, seed + i) for i in range(size[0])]
+
+    if hasattr(abi_type, 'components'):
+        return tuple(
+            _synthetic_value(component, seed + i)
+            for i, component in enumerate(abi_type.components)
+        )
+
+    if abi_type.base in ['uint', 'int']:
+        return 10**18 + seed % 10**18
+    if abi_type.base == 'address':
+        return "0x0000000000000000000000000000000000000000"
+    if abi_type.base == 'bool':
+        return False
+    if abi_type.base == 'bytes':
+        return bytes(abi_type.sub or 0)
+
+    return ""
+
+
+def _http_get(url, *args, **kwargs):
+    """
+    Answer the GMX REST endpoints with TOKENS and PRICES
+    """
+    if url.endswith("/tokens"):
+        body = {'tokens': TOKENS}
+    elif url.endswith("/signed_prices/latest"):
+        body = {
+            'signedPrices': [
+                {
+                    'id': str(i),
+                    'tokenAddress': token['address'],
+                    'tokenSymbol': token['symbol'],
+                    'minPriceFull': str(PRICES[token['symbol']] * 10**(30 - token['decimals'])),
+                    'maxPriceFull': str(PRICES[token['symbol']] * 10**(30 - token['decimals'])),
+                    'minBlockNumber': 10**6,
+                    'oracleDecimals': 30 - token['decimals'],
+                    'updatedAt': 1700000000000
+                }
+                for i, token in enumerate(TOKENS)
+            ]
+        }
+    else:
+        raise Exception("No synthetic response for {}".format(url))
+
+    response = requests.models.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode()
+    response.url = url
+    response.encoding = "utf-8"
+
+    return response
+
+
+@contextlib.contextmanager
+def synthetic_chain(config):
+    """
+    Point config at a synthetic LocalNode and answer requests.get from the
+    synthetic REST endpoints until exit
+    """
+    rpc = config.rpc
+    requests_get = requests.get
+
+    with LocalNode(SyntheticChainState(config.user_wallet_address, config.chain)) as node:
+        config.set_rpc(node.url)
+        requests.get = _http_get
+        try:
+            yield node
+        finally:
+            requests.get = requests_get
+            config.set_rpc(rpc)
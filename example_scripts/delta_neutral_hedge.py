@@ -0,0 +1,68 @@
+from utils import _set_paths
+
+_set_paths()
+
+import time
+
+from gmx_python_sdk.scripts.v2.gmx_utils import ConfigManager
+from gmx_python_sdk.scripts.v2.hedge_engine import (
+    HedgeEngine, get_hedge_snapshot
+)
+from gmx_python_sdk.scripts.v2.order.order_client import OrderClient
+
+arbitrum_config_object = ConfigManager(chain='arbitrum')
+arbitrum_config_object.set_config()
+
+eth_address = "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1"
+usdc_address = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+
+# new hedges are opened with USDC collateral at this leverage
+leverage = 2
+slippage_percent = 0.003
+
+# keep ETH delta neutral, rebalancing once more than $100 off target
+engine = HedgeEngine(
+    {eth_address: {"target_delta": 0, "tolerance_usd": 100}}
+)
+
+client = OrderClient(arbitrum_config_object).warm(tokens=[usdc_address])
+client.start()
+
+while True:
+    snapshot = get_hedge_snapshot(
+        arbitrum_config_object,
+        arbitrum_config_object.user_wallet_address,
+        wallet_tokens=[eth_address],
+        markets=client.get_markets(),
+        oracle_prices=client.get_prices()
+    )
+
+    for order in engine.tick(snapshot):
+        size_delta = int(order['size_delta_usd'] * 10**30)
+
+        if order['is_increase']:
+            client.increase(
+                market_key=order['market_key'],
+                collateral_address=usdc_address,
+                index_token_address=order['index_token_address'],
+                is_long=order['is_long'],
+                size_delta=size_delta,
+                initial_collateral_delta_amount=int(
+                    order['size_delta_usd'] / leverage * 10**6
+                ),
+                slippage_percent=slippage_percent,
+                swap_path=[]
+            )
+        else:
+            client.decrease(
+                market_key=order['market_key'],
+                collateral_address=order['collateral_address'],
+                index_token_address=order['index_token_address'],
+                is_long=order['is_long'],
+                size_delta=size_delta,
+                initial_collateral_delta_amount=0,
+                slippage_percent=slippage_percent,
+                swap_path=[]
+            )
+
+    time.sleep(1)
@@ -5,15 +5,12 @@ _set_paths()
 from web3 import Web3
 from gmx_python_sdk.scripts.v2.get.get_oracle_prices import OraclePrices
 from gmx_python_sdk.scripts.v2.get.get_markets import Markets
-from gmx_python_sdk.scripts.v2.order.order_argument_parser import (
-    OrderArgumentParser
-)
 from gmx_python_sdk.scripts.v2.gmx_utils import (
     get_estimated_swap_output,
     contract_map,
-    determine_swap_route,
-    get_tokens_address_dict
+    determine_swap_route
 )
+from gmx_python_sdk.scripts.v2.token_resolver import get_token_resolver
 
 
 class EstimateSwapOutput:
@@ -21,7 +18,7 @@ class EstimateSwapOutput:
     def __init__(self, chain):
         self.chain = chain
         self.markets = Markets(chain=chain).get_available_markets()
-        self.tokens = get_tokens_address_dict(chain)
+        self.tokens = get_token_resolver(chain)
 
     def get_swap_output(
             self,
@@ -61,18 +58,12 @@ class EstimateSwapOutput:
         """
 
         if in_token_address is None:
-            in_token_address = OrderArgumentParser().find_key_by_symbol(
-                self.tokens,
-                in_token_symbol
-            )
+            in_token_address = self.tokens.address(in_token_symbol)
         if out_token_address is None:
-            out_token_address = OrderArgumentParser().find_key_by_symbol(
-                self.tokens,
-                out_token_symbol
-            )
+            out_token_address = self.tokens.address(out_token_symbol)
         if token_amount_expanded is None:
             token_amount_expanded = (
-                token_amount * 10 ** self.tokens[in_token_address]['decimals']
+                token_amount * 10 ** self.tokens.decimals(in_token_address)
             )
 
         swap_route = determine_swap_route(
@@ -86,7 +77,7 @@ class EstimateSwapOutput:
             token_amount_expanded
         )
         output['out_token_actual'] = output['out_token_amount'] / \
-            10 ** self.tokens[out_token_address]['decimals']
+            10 ** self.tokens.decimals(out_token_address)
         output['price_impact'] = output['price_impact_usd'] / \
             10 ** 7
 
@@ -8,9 +8,9 @@ from gmx_python_sdk.scripts.v2.get.get_markets import Markets
 
 from gmx_python_sdk.scripts.v2.get.get_open_positions import GetOpenPositions
 from gmx_python_sdk.scripts.v2.gmx_utils import (
-    get_config, find_dictionary_by_key_value, get_tokens_address_dict,
-    determine_swap_route
+    get_config, determine_swap_route
 )
+from gmx_python_sdk.scripts.v2.token_resolver import get_token_resolver
 
 
 def get_positions(chain: str, address: str = None):
@@ -98,26 +98,15 @@ def transform_open_position_to_order_parameters(
 
     try:
         raw_position_data = positions[position_dictionary_key]
-        gmx_tokens = get_tokens_address_dict(chain)
+        gmx_tokens = get_token_resolver(chain)
 
-        collateral_address = find_dictionary_by_key_value(
-            gmx_tokens,
-            "symbol",
+        collateral_address = gmx_tokens.address(
             raw_position_data['collateral_token']
-        )["address"]
-
-        gmx_tokens = get_tokens_address_dict(chain)
-
-        index_address = find_dictionary_by_key_value(
-            gmx_tokens,
-            "symbol",
+        )
+        index_address = gmx_tokens.address(
             raw_position_data['market_symbol'][0]
         )
-        out_token_address = find_dictionary_by_key_value(
-            gmx_tokens,
-            "symbol",
-            out_token
-        )['address']
+        out_token_address = gmx_tokens.address(out_token)
         markets = Markets(chain=chain).get_available_markets()
 
         swap_path = []
@@ -136,7 +125,7 @@ def transform_open_position_to_order_parameters(
             "chain": chain,
             "market_key": raw_position_data['market'],
             "collateral_address": collateral_address,
-            "index_token_address": index_address["address"],
+            "index_token_address": index_address,
             "is_long": raw_position_data['is_long'],
             "size_delta": size_delta,
             "initial_collateral_delta": int(int(
@@ -1,11 +1,648 @@
 import json
+import logging
 import os
+import threading
+import time
 
+from eth_abi import decode
 from web3 import Web3
 
 from .gmx_utils import (
-    create_connection, base_dir, convert_to_checksum_address
+    create_connection, base_dir, convert_to_checksum_address,
+    get_native_token_address
 )
+from .multicall import get_multicall_contract, multicall
+
+MAX_UINT256 = 2**256 - 1
+
+# Seconds before cached balances and allowances are reloaded from chain when
+# the log sync is not keeping them current, so deposits and refunds we did
+# not send ourselves are picked up
+MAX_AGE = 60
+
+# Seconds between background syncs of Approval and Transfer logs
+SYNC_INTERVAL = 15
+
+APPROVAL_TOPIC = Web3.keccak(text="Approval(address,address,uint256)")
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)")
+
+
+def get_token_approval_contract(web3_obj, token_address: str):
+    """
+    Get an ERC20 contract object with balance, allowance and approve functions
+
+    Parameters
+    ----------
+    web3_obj : web3_obj
+        web3 connection.
+    token_address : str
+        contract address of token.
+
+    """
+    token_contract_abi = json.load(open(os.path.join(
+        base_dir,
+        'gmx_python_sdk',
+        'contracts',
+        'token_approval.json'
+    )))
+
+    return web3_obj.eth.contract(address=token_address,
+                                 abi=token_contract_abi)
+
+
+class AllowanceCache:
+    """
+    In memory balances per (wallet, token) and allowances per
+    (wallet, token, spender). Values are batch loaded with one multicall and
+    then kept current locally from our own approvals and spends, and from
+    Approval/Transfer logs passed to apply_logs or fetched by sync.
+
+    Once started, a daemon thread syncs the logs every sync_interval seconds
+    and entries are served from memory without expiring. Otherwise, or if the
+    sync has been failing for max_age seconds, entries older than max_age are
+    reloaded from chain on next use. Native token balances move without logs
+    and always expire. Callers reload an entry with refresh before failing on
+    it.
+    """
+
+    def __init__(
+        self, config, max_age: float = MAX_AGE,
+        sync_interval: float = SYNC_INTERVAL
+    ):
+        self.config = config
+        self.max_age = max_age
+        self.sync_interval = sync_interval
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._connection = create_connection(config)
+        self._token_contracts = {}
+        self._balances = {}
+        self._allowances = {}
+        self._loaded = {}
+        self._synced_block = None
+        self._last_synced = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start syncing Approval and Transfer logs in the background
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="AllowanceCache-{}".format(self.config.chain),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background sync thread
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def load(self, wallet_address: str, tokens: list, spenders: list):
+        """
+        Load balances and allowances for every token/spender pair in a single
+        multicall
+
+        Parameters
+        ----------
+        wallet_address : str
+            address of the token owner.
+        tokens : list
+            list of token addresses.
+        spenders : list
+            list of spender contract addresses.
+
+        """
+        wallet_address = convert_to_checksum_address(self.config, wallet_address)
+        tokens = [convert_to_checksum_address(self.config, t) for t in tokens]
+        spenders = [convert_to_checksum_address(self.config, s) for s in spenders]
+
+        multicall_contract_obj = get_multicall_contract(
+            self._connection,
+            self.config.chain
+        )
+
+        native_token = get_native_token_address(self.config.chain)
+        function_calls = []
+        keys = []
+        for token in tokens:
+            token_contract_obj = self._get_token_contract(token)
+            if token == native_token:
+                function_calls.append(
+                    multicall_contract_obj.functions.getEthBalance(wallet_address)
+                )
+            else:
+                function_calls.append(
+                    token_contract_obj.functions.balanceOf(wallet_address)
+                )
+            keys.append((wallet_address, token))
+
+            for spender in spenders:
+                function_calls.append(
+                    token_contract_obj.functions.allowance(wallet_address, spender)
+                )
+                keys.append((wallet_address, token, spender))
+
+        # The first load sets the block logs are synced from
+        block_identifier = "latest"
+        if self._synced_block is None:
+            block_identifier = self._connection.eth.block_number
+
+        outputs = multicall(
+            self.config.chain,
+            function_calls,
+            block_identifier=block_identifier
+        )
+        now = time.time()
+
+        with self._lock:
+            if self._synced_block is None:
+                self._synced_block = block_identifier
+            for key, output in zip(keys, outputs):
+                if len(key) == 2:
+                    self._balances[key] = output
+                else:
+                    self._allowances[key] = output
+                self._loaded[key] = now
+
+    def get_balance(
+        self, wallet_address: str, token: str, refresh: bool = False
+    ) -> int:
+        """
+        Balance of token held by wallet_address, reloaded from chain if
+        refresh is True or the cached value is older than max_age
+        """
+        key = (
+            convert_to_checksum_address(self.config, wallet_address),
+            convert_to_checksum_address(self.config, token)
+        )
+        if refresh or key not in self._balances or self._is_stale(key):
+            self.load(key[0], [key[1]], [])
+
+        return self._balances[key]
+
+    def get_allowance(
+        self, wallet_address: str, token: str, spender: str,
+        refresh: bool = False
+    ) -> int:
+        """
+        Allowance of spender over token held by wallet_address, reloaded
+        from chain if refresh is True or the cached value is older than
+        max_age
+        """
+        key = (
+            convert_to_checksum_address(self.config, wallet_address),
+            convert_to_checksum_address(self.config, token),
+            convert_to_checksum_address(self.config, spender)
+        )
+        if refresh or key not in self._allowances or self._is_stale(key):
+            self.load(key[0], [key[1]], [key[2]])
+
+        return self._allowances[key]
+
+    def record_approval(
+        self, wallet_address: str, token: str, spender: str, amount: int
+    ):
+        """
+        Record an approval we have sent ourselves
+        """
+        key = (
+            convert_to_checksum_address(self.config, wallet_address),
+            convert_to_checksum_address(self.config, token),
+            convert_to_checksum_address(self.config, spender)
+        )
+        with self._lock:
+            self._allowances[key] = amount
+            self._loaded[key] = time.time()
+
+    def record_spend(
+        self, wallet_address: str, token: str, spender: str, amount: int
+    ):
+        """
+        Record tokens pulled from the wallet by spender, or for the native
+        token sent as value
+        """
+        wallet_address = convert_to_checksum_address(self.config, wallet_address)
+        token = convert_to_checksum_address(self.config, token)
+        spender = convert_to_checksum_address(self.config, spender)
+
+        with self._lock:
+            if (wallet_address, token) in self._balances:
+                self._balances[(wallet_address, token)] -= amount
+
+            allowance_key = (wallet_address, token, spender)
+            native_token = get_native_token_address(self.config.chain)
+            if token != native_token and allowance_key in self._allowances \
+                    and self._allowances[allowance_key] != MAX_UINT256:
+                self._allowances[allowance_key] -= amount
+
+    def apply_logs(self, logs: list) -> list:
+        """
+        Update tracked balances and allowances from raw Approval and Transfer
+        logs, eg the logs of a receipt or an eth_getLogs response. Approvals
+        set the allowance. Transfers expire the balances they touch, which
+        our own record_spend may already have moved, and the limited
+        allowances of the sender, since the log does not say which spender
+        pulled the tokens.
+
+        Parameters
+        ----------
+        logs : list
+            list of raw log dicts.
+
+        Returns
+        -------
+        list
+            keys of the tracked entries expired, to be reloaded.
+
+        """
+        native_token = get_native_token_address(self.config.chain)
+        expired = []
+        with self._lock:
+            for log in logs:
+                topics = log['topics']
+                if len(topics) != 3:
+                    continue
+
+                token = convert_to_checksum_address(self.config, log['address'])
+                first = convert_to_checksum_address(
+                    self.config, "0x" + bytes(topics[1])[-20:].hex()
+                )
+                second = convert_to_checksum_address(
+                    self.config, "0x" + bytes(topics[2])[-20:].hex()
+                )
+                data = log['data']
+                if isinstance(data, str):
+                    data = bytes.fromhex(data[2:])
+                (value,) = decode(["uint256"], bytes(data))
+
+                if bytes(topics[0]) == APPROVAL_TOPIC:
+                    self._allowances[(first, token, second)] = value
+                    self._loaded[(first, token, second)] = time.time()
+
+                elif bytes(topics[0]) == TRANSFER_TOPIC and token != native_token:
+                    keys = [
+                        k for k in [(first, token), (second, token)]
+                        if k in self._balances
+                    ] + [
+                        k for k in self._allowances
+                        if k[0] == first and k[1] == token
+                        and self._allowances[k] != MAX_UINT256
+                    ]
+                    for key in keys:
+                        self._loaded.pop(key, None)
+                    expired.extend(keys)
+
+        return expired
+
+    def sync(self):
+        """
+        Apply the Approval and Transfer logs of the blocks mined since the
+        last sync, then reload the entries they expired in one multicall
+        """
+        if self._synced_block is None:
+            return
+
+        to_block = self._connection.eth.block_number
+        if to_block > self._synced_block:
+            expired = self.sync_from_logs(self._synced_block + 1, to_block)
+
+            wallets = {}
+            for key in expired:
+                tokens, spenders = wallets.setdefault(key[0], (set(), set()))
+                tokens.add(key[1])
+                if len(key) == 3:
+                    spenders.add(key[2])
+
+            for wallet_address, (tokens, spenders) in wallets.items():
+                self.load(wallet_address, list(tokens), list(spenders))
+
+            with self._lock:
+                self._synced_block = to_block
+
+        self._last_synced = time.time()
+
+    def sync_from_logs(self, from_block: int, to_block="latest") -> list:
+        """
+        Fetch and apply the Approval and Transfer logs touching tracked
+        wallets
+
+        Parameters
+        ----------
+        from_block : int
+            first block to include.
+        to_block : int or str, optional
+            last block to include. The default is "latest".
+
+        Returns
+        -------
+        list
+            keys of the tracked entries expired, to be reloaded.
+
+        """
+        with self._lock:
+            wallets = set(k[0] for k in self._balances) | \
+                set(k[0] for k in self._allowances)
+            tokens = set(k[1] for k in self._balances) | \
+                set(k[1] for k in self._allowances)
+        tokens.discard(get_native_token_address(self.config.chain))
+
+        if len(wallets) == 0 or len(tokens) == 0:
+            return []
+
+        wallet_topics = [
+            "0x" + bytes(12).hex() + wallet[2:].lower() for wallet in wallets
+        ]
+
+        # Logs where one of our wallets is either the first or second indexed
+        # address
+        logs = self._connection.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': list(tokens),
+            'topics': [[Web3.to_hex(APPROVAL_TOPIC), Web3.to_hex(TRANSFER_TOPIC)], wallet_topics]
+        }) + self._connection.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': list(tokens),
+            'topics': [Web3.to_hex(TRANSFER_TOPIC), None, wallet_topics]
+        })
+
+        return self.apply_logs(logs)
+
+    def _is_stale(self, key: tuple) -> bool:
+        if key not in self._loaded:
+            return True
+
+        if self.max_age is None:
+            return False
+
+        # a running sync keeps token entries current on its own, only fall
+        # back to expiring them if it has been failing
+        if self._thread is not None and self._thread.is_alive() and \
+                key[1] != get_native_token_address(self.config.chain) and \
+                time.time() - self._last_synced <= self.max_age:
+            return False
+
+        return time.time() - self._loaded[key] > self.max_age
+
+    def _run(self):
+        # Nothing to sync until entries have been loaded
+        while not self._stop_event.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                self.log.warning("Allowance log sync failed: {}".format(e))
+
+    def _get_token_contract(self, token: str):
+        if token not in self._token_contracts:
+            self._token_contracts[token] = get_token_approval_contract(
+                self._connection,
+                token
+            )
+
+        return self._token_contracts[token]
+
+
+class ApprovalPlanner:
+    """
+    Approve spenders from the cached allowances, one approval at a time.
+    By default exactly the amount short is approved, as check_if_approved
+    always has. Set approval_amount, eg MAX_UINT256, to opt in to approving
+    that much once so later orders in the session skip approvals; at most
+    one such approval is then sent per (wallet, token, spender) per session.
+    """
+
+    def __init__(self, config, allowance_cache: AllowanceCache = None,
+                 approval_amount: int = None):
+        self.config = config
+        self.allowance_cache = allowance_cache or get_allowance_cache(config)
+        self.approval_amount = approval_amount
+
+        self._approved = set()
+        self._lock = threading.Lock()
+
+    def ensure_approved(
+        self, spender: str, token: str, amount: int, max_fee_per_gas,
+        approve: bool = True
+    ):
+        """
+        Check the cached balance and allowance and approve if needed
+
+        Parameters
+        ----------
+        spender : str
+            contract address of the requested spender.
+        token : str
+            contract address of token to spend.
+        amount : int
+            amount of tokens to spend in expanded decimals.
+        max_fee_per_gas : int
+            max fee per gas for the approval transaction.
+        approve : bool, optional
+            send an approval if needed. The default is True.
+
+        Returns
+        -------
+        tx_hash or None
+            hash of the approval transaction if one was sent.
+
+        Raises
+        ------
+        Exception
+            Insufficient balance, token not approved, or token already
+            approved once this session.
+
+        """
+        wallet_address = convert_to_checksum_address(
+            self.config,
+            self.config.user_wallet_address
+        )
+
+        token = convert_to_checksum_address(self.config, token)
+        spender = convert_to_checksum_address(self.config, spender)
+        cache = self.allowance_cache
+
+        # Reload before failing, tokens may have arrived since they were cached
+        if cache.get_balance(wallet_address, token) < amount and \
+                cache.get_balance(wallet_address, token, refresh=True) < amount:
+            raise Exception("Insufficient balance!")
+
+        if token == get_native_token_address(self.config.chain):
+            return None
+
+        if cache.get_allowance(wallet_address, token, spender) >= amount or \
+                cache.get_allowance(wallet_address, token, spender, refresh=True) >= amount:
+            return None
+
+        if not approve:
+            raise Exception("Token not approved for spend, please allow first!")
+
+        key = (wallet_address, token, spender)
+        approval_amount = amount
+        if self.approval_amount is not None:
+            approval_amount = max(amount, self.approval_amount)
+
+        # Check again under the lock, another thread may have just approved
+        with self._lock:
+            if cache.get_allowance(wallet_address, token, spender) >= amount:
+                return None
+
+            if self.approval_amount is not None and key in self._approved:
+                raise Exception(
+                    "Token {} already approved this session, allowance exhausted!".format(
+                        token
+                    )
+                )
+
+            tx_hash = send_approval(
+                self.config,
+                spender,
+                token,
+                approval_amount,
+                max_fee_per_gas
+            )
+            self._approved.add(key)
+            self.allowance_cache.record_approval(
+                wallet_address,
+                token,
+                spender,
+                approval_amount
+            )
+
+        return tx_hash
+
+
+_allowance_caches = {}
+_allowance_caches_lock = threading.Lock()
+_approval_planners = {}
+
+
+def get_allowance_cache(config, start: bool = True) -> AllowanceCache:
+    """
+    Get the process wide AllowanceCache for the chain in config, starting its
+    background log sync on first use
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+    start : bool, optional
+        start the background log sync thread. The default is True.
+
+    """
+    with _allowance_caches_lock:
+        if config.chain not in _allowance_caches:
+            _allowance_caches[config.chain] = AllowanceCache(config)
+
+        allowance_cache = _allowance_caches[config.chain]
+
+    if start:
+        allowance_cache.start()
+
+    return allowance_cache
+
+
+def get_approval_planner(config) -> ApprovalPlanner:
+    """
+    Get the process wide ApprovalPlanner for the chain in config, so every
+    order, deposit and withdrawal shares its approvals. Set approval_amount
+    on it to opt in to larger than exact approvals.
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+
+    """
+    allowance_cache = get_allowance_cache(config)
+
+    with _allowance_caches_lock:
+        if config.chain not in _approval_planners:
+            _approval_planners[config.chain] = ApprovalPlanner(
+                config, allowance_cache
+            )
+
+        return _approval_planners[config.chain]
+
+
+def send_approval(
+        config,
+        spender: str,
+        token_to_approve: str,
+        amount_of_tokens_to_spend: int,
+        max_fee_per_gas):
+    """
+    Sign and send an approve transaction for spender
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    spender : str
+        contract address of the requested spender.
+    token_to_approve : str
+        contract address of token to spend.
+    amount_of_tokens_to_spend : int
+        amount of tokens to approve in expanded decimals.
+    max_fee_per_gas : int
+        max fee per gas for the transaction.
+
+    Returns
+    -------
+    tx_hash
+        hash of the approve transaction.
+
+    """
+    connection = create_connection(config)
+
+    spender_checksum_address = convert_to_checksum_address(config, spender)
+    user_checksum_address = convert_to_checksum_address(
+        config,
+        config.user_wallet_address)
+    token_checksum_address = convert_to_checksum_address(config, token_to_approve)
+
+    token_contract_obj = get_token_approval_contract(
+        connection,
+        token_checksum_address
+    )
+
+    print('Approving contract "{}" to spend {} tokens belonging to token address: {}'.format(
+        spender_checksum_address, amount_of_tokens_to_spend, token_checksum_address))
+
+    nonce = connection.eth.get_transaction_count(user_checksum_address)
+
+    arguments = spender_checksum_address, amount_of_tokens_to_spend
+    raw_txn = token_contract_obj.functions.approve(
+        *arguments
+    ).build_transaction({
+        'value': 0,
+        'chainId': config.chain_id,
+        'gas': 4000000,
+        'maxFeePerGas': int(max_fee_per_gas),
+        'maxPriorityFeePerGas': 0,
+        'nonce': nonce})
+
+    signed_txn = connection.eth.account.sign_transaction(raw_txn,
+                                                         config.private_key)
+    tx_hash = connection.eth.send_raw_transaction(signed_txn.rawTransaction)
+
+    print("Txn submitted!")
+    print("Check status: https://arbiscan.io/tx/{}".format(tx_hash.hex()))
+
+    return tx_hash
 
 
 def check_if_approved(
@@ -17,7 +654,8 @@ def check_if_approved(
         approve: bool):
     """
     For a given chain, check if a given amount of tokens is approved for spend by a contract, and
-    approve is passed as true
+    approve is passed as true. Balances and allowances are served from the shared AllowanceCache
+    and approvals go through the shared ApprovalPlanner.
 
     Parameters
     ----------
@@ -39,78 +677,22 @@ def check_if_approved(
 
     """
 
-    connection = create_connection(config)
-
     if token_to_approve == "0x47904963fc8b2340414262125aF798B9655E58Cd":
         token_to_approve = "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
 
     spender_checksum_address = convert_to_checksum_address(
         config, spender
     )
-
-    # User wallet address will be taken from config file
-    user_checksum_address = convert_to_checksum_address(
-        config,
-        config.user_wallet_address)
-
     token_checksum_address = convert_to_checksum_address(config, token_to_approve)
 
-    token_contract_abi = json.load(open(os.path.join(
-        base_dir,
-        'gmx_python_sdk',
-        'contracts',
-        'token_approval.json'
-    )))
-
-    token_contract_obj = connection.eth.contract(address=token_to_approve,
-                                                 abi=token_contract_abi)
-
-    # TODO - for AVAX support this will need to incl WAVAX address
-    if token_checksum_address == "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1":
-        try:
-            balance_of = connection.eth.getBalance(user_checksum_address)
-        except AttributeError:
-            balance_of = connection.eth.get_balance(user_checksum_address)
-
-    else:
-        balance_of = token_contract_obj.functions.balanceOf(user_checksum_address).call()
-
-    if balance_of < amount_of_tokens_to_spend:
-        raise Exception("Insufficient balance!")
-
-    amount_approved = token_contract_obj.functions.allowance(
-        user_checksum_address,
-        spender_checksum_address
-    ).call()
-
     print("Checking coins for approval..")
-    if amount_approved < amount_of_tokens_to_spend and approve:
-
-        print('Approving contract "{}" to spend {} tokens belonging to token address: {}'.format(
-            spender_checksum_address, amount_of_tokens_to_spend, token_checksum_address))
-
-        nonce = connection.eth.get_transaction_count(user_checksum_address)
-
-        arguments = spender_checksum_address, amount_of_tokens_to_spend
-        raw_txn = token_contract_obj.functions.approve(
-            *arguments
-        ).build_transaction({
-            'value': 0,
-            'chainId': config.chain_id,
-            'gas': 4000000,
-            'maxFeePerGas': int(max_fee_per_gas),
-            'maxPriorityFeePerGas': 0,
-            'nonce': nonce})
-
-        signed_txn = connection.eth.account.sign_transaction(raw_txn,
-                                                             config.private_key)
-        tx_hash = connection.eth.send_raw_transaction(signed_txn.rawTransaction)
-
-        print("Txn submitted!")
-        print("Check status: https://arbiscan.io/tx/{}".format(tx_hash.hex()))
-
-    if amount_approved < amount_of_tokens_to_spend and not approve:
-        raise Exception("Token not approved for spend, please allow first!")
+    get_approval_planner(config).ensure_approved(
+        spender_checksum_address,
+        token_checksum_address,
+        amount_of_tokens_to_spend,
+        max_fee_per_gas,
+        approve=approve
+    )
 
     print('Contract "{}" approved to spend {} tokens belonging to token address: {}'.format(
         spender_checksum_address, amount_of_tokens_to_spend, token_checksum_address))
@@ -0,0 +1,115 @@
+"""
+Build the trimmed ABI artifacts loaded by get_contract_object.
+
+For each chain, every contract in contract_map is reduced to the functions
+and events the SDK references, and written with precomputed function
+selectors to contracts/<chain>/abis.trimmed.json. Re-run after changing
+which contract functions the SDK calls:
+
+    python -m gmx_python_sdk.scripts.v2.build_abis
+"""
+import json
+import os
+import re
+
+from eth_utils import function_abi_to_4byte_selector
+
+from .gmx_utils import (
+    contract_map, package_dir, base_dir, TRIMMED_ABI_FILENAME
+)
+
+# Sources scanned for contract functions and events the SDK uses
+SCANNED_DIRS = ['gmx_python_sdk', 'example_scripts', 'benchmarks']
+
+NAME_PATTERNS = [
+    re.compile(r"\.functions\.(\w+)\("),
+    re.compile(r"\.events\.(\w+)\("),
+    re.compile(r"fn_name\s*=\s*['\"](\w+)['\"]"),
+    re.compile(r"['\"](simulateExecute\w+)['\"]")
+]
+
+# Referenced by name at runtime, eg decoded from logs
+EXTRA_NAMES = ['EventLog', 'EventLog1', 'EventLog2']
+
+
+def find_used_names() -> set:
+    """
+    Names of contract functions and events referenced anywhere in the SDK,
+    example scripts and benchmarks
+
+    """
+    names = set(EXTRA_NAMES)
+    for directory in SCANNED_DIRS:
+        for root, _, files in os.walk(os.path.join(base_dir, directory)):
+            for filename in files:
+                if not filename.endswith(".py"):
+                    continue
+                with open(os.path.join(root, filename)) as f:
+                    source = f.read()
+                for pattern in NAME_PATTERNS:
+                    names.update(pattern.findall(source))
+
+    return names
+
+
+def trim_abi(abi: list, names: set) -> list:
+    return [
+        entry for entry in abi
+        if entry['type'] in ['function', 'event'] and entry['name'] in names
+    ]
+
+
+def build(chain: str, names: set) -> dict:
+    """
+    Trimmed ABI and selectors per contract for one chain
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    names : set
+        function and event names to keep.
+
+    Returns
+    -------
+    dict
+        dictionary keyed by contract name.
+
+    """
+    artifacts = {}
+    for contract_name, contract in contract_map[chain].items():
+        with open(os.path.join(package_dir, contract['abi_path'])) as f:
+            abi = trim_abi(json.load(f), names)
+
+        artifacts[contract_name] = {
+            'abi': abi,
+            'selectors': {
+                entry['name']: "0x" + function_abi_to_4byte_selector(entry).hex()
+                for entry in abi if entry['type'] == 'function'
+            }
+        }
+
+    return artifacts
+
+
+def main():
+    names = find_used_names()
+
+    for chain in contract_map:
+        artifacts = build(chain, names)
+        path = os.path.join(package_dir, 'contracts', chain, TRIMMED_ABI_FILENAME)
+        with open(path, "w") as f:
+            json.dump(artifacts, f, separators=(",", ":"), sort_keys=True)
+
+        print(
+            "{}: {} contracts, {} entries, {} bytes".format(
+                chain,
+                len(artifacts),
+                sum(len(artifact['abi']) for artifact in artifacts.values()),
+                os.path.getsize(path)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
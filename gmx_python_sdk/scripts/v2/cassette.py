@@ -0,0 +1,245 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from web3.providers.base import BaseProvider
+
+from . import gmx_utils
+
+CASSETTE_VERSION = 1
+
+
+class CassetteProvider(BaseProvider):
+    """
+    Web3 provider that records the JSON-RPC traffic of a wrapped provider
+    into a Cassette, or replays it from one without touching the network
+    """
+
+    def __init__(self, cassette, provider=None):
+        self.cassette = cassette
+        self.provider = provider
+
+    def make_request(self, method, params):
+        return self.cassette.rpc_request(self.provider, method, params)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        if self.cassette.mode == "replay":
+            return True
+
+        return self.provider.is_connected(show_traceback)
+
+    # web3 versions before 6 call isConnected
+    isConnected = is_connected
+
+
+class Cassette:
+    """
+    Record and replay every JSON-RPC request made through create_connection
+    and every requests.get to the GMX REST endpoints.
+
+    In record mode requests go to the network and each response is stored
+    under its method and params (or URL). In replay mode responses are
+    served from the cassette in the order they were recorded, repeating the
+    last one once exhausted, and a request that was never recorded raises.
+    Replay can inject latency, jitter and HTTP 429 errors, seeded so runs are
+    repeatable. Use as a context manager:
+
+        with Cassette("arbitrum.json.gz", mode="replay", latency=0.05):
+            OpenInterest(config).get_data()
+
+    Parameters
+    ----------
+    path : str
+        cassette file, gzipped if it ends with .gz.
+    mode : str, optional
+        record, replay, or auto to replay if the file exists and record
+        otherwise. The default is "auto".
+    latency : float, optional
+        seconds added to each replayed request. The default is 0.
+    jitter : float, optional
+        up to this many seconds added at random to each replayed request.
+        The default is 0.
+    error_rate : float, optional
+        probability a replayed request fails with HTTP 429. The default is 0.
+    seed : int, optional
+        random seed for jitter and errors. The default is 0.
+    """
+
+    def __init__(
+        self, path: str, mode: str = "auto", latency: float = 0,
+        jitter: float = 0, error_rate: float = 0, seed: int = 0
+    ):
+        if mode == "auto":
+            mode = "replay" if os.path.exists(path) else "record"
+
+        if mode not in ["record", "replay"]:
+            raise Exception("Unknown cassette mode: {}".format(mode))
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+        self.rpc_calls = 0
+        self.http_calls = 0
+        self.bytes_transferred = 0
+
+        self._rpc = {}
+        self._http = {}
+        self._positions = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests_get = None
+
+        if self.mode == "replay":
+            self.load()
+
+    def __enter__(self):
+        gmx_utils.add_provider_wrapper(self._wrap_provider, innermost=True)
+        self._requests_get = requests.get
+        requests.get = self.http_get
+
+        return self
+
+    def __exit__(self, *args):
+        gmx_utils.remove_provider_wrapper(self._wrap_provider)
+        requests.get = self._requests_get
+
+        if self.mode == "record":
+            self.save()
+
+    def _wrap_provider(self, provider, config):
+        return CassetteProvider(self, provider)
+
+    def load(self):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt") as f:
+            data = json.load(f)
+
+        self._rpc = data['rpc']
+        self._http = data['http']
+
+    def save(self):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "wt") as f:
+            json.dump(
+                {
+                    'version': CASSETTE_VERSION,
+                    'rpc': self._rpc,
+                    'http': self._http
+                },
+                f,
+                separators=(",", ":")
+            )
+
+    def reset_counters(self):
+        self.rpc_calls = 0
+        self.http_calls = 0
+        self.bytes_transferred = 0
+
+    def rpc_request(self, provider, method, params) -> dict:
+        """
+        Record or replay one JSON-RPC request
+        """
+        key = "{} {}".format(
+            method,
+            json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        )
+
+        if self.mode == "record":
+            response = provider.make_request(method, params)
+            with self._lock:
+                self._rpc.setdefault(key, []).append(response)
+        else:
+            self._inject_faults("rpc")
+            response = self._next(self._rpc, key)
+
+        self._count("rpc", key, response)
+
+        return response
+
+    def http_get(self, url, *args, **kwargs):
+        """
+        Record or replay a requests.get call
+        """
+        if self.mode == "record":
+            response = self._requests_get(url, *args, **kwargs)
+            with self._lock:
+                self._http.setdefault(url, []).append(
+                    {'status': response.status_code, 'body': response.text}
+                )
+        else:
+            if self._inject_faults("http"):
+                recorded = {'status': 429, 'body': ""}
+            else:
+                recorded = self._next(self._http, url)
+
+            response = requests.models.Response()
+            response.status_code = recorded['status']
+            response._content = recorded['body'].encode()
+            response.url = url
+            response.encoding = "utf-8"
+
+        self._count("http", url, response.text)
+
+        return response
+
+    def _next(self, recorded: dict, key: str):
+        """
+        Next recorded response for a key, repeating the last once exhausted
+        """
+        with self._lock:
+            if key not in recorded:
+                raise Exception(
+                    "Request not found in cassette {}: {}".format(
+                        self.path, key[:200]
+                    )
+                )
+
+            responses = recorded[key]
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+
+            return responses[min(position, len(responses) - 1)]
+
+    def _inject_faults(self, kind: str) -> bool:
+        """
+        Sleep for the configured latency and decide whether this request
+        fails with a 429. RPC failures raise as the HTTP provider would,
+        HTTP failures are returned to the caller as a 429 response.
+
+        """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail and kind == "rpc":
+            response = requests.models.Response()
+            response.status_code = 429
+            raise requests.exceptions.HTTPError(
+                "429 Client Error: Too Many Requests",
+                response=response
+            )
+
+        return fail
+
+    def _count(self, kind: str, key: str, response):
+        size = len(key) + len(
+            response if isinstance(response, str)
+            else json.dumps(response, default=str)
+        )
+
+        with self._lock:
+            if kind == "rpc":
+                self.rpc_calls += 1
+            else:
+                self.http_calls += 1
+            self.bytes_transferred += size
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class SerialExecutor:
+    """
+    Run every work unit in the calling thread, in order
+    """
+
+    def map(self, function, items) -> list:
+        return [function(item) for item in items]
+
+
+class ThreadExecutor:
+    """
+    Run work units on a thread pool, the default for RPC bound collectors.
+    The pool is started on first use and kept until shutdown, so its
+    threads, and the shared connection each thread holds, are reused by
+    every map call. Work units must not map on the same executor.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        threads in the pool. The default is None, the ThreadPoolExecutor
+        default.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def map(self, function, items) -> list:
+        return list(self._get_pool().map(function, items))
+
+    def shutdown(self):
+        """
+        Stop the pool once running work units finish. A later map starts a
+        new one.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.__class__.__name__
+                )
+            return self._pool
+
+
+class ProcessExecutor:
+    """
+    Run work units on a process pool. The function, items and results must
+    be picklable, and each process makes its own RPC connections, so a
+    Cassette or Instrumentation in the parent does not see the requests.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        processes in the pool. The default is None, one per core.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+
+    def map(self, function, items) -> list:
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(function, items))
+
+
+class AsyncioExecutor:
+    """
+    Run work units as asyncio tasks, each in a worker thread. Use amap from
+    inside a running event loop and map otherwise.
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        work units in flight at once. The default is None, no limit.
+    """
+
+    def __init__(self, max_concurrency: int = None):
+        self.max_concurrency = max_concurrency
+
+    def map(self, function, items) -> list:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.amap(function, items))
+
+        raise Exception(
+            "AsyncioExecutor.map called inside a running event loop, "
+            "await amap instead"
+        )
+
+    async def amap(self, function, items) -> list:
+        semaphore = (
+            asyncio.Semaphore(self.max_concurrency)
+            if self.max_concurrency else None
+        )
+
+        async def _run(item):
+            if semaphore is None:
+                return await asyncio.to_thread(function, item)
+            async with semaphore:
+                return await asyncio.to_thread(function, item)
+
+        return list(await asyncio.gather(*[_run(item) for item in items]))
+
+
+EXECUTORS = {
+    'serial': SerialExecutor,
+    'thread': ThreadExecutor,
+    'process': ProcessExecutor,
+    'asyncio': AsyncioExecutor
+}
+
+# ThreadExecutor shared by every collector created without an executor
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_executor(executor=None):
+    """
+    Resolve an executor for mapping work units
+
+    Parameters
+    ----------
+    executor : str or object, optional
+        serial, thread, process or asyncio, or any object with a
+        map(function, items) method such as a concurrent.futures Executor.
+        The default is None, one ThreadExecutor shared by every caller, whose
+        threads live for the rest of the process.
+
+    Returns
+    -------
+    object
+        executor with a map(function, items) method.
+
+    """
+    global _default_executor
+
+    if executor is None:
+        with _default_executor_lock:
+            if _default_executor is None:
+                _default_executor = ThreadExecutor()
+            return _default_executor
+
+    if isinstance(executor, str):
+        if executor not in EXECUTORS:
+            raise Exception(
+                "Unknown executor '{}', choose from {}".format(
+                    executor, list(EXECUTORS)
+                )
+            )
+        return EXECUTORS[executor]()
+
+    if not hasattr(executor, 'map'):
+        raise Exception("Executor must have a map(function, items) method")
+
+    return executor
@@ -0,0 +1,360 @@
+import itertools
+import os
+import time
+
+import numpy as np
+
+from .gmx_utils import package_dir
+
+SNAPSHOT_COLUMNS = [
+    'timestamp', 'market', 'side', 'funding', 'borrow', 'liquidity',
+    'open_interest'
+]
+
+# Rates are in % per hour, as from GetFundingFee and GetBorrowAPR. Trading
+# costs are fee_rate * size plus impact_factor * size ** impact_exponent on
+# every open and close, GMX's price impact shape without the rebate for
+# trades that reduce the open interest imbalance.
+DEFAULT_PARAMETERS = {
+    'entry_threshold': 0.0,
+    'exit_threshold': 0.0,
+    'rotation_margin': 0.0,
+    'position_size_usd': 10000.0,
+    'fee_rate': 0.0007,
+    'impact_factor': 0.0,
+    'impact_exponent': 2.0,
+    'ignore_oi_imbalance': False
+}
+
+
+def get_market_snapshot_path(chain: str) -> str:
+    return os.path.join(
+        package_dir,
+        'data_store',
+        '{}_market_snapshots.csv'.format(chain)
+    )
+
+
+def record_market_snapshot(
+    config, graph=None, path: str = None, timestamp: float = None
+):
+    """
+    Append the current funding, borrow, available liquidity and open
+    interest of every market to the snapshot time series in data_store, eg
+    once a minute from a scheduler
+
+    Parameters
+    ----------
+    config : ConfigManager
+        chain config.
+    graph : MetricGraph, optional
+        graph to read the metrics from, refreshed first. The default is
+        None, a new graph.
+    path : str, optional
+        csv to append to. The default is None, the chain file in data_store.
+    timestamp : float, optional
+        unix time of the snapshot. The default is None, now.
+
+    Returns
+    -------
+    pd.DataFrame
+        rows appended, one per market and side.
+
+    """
+    import pandas as pd
+    from .get.metric_graph import MetricGraph
+
+    if graph is None:
+        graph = MetricGraph(config)
+    else:
+        graph.refresh()
+
+    data = graph.get('funding', 'borrow', 'liquidity', 'open_interest')
+    timestamp = time.time() if timestamp is None else timestamp
+
+    rows = [
+        (
+            timestamp,
+            market,
+            side,
+            data['funding'][side][market],
+            data['borrow'][side].get(market),
+            data['liquidity'][side].get(market),
+            data['open_interest'][side].get(market)
+        )
+        for side in ['long', 'short']
+        for market in data['funding'][side]
+    ]
+
+    dataframe = pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS)
+    path = path or get_market_snapshot_path(config.chain)
+    dataframe.to_csv(
+        path,
+        mode='a',
+        header=not os.path.exists(path),
+        index=False
+    )
+
+    return dataframe
+
+
+class MarketSnapshots:
+    """
+    Snapshot time series as aligned (time, farm) arrays, a farm being one
+    side of one market, eg ("ETH", "short")
+
+    Parameters
+    ----------
+    timestamps : np.ndarray
+        unix times, ascending.
+    farms : list
+        (market, side) tuples, one per column.
+    funding, borrow, liquidity, open_interest : np.ndarray
+        (time, farm) arrays, NaN where unknown.
+    """
+
+    def __init__(
+        self, timestamps: np.ndarray, farms: list, funding: np.ndarray,
+        borrow: np.ndarray, liquidity: np.ndarray, open_interest: np.ndarray
+    ):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.farms = list(farms)
+        self.funding = np.asarray(funding, dtype=np.float64)
+        self.borrow = np.asarray(borrow, dtype=np.float64)
+        self.liquidity = np.asarray(liquidity, dtype=np.float64)
+        self.open_interest = np.asarray(open_interest, dtype=np.float64)
+
+        # Open interest of the other side of the same market
+        columns = {farm: i for i, farm in enumerate(self.farms)}
+        opposite = [
+            columns.get((market, "short" if side == "long" else "long"), -1)
+            for market, side in self.farms
+        ]
+        self.opposite_open_interest = np.where(
+            np.array(opposite) >= 0,
+            self.open_interest[:, opposite],
+            np.nan
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_dataframe(cls, dataframe, fill: bool = True):
+        """
+        Build from rows in SNAPSHOT_COLUMNS layout
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            one row per timestamp, market and side.
+        fill : bool, optional
+            carry the last value forward over gaps. The default is True.
+
+        """
+        import pandas as pd
+
+        farms = sorted(set(zip(dataframe['market'], dataframe['side'])))
+
+        # pivot_table drops columns that are all NaN, so put back every farm
+        # of every metric, left as NaN
+        wide = dataframe.pivot_table(
+            index='timestamp',
+            columns=['market', 'side'],
+            values=SNAPSHOT_COLUMNS[3:],
+            aggfunc='last'
+        ).reindex(
+            columns=pd.MultiIndex.from_tuples(
+                [(column,) + farm for column in SNAPSHOT_COLUMNS[3:] for farm in farms]
+            )
+        ).sort_index()
+        if fill:
+            wide = wide.ffill()
+
+        return cls(
+            wide.index.to_numpy(dtype=np.float64),
+            farms,
+            *[
+                wide[column][farms].to_numpy(dtype=np.float64)
+                for column in SNAPSHOT_COLUMNS[3:]
+            ]
+        )
+
+
+def load_market_snapshots(chain: str, path: str = None, fill: bool = True) -> MarketSnapshots:
+    """
+    Load the snapshot time series written by record_market_snapshot
+    """
+    import pandas as pd
+
+    return MarketSnapshots.from_dataframe(
+        pd.read_csv(path or get_market_snapshot_path(chain)),
+        fill=fill
+    )
+
+
+def parameter_grid(**values) -> dict:
+    """
+    Every combination of the given parameter values, as aligned arrays
+
+        parameter_grid(entry_threshold=[0, 0.001], position_size_usd=[1e4, 1e5])
+
+    Parameters not given take their DEFAULT_PARAMETERS value.
+
+    """
+    for name in values:
+        if name not in DEFAULT_PARAMETERS:
+            raise Exception(
+                "Unknown parameter '{}', choose from {}".format(
+                    name, list(DEFAULT_PARAMETERS)
+                )
+            )
+
+    names = list(values)
+    combinations = list(itertools.product(*[values[name] for name in names]))
+
+    grid = {
+        name: np.array([combination[i] for combination in combinations])
+        for i, name in enumerate(names)
+    }
+    for name, default in DEFAULT_PARAMETERS.items():
+        if name not in grid:
+            grid[name] = np.full(len(combinations), default)
+
+    return grid
+
+
+class FarmingBacktester:
+    """
+    Replay market snapshots and simulate a funding farming rotation rule
+    for many parameter sets at once. At every snapshot each parameter set:
+
+    - exits its farm if the net rate (funding - borrow, % per hour) fell
+      below exit_threshold,
+    - considers farms whose net rate is at least entry_threshold, whose
+      available liquidity covers position_size_usd and, unless
+      ignore_oi_imbalance, whose open interest imbalance toward the other
+      side covers it too,
+    - enters the best of them if flat, or rotates into it if it beats the
+      current farm by more than rotation_margin,
+
+    paying trading costs on every open and close, then earns the net rate of
+    its farm until the next snapshot. Time is stepped in order, parameter
+    sets and farms are vectorized.
+
+    Parameters
+    ----------
+    snapshots : MarketSnapshots
+        snapshot time series.
+    parameters : dict
+        aligned parameter arrays, eg from parameter_grid.
+    """
+
+    def __init__(self, snapshots: MarketSnapshots, parameters: dict):
+        self.snapshots = snapshots
+
+        lengths = set(len(np.atleast_1d(value)) for value in parameters.values())
+        if len(lengths) > 1:
+            raise Exception("Parameter arrays must have the same length")
+        size = lengths.pop() if lengths else 1
+
+        self.parameters = {
+            name: np.broadcast_to(
+                np.asarray(parameters.get(name, default)), (size,)
+            ).copy()
+            for name, default in DEFAULT_PARAMETERS.items()
+        }
+
+    def run(self, record_every: int = None) -> dict:
+        """
+        Run the backtest
+
+        Parameters
+        ----------
+        record_every : int, optional
+            keep the equity of every parameter set each record_every
+            snapshots. The default is None, final results only.
+
+        Returns
+        -------
+        dict
+            aligned arrays per parameter set: the parameters, net_pnl_usd,
+            funding_pnl_usd, costs_usd, trades, hours_in_farm and farm_at_end
+            (farm index, -1 if flat), plus equity (records, parameter sets)
+            if record_every was given. Positions open at the end are not
+            charged a close.
+
+        """
+        snapshots = self.snapshots
+        parameters = self.parameters
+
+        size = parameters['position_size_usd'].astype(np.float64)
+        entry_threshold = parameters['entry_threshold'][:, None]
+        exit_threshold = parameters['exit_threshold']
+        rotation_margin = parameters['rotation_margin']
+        ignore_imbalance = parameters['ignore_oi_imbalance'].astype(bool)[:, None]
+        trade_cost = (
+            size * parameters['fee_rate']
+            + parameters['impact_factor'] * size ** parameters['impact_exponent']
+        )
+
+        # Each snapshot earns until the next, the last earns nothing
+        hours = np.diff(snapshots.timestamps, append=snapshots.timestamps[-1]) / 3600
+
+        count = len(size)
+        rows = np.arange(count)
+        held = np.full(count, -1)
+        funding_pnl = np.zeros(count)
+        costs = np.zeros(count)
+        trades = np.zeros(count, dtype=np.int64)
+        hours_in_farm = np.zeros(count)
+        equity = []
+
+        size_column = size[:, None]
+        for t in range(len(snapshots)):
+            rates = snapshots.funding[t] - snapshots.borrow[t]
+            imbalances = snapshots.opposite_open_interest[t] - snapshots.open_interest[t]
+
+            eligible = (
+                (rates >= entry_threshold)
+                & (snapshots.liquidity[t] >= size_column)
+                & (ignore_imbalance | (imbalances >= size_column))
+            )
+            scores = np.where(eligible, rates, -np.inf)
+            best = scores.argmax(axis=1)
+            best_rate = scores[rows, best]
+
+            is_held = held >= 0
+            current_rate = np.where(is_held, rates[held], np.nan)
+            staying = is_held & (current_rate >= exit_threshold)
+            rotating = best_rate > np.where(
+                staying, current_rate + rotation_margin, -np.inf
+            )
+
+            new_held = np.where(rotating, best, np.where(staying, held, -1))
+            changed = new_held != held
+            legs = (changed & is_held).astype(np.int64) + (changed & (new_held >= 0))
+            trades += legs
+            costs += legs * trade_cost
+            held = new_held
+
+            is_held = held >= 0
+            funding_pnl += np.where(is_held, rates[held] * size / 100 * hours[t], 0)
+            hours_in_farm += is_held * hours[t]
+
+            if record_every and t % record_every == 0:
+                equity.append(funding_pnl - costs)
+
+        results = dict(parameters)
+        results.update({
+            'net_pnl_usd': funding_pnl - costs,
+            'funding_pnl_usd': funding_pnl,
+            'costs_usd': costs,
+            'trades': trades,
+            'hours_in_farm': hours_in_farm,
+            'farm_at_end': held
+        })
+        if record_every:
+            results['equity'] = np.array(equity)
+
+        return results
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .gmx_utils import create_connection
+
+# Reward percentile used for the priority fee and the headroom given on top
+# of the next block base fee for each urgency level
+URGENCY_LEVELS = {
+    "low": {"reward_percentile": 10, "base_fee_multiplier": 1.1},
+    "medium": {"reward_percentile": 50, "base_fee_multiplier": 1.35},
+    "high": {"reward_percentile": 90, "base_fee_multiplier": 2},
+}
+
+FEE_HISTORY_BLOCK_COUNT = 20
+REFRESH_INTERVAL = 2
+
+
+class FeeOracle:
+    """
+    Keep a rolling eth_feeHistory window for a chain and serve EIP-1559 fee
+    suggestions from memory. Once started, a daemon thread refreshes the
+    window every refresh_interval seconds. If the thread is not running,
+    suggestions are refreshed on demand once older than refresh_interval.
+    """
+
+    def __init__(
+        self, config, block_count: int = FEE_HISTORY_BLOCK_COUNT,
+        refresh_interval: float = REFRESH_INTERVAL
+    ):
+        self.config = config
+        self.block_count = block_count
+        self.refresh_interval = refresh_interval
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._connection = create_connection(config)
+        self._reward_percentiles = sorted(
+            set(
+                level['reward_percentile'] for level in URGENCY_LEVELS.values()
+            )
+        )
+        self._next_base_fee = None
+        self._rewards = {}
+        self._last_updated = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start refreshing the fee history window in the background
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="FeeOracle-{}".format(self.config.chain),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background refresh thread
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self):
+        """
+        Query eth_feeHistory and replace the cached window
+        """
+        fee_history = self._connection.eth.fee_history(
+            self.block_count,
+            'latest',
+            self._reward_percentiles
+        )
+
+        # baseFeePerGas has one more entry than blocks requested, the last
+        # being the base fee of the next block
+        next_base_fee = fee_history['baseFeePerGas'][-1]
+        rewards = np.array(fee_history.get('reward') or [], dtype=float)
+
+        if rewards.ndim == 2 and rewards.shape[1] == len(self._reward_percentiles):
+            rewards = {
+                percentile: int(np.median(rewards[:, i]))
+                for i, percentile in enumerate(self._reward_percentiles)
+            }
+        else:
+            # Quiet blocks and some providers return no rewards
+            priority_fee = self._get_fallback_priority_fee()
+            rewards = {
+                percentile: priority_fee
+                for percentile in self._reward_percentiles
+            }
+
+        with self._lock:
+            self._next_base_fee = next_base_fee
+            self._rewards = rewards
+            self._last_updated = time.time()
+
+    def get_fee_suggestion(self, urgency: str = "medium") -> dict:
+        """
+        Suggested EIP-1559 fee fields for a given urgency
+
+        Parameters
+        ----------
+        urgency : str, optional
+            low, medium or high. The default is "medium".
+
+        Returns
+        -------
+        dict
+            dictionary with maxFeePerGas, maxPriorityFeePerGas and the
+            expected baseFeePerGas of the next block.
+
+        """
+        level = URGENCY_LEVELS[urgency]
+
+        if self._is_stale():
+            self.refresh()
+
+        with self._lock:
+            base_fee = self._next_base_fee
+            priority_fee = self._rewards[level['reward_percentile']]
+
+        return {
+            'maxFeePerGas': int(
+                base_fee * level['base_fee_multiplier'] + priority_fee
+            ),
+            'maxPriorityFeePerGas': priority_fee,
+            'baseFeePerGas': base_fee
+        }
+
+    def get_max_fee_per_gas(self, urgency: str = "medium") -> int:
+        return self.get_fee_suggestion(urgency)['maxFeePerGas']
+
+    def get_gas_price(self) -> int:
+        """
+        Expected effective gas price of the next block, used when estimating
+        keeper execution fees
+
+        """
+        suggestion = self.get_fee_suggestion("medium")
+
+        return suggestion['baseFeePerGas'] + suggestion['maxPriorityFeePerGas']
+
+    def _get_fallback_priority_fee(self) -> int:
+        try:
+            return int(self._connection.eth.max_priority_fee)
+        except Exception as e:
+            self.log.warning(
+                "eth_maxPriorityFeePerGas failed, using 0: {}".format(e)
+            )
+            return 0
+
+    def _is_stale(self) -> bool:
+        with self._lock:
+            if self._next_base_fee is None:
+                return True
+
+            max_age = self.refresh_interval
+
+            # a running refresh thread keeps the window fresh on its own,
+            # only fall back to refreshing here if it has been failing
+            if self._thread is not None and self._thread.is_alive():
+                max_age = self.refresh_interval * 5
+
+            return time.time() - self._last_updated > max_age
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.log.warning("Fee history refresh failed: {}".format(e))
+
+            self._stop_event.wait(self.refresh_interval)
+
+
+_fee_oracles = {}
+_fee_oracles_lock = threading.Lock()
+
+
+def get_fee_oracle(config, start: bool = True) -> FeeOracle:
+    """
+    Get the process wide FeeOracle for the chain in config, starting its
+    background refresh on first use
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+    start : bool, optional
+        start the background refresh thread. The default is True.
+
+    """
+    with _fee_oracles_lock:
+        if config.chain not in _fee_oracles:
+            _fee_oracles[config.chain] = FeeOracle(config)
+
+        fee_oracle = _fee_oracles[config.chain]
+
+    if start:
+        fee_oracle.start()
+
+    return fee_oracle
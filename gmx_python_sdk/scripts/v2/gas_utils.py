@@ -1,3 +1,6 @@
+import threading
+import time
+
 from .keys import (
     decrease_order_gas_limit_key, increase_order_gas_limit_key,
     execution_gas_fee_base_amount_key, execution_gas_fee_multiplier_key,
@@ -5,28 +8,38 @@ from .keys import (
     withdraw_gas_limit_key
 )
 
-from .gmx_utils import apply_factor, get_datastore_contract, create_connection
+from .gmx_utils import (
+    apply_factor, get_datastore_contract, create_connection, ConfigManager
+)
+from .multicall import multicall
+
+# Gas limits only change on governance updates so can be held for a long time
+GAS_PARAMETERS_TTL = 3600
 
+# Unused gas is not charged, so allow the transaction double the keeper's
+# estimated limit for the operation
+TRANSACTION_GAS_LIMIT_MULTIPLIER = 2
 
-def get_execution_fee(gas_limits: dict, estimated_gas_limit, gas_price: int):
+
+def get_execution_fee(gas_limits: dict, estimated_gas_limit: int, gas_price: int):
     """
-    Given a dictionary of gas_limits, the uncalled datastore object of a given operation, and the
+    Given a dictionary of gas_limits, the gas limit of a given operation, and the
     latest gas price, calculate the minimum execution fee required to perform an action
 
     Parameters
     ----------
     gas_limits : dict
-        dictionary of uncalled datastore limit obkects.
-    estimated_gas_limit : datastore_object
-        the uncalled datastore object specific to operation that will be undertaken.
+        dictionary of gas limits as returned by GasParameters.get_gas_limits.
+    estimated_gas_limit : int
+        the gas limit specific to operation that will be undertaken.
     gas_price : int
         latest gas price.
 
     """
 
-    base_gas_limit = gas_limits['estimated_fee_base_gas_limit'].call()
-    multiplier_factor = gas_limits['estimated_fee_multiplier_factor'].call()
-    adjusted_gas_limit = base_gas_limit + apply_factor(estimated_gas_limit.call(),
+    base_gas_limit = gas_limits['estimated_fee_base_gas_limit']
+    multiplier_factor = gas_limits['estimated_fee_multiplier_factor']
+    adjusted_gas_limit = base_gas_limit + apply_factor(estimated_gas_limit,
                                                        multiplier_factor)
 
     return adjusted_gas_limit * gas_price
@@ -58,11 +71,160 @@ def get_gas_limits(datastore_object):
     return gas_limits
 
 
+class GasParameters:
+    """
+    Cache of the datastore gas limits for a chain. All limits are loaded in a
+    single multicall and held for ttl seconds, after which the next read will
+    reload them. Call invalidate to force a reload, eg after a governance
+    update is seen.
+    """
+
+    def __init__(self, config, ttl: int = GAS_PARAMETERS_TTL):
+        self.config = config
+        self.ttl = ttl
+
+        self._gas_limits = None
+        self._last_updated = 0
+        self._lock = threading.Lock()
+
+    def get_gas_limits(self) -> dict:
+        """
+        Get the gas limits, reloading them if the cache has expired
+
+        Returns
+        -------
+        dict
+            dictionary of gas limits keyed by operation.
+
+        """
+        with self._lock:
+            if self._gas_limits is None or \
+                    time.time() - self._last_updated > self.ttl:
+                self._gas_limits = self._load_gas_limits()
+                self._last_updated = time.time()
+
+            return self._gas_limits
+
+    def invalidate(self):
+        """
+        Drop the cached gas limits so they are reloaded on next use
+        """
+        with self._lock:
+            self._gas_limits = None
+
+    def get_estimated_gas_limit(self, operation: str, swap_count: int = 0) -> int:
+        """
+        Get the gas limit a keeper will need to execute a given operation,
+        including the gas for each swap along the way
+
+        Parameters
+        ----------
+        operation : str
+            one of deposit, withdraw, swap_order, increase_order or
+            decrease_order.
+        swap_count : int, optional
+            number of markets swapped through. The default is 0.
+
+        """
+        gas_limits = self.get_gas_limits()
+
+        return gas_limits[operation] + gas_limits['single_swap'] * swap_count
+
+    def get_execution_fee(
+        self, operation: str, gas_price: int, swap_count: int = 0
+    ) -> int:
+        """
+        Calculate the minimum execution fee for an operation at a given gas
+        price without touching the chain
+
+        Parameters
+        ----------
+        operation : str
+            one of deposit, withdraw, swap_order, increase_order or
+            decrease_order.
+        gas_price : int
+            gas price in wei.
+        swap_count : int, optional
+            number of markets swapped through. The default is 0.
+
+        """
+        return int(
+            get_execution_fee(
+                self.get_gas_limits(),
+                self.get_estimated_gas_limit(operation, swap_count),
+                gas_price
+            )
+        )
+
+    def get_transaction_gas_limit(
+        self, operation: str, swap_count: int = 0
+    ) -> int:
+        """
+        Gas limit to set on the transaction creating an operation
+
+        Parameters
+        ----------
+        operation : str
+            one of deposit, withdraw, swap_order, increase_order or
+            decrease_order.
+        swap_count : int, optional
+            number of markets swapped through. The default is 0.
+
+        """
+        return int(
+            self.get_estimated_gas_limit(operation, swap_count) *
+            TRANSACTION_GAS_LIMIT_MULTIPLIER
+        )
+
+    def _load_gas_limits(self) -> dict:
+        """
+        Read every gas limit from the datastore in one multicall
+
+        Returns
+        -------
+        dict
+            dictionary of gas limits keyed by operation.
+
+        """
+        datastore = get_datastore_contract(self.config, trimmed=True)
+        uncalled_gas_limits = get_gas_limits(datastore)
+
+        gas_limits = multicall(
+            self.config.chain,
+            list(uncalled_gas_limits.values())
+        )
+
+        return dict(zip(uncalled_gas_limits.keys(), gas_limits))
+
+
+_gas_parameters = {}
+_gas_parameters_lock = threading.Lock()
+
+
+def get_gas_parameters(config) -> GasParameters:
+    """
+    Get the process wide GasParameters cache for the chain in config
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+
+    """
+    with _gas_parameters_lock:
+        if config.chain not in _gas_parameters:
+            _gas_parameters[config.chain] = GasParameters(config)
+
+        return _gas_parameters[config.chain]
+
+
 if __name__ == "__main__":
 
-    chain = 'arbitrum'
-    connection = create_connection(chain=chain)
-    datastore_object = get_datastore_contract(chain)
-    gas_limits = get_gas_limits(datastore_object)
+    config = ConfigManager(chain='arbitrum')
+    config.set_config()
+    connection = create_connection(config)
     gas_price = connection.eth.gas_price
-    execution_fee = int(get_execution_fee(gas_limits, gas_limits['increase_order'], gas_price))
+    execution_fee = get_gas_parameters(config).get_execution_fee(
+        'increase_order',
+        gas_price
+    )
@@ -1,7 +1,9 @@
 import logging
+from functools import partial
 
 from .get_markets import Markets
 from .get_oracle_prices import OraclePrices
+from ..executors import get_executor
 from ..gmx_utils import (
     get_reader_contract, contract_map, save_json_file_to_datastore,
     save_csv_to_datastore, make_timestamped_dataframe
@@ -9,16 +11,38 @@ from ..gmx_utils import (
 
 
 class GetData:
+    """
+    Base class of the market data collectors. Subclasses describe the work
+    for one market as a pure function of the market record and a snapshot of
+    shared inputs, _process_market(market, snapshot), which the executor maps
+    over every market before _collate combines the results. Work units keep
+    no state on the instance, so any executor can run them.
+
+    Parameters
+    ----------
+    config : ConfigManager
+        chain config.
+    use_local_datastore : bool, optional
+        read inputs from the local datastore where supported. The default is
+        False.
+    filter_swap_markets : bool, optional
+        drop swap only markets. The default is True.
+    executor : str or object, optional
+        serial, thread, process, asyncio or an object with a map method, see
+        executors.get_executor. The default is None, the shared thread pool.
+    """
+
     def __init__(
         self, config: str, use_local_datastore: bool = False,
-        filter_swap_markets: bool = True
+        filter_swap_markets: bool = True, executor=None
     ):
         self.config = config
         self.use_local_datastore = use_local_datastore
         self.filter_swap_markets = filter_swap_markets
+        self.executor = get_executor(executor)
 
         self.log = logging.getLogger(self.__class__.__name__)
-        self.markets = Markets(config)
+        self.markets = self._get_markets()
         self.reader_contract = get_reader_contract(config)
         self.data_store_contract_address = (
             contract_map[self.config.chain]['datastore']['contract_address']
@@ -28,9 +52,6 @@ class GetData:
             "short": {}
         }
 
-        self._long_token_address = None
-        self._short_token_address = None
-
     def get_data(self, to_json: bool = False, to_csv: bool = False):
         if self.filter_swap_markets:
             self._filter_swap_markets()
@@ -53,21 +74,100 @@ class GetData:
         return data
 
     def _get_data_processing(self):
-        pass
-
-    def _get_token_addresses(self, market_key: str):
-        self._long_token_address = self.markets.get_long_token_address(
-            market_key
+        markets = list(self.markets.info.values())
+        results = self._map_markets(
+            self._process_market,
+            self._get_snapshot(),
+            markets
         )
-        self._short_token_address = self.markets.get_short_token_address(
-            market_key
+        self.output = self._collate(markets, results)
+
+        return self.output
+
+    def _get_snapshot(self) -> dict:
+        """
+        Inputs shared by every market, fetched once before the work units
+        run. Must be picklable to use a process executor.
+        """
+        return {
+            'config': self.config,
+            'prices': self._get_recent_prices()
+        }
+
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict):
+        """
+        Work unit for one market
+
+        Parameters
+        ----------
+        market : dict
+            market record from Markets.info.
+        snapshot : dict
+            shared inputs from _get_snapshot.
+
+        """
+        raise NotImplementedError
+
+    def _collate(self, markets: list, results: list) -> dict:
+        """
+        Combine the work unit results, by default dictionaries with a long
+        and short value, into the collector output keyed by market symbol
+        """
+        output = {
+            "long": {},
+            "short": {}
+        }
+        for market, result in zip(markets, results):
+            output['long'][market['market_symbol']] = result['long']
+            output['short'][market['market_symbol']] = result['short']
+
+        return output
+
+    def _map_markets(
+        self, function, snapshot: dict, markets: list = None
+    ) -> list:
+        """
+        Run function(market, snapshot) for every market on the executor
+        """
+        if markets is None:
+            markets = list(self.markets.info.values())
+
+        return list(
+            self.executor.map(partial(function, snapshot=snapshot), markets)
         )
-        self.log.info(
-            "Long Token Address: {}\nShort Token Address: {}".format(
-                self._long_token_address, self._short_token_address
-            )
+
+    def _get_markets(self):
+        return Markets(self.config)
+
+    def _get_recent_prices(self):
+        return OraclePrices(self.config.chain).get_recent_prices()
+
+    def _get_market_info(self) -> dict:
+        """
+        Get the marketInfo from the reader contract for every market
+
+        Returns
+        -------
+        market_info : dict
+            raw reader output keyed by market key.
+
+        """
+        markets = list(self.markets.info.values())
+        results = self._map_markets(
+            get_market_info,
+            {
+                'config': self.config,
+                'prices': self._get_recent_prices()
+            },
+            markets
         )
 
+        return {
+            market['gmx_market_address']: result
+            for market, result in zip(markets, results)
+        }
+
     def _filter_swap_markets(self):
         # TODO: Move to markets MAYBE
         keys_to_remove = []
@@ -79,139 +179,69 @@ class GetData:
 
         [self.markets.info.pop(k) for k in keys_to_remove]
 
-    def _get_pnl(
-        self, market: list, prices_list: list, is_long: bool,
-        maximize: bool = False
-    ):
-        open_interest_pnl = (
-            self.reader_contract.functions.getOpenInterestWithPnl(
-                self.data_store_contract_address,
-                market,
-                prices_list,
-                is_long,
-                maximize
-            )
+
+def get_market_prices(market: dict, oracle_prices_dict: dict) -> tuple:
+    """
+    Min and max oracle prices of the index, long and short token of a market
+    in the format the reader contract expects
+
+    Parameters
+    ----------
+    market : dict
+        market record from Markets.info.
+    oracle_prices_dict : dict
+        recent signed prices keyed by token address.
+
+    Returns
+    -------
+    prices : tuple
+        index, long and short (min, max) price tuples.
+
+    """
+    def _price_tuple(token_address):
+        return (
+            int(oracle_prices_dict[token_address]['minPriceFull']),
+            int(oracle_prices_dict[token_address]['maxPriceFull'])
         )
 
-        pnl = self.reader_contract.functions.getPnl(
-            self.data_store_contract_address,
-            market,
-            prices_list,
-            is_long,
-            maximize
+    index_prices = _price_tuple(market['index_token_address'])
+    long_prices = _price_tuple(market['long_token_address'])
+
+    try:
+        short_prices = _price_tuple(market['short_token_address'])
+
+    # TODO - this needs to be here until GMX add stables to signed price
+    # API
+    except KeyError:
+        short_prices = (
+            int(1000000000000000000000000),
+            int(1000000000000000000000000)
         )
 
-        return open_interest_pnl, pnl
+    return index_prices, long_prices, short_prices
 
-    def _get_oracle_prices(
-        self,
-        market_key: str,
-        index_token_address: str,
-        return_tuple: bool = False,
-    ):
-        """
-        For a given market get the marketInfo from the reader contract
 
-        Parameters
-        ----------
-        market_key : str
-            address of GMX market.
-        index_token_address : str
-            address of index token.
-        long_token_address : str
-            address of long collateral token.
-        short_token_address : str
-            address of short collateral token.
+def get_market_info(market: dict, snapshot: dict):
+    """
+    Work unit fetching the marketInfo of one market from the reader contract
 
-        Returns
-        -------
-        reader_contract object
-            unexecuted reader contract object.
+    Parameters
+    ----------
+    market : dict
+        market record from Markets.info.
+    snapshot : dict
+        config and oracle prices.
 
-        """
-        oracle_prices_dict = OraclePrices(self.config.chain).get_recent_prices()
-
-        try:
-            prices = (
-                (
-                    int(
-                        (
-                            oracle_prices_dict[index_token_address]
-                            ['minPriceFull']
-                        )
-                    ),
-                    int(
-                        (
-                            oracle_prices_dict[index_token_address]
-                            ['maxPriceFull']
-                        )
-                    )
-                ),
-                (
-                    int(
-                        (
-                            oracle_prices_dict[self._long_token_address]
-                            ['minPriceFull']
-                        )
-                    ),
-                    int(
-                        (
-                            oracle_prices_dict[self._long_token_address]
-                            ['maxPriceFull']
-                        )
-                    )
-                ),
-                (
-                    int(
-                        (
-                            oracle_prices_dict[self._short_token_address]
-                            ['minPriceFull']
-                        )
-                    ),
-                    int(
-                        (
-                            oracle_prices_dict[self._short_token_address]
-                            ['maxPriceFull']
-                        )
-                    )
-                ))
-
-        # TODO - this needs to be here until GMX add stables to signed price
-        # API
-        except KeyError:
-            prices = (
-                (
-                    int(
-                        oracle_prices_dict[index_token_address]['minPriceFull']
-                    ),
-                    int(
-                        oracle_prices_dict[index_token_address]['maxPriceFull']
-                    )
-                ),
-                (
-                    int(
-                        (
-                            oracle_prices_dict[self._long_token_address]
-                            ['minPriceFull']
-                        )
-                    ),
-                    int(
-                        (
-                            oracle_prices_dict[self._long_token_address]
-                            ['maxPriceFull']
-                        )
-                    )
-                ),
-                (
-                    int(1000000000000000000000000),
-                    int(1000000000000000000000000)
-                ))
-
-        if return_tuple:
-            return prices
-
-        return self.reader_contract.functions.getMarketInfo(
-            self.data_store_contract_address,
-            prices,
-            market_key
-        )
+    Returns
+    -------
+    tuple
+        raw reader output.
+
+    """
+    config = snapshot['config']
+
+    return get_reader_contract(config, trimmed=True).functions.getMarketInfo(
+        contract_map[config.chain]['datastore']['contract_address'],
+        get_market_prices(market, snapshot['prices']),
+        market['gmx_market_address']
+    ).call()
@@ -1,22 +1,29 @@
-import time
-
 import numpy as np
 from numerize import numerize
 from typing import Tuple, Any
 
 from .get import GetData
-from .get_oracle_prices import OraclePrices
 from .get_open_interest import OpenInterest
-from ..gmx_utils import execute_threading
 from ..keys import (
     get_datastore_contract, pool_amount_key, reserve_factor_key,
     open_interest_reserve_factor_key
 )
 
+POOL_RESERVE_FIELDS = [
+    'long_pool_amount',
+    'short_pool_amount',
+    'long_reserve_factor',
+    'short_reserve_factor',
+    'long_open_interest_reserve_factor',
+    'short_open_interest_reserve_factor'
+]
+
 
 class GetAvailableLiquidity(GetData):
-    def __init__(self, config: str, use_local_datastore: bool = False):
-        super().__init__(config)
+    def __init__(
+        self, config: str, use_local_datastore: bool = False, executor=None
+    ):
+        super().__init__(config, executor=executor)
 
     def _get_data_processing(self) -> dict:
         """
@@ -30,212 +37,154 @@ class GetAvailableLiquidity(GetData):
         """
         self.log.info("GMX v2 Available Liquidity")
 
-        open_interest = OpenInterest(self.config).get_data(
-            to_json=False
-        )
+        return super()._get_data_processing()
 
-        reserved_long_list = []
-        reserved_short_list = []
-        token_price_list = []
-        mapper = []
-        long_pool_amount_list = []
-        long_reserve_factor_list = []
-        long_open_interest_reserve_factor_list = []
-        short_pool_amount_list = []
-        short_reserve_factor_list = []
-        short_open_interest_reserve_factor_list = []
-        long_precision_list = []
-        short_precision_list = []
-
-        for market_key in self.markets.info:
-            self._filter_swap_markets()
-            self._get_token_addresses(market_key)
-            market_symbol = self.markets.get_market_symbol(market_key)
-            long_decimal_factor = self.markets.get_decimal_factor(
-                market_key=market_key,
-                long=True,
-                short=False
-            )
-            short_decimal_factor = self.markets.get_decimal_factor(
-                market_key=market_key,
-                long=False,
-                short=True
-            )
-            long_precision = 10**(30 + long_decimal_factor)
-            short_precision = 10**(30 + short_decimal_factor)
-            oracle_precision = 10**(30 - long_decimal_factor)
-
-            # collate market symbol to map dictionary later
-            mapper.append(market_symbol)
-
-            # LONG POOL
-            (
-                long_pool_amount,
-                long_reserve_factor,
-                long_open_interest_reserve_factor
-            ) = self.get_max_reserved_usd(
-                market_key,
-                self._long_token_address,
-                True
-            )
-            reserved_long_list.append(open_interest['long'][market_symbol])
-            long_pool_amount_list.append(long_pool_amount)
-            long_reserve_factor_list.append(long_reserve_factor)
-            long_open_interest_reserve_factor_list.append(
-                long_open_interest_reserve_factor
-            )
-            long_precision_list.append(long_precision)
-
-            # SHORT POOL
-            (
-                short_pool_amount,
-                short_reserve_factor,
-                short_open_interest_reserve_factor
-            ) = self.get_max_reserved_usd(
-                market_key,
-                self._short_token_address,
-                False
-            )
-            reserved_short_list.append(open_interest['short'][market_symbol])
-            short_pool_amount_list.append(short_pool_amount)
-            short_reserve_factor_list.append(short_reserve_factor)
-            short_open_interest_reserve_factor_list.append(
-                short_open_interest_reserve_factor
-            )
-            short_precision_list.append(short_precision)
-
-            # Calculate token price
-            prices = OraclePrices(chain=self.config.chain).get_recent_prices()
-            token_price = np.median(
-                [
-                    float(
-                        prices[self._long_token_address]['maxPriceFull']
-                    ) / oracle_precision,
-                    float(
-                        prices[self._long_token_address]['minPriceFull']
-                    ) / oracle_precision
-                ]
-            )
-            token_price_list.append(token_price)
+    def _get_snapshot(self) -> dict:
+        return {
+            'open_interest': self._get_open_interest(),
+            'pool_reserves': self._get_pool_reserves(),
+            'prices': self._get_recent_prices()
+        }
 
-        # TODO - Series of sleeps to stop ratelimit on the RPC, should have
-        # retry
-        long_pool_amount_output = execute_threading(long_pool_amount_list)
-        time.sleep(0.2)
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict) -> dict:
+        """
+        Long and short liquidity in USD available to open positions in one
+        market
+        """
+        token_symbol = market['market_symbol']
+        long_token_address = market['long_token_address']
+        prices = snapshot['prices']
+
+        long_decimal_factor = market['long_token_metadata']['decimals']
+        short_decimal_factor = market['short_token_metadata']['decimals']
+        long_precision = 10**(30 + long_decimal_factor)
+        short_precision = 10**(30 + short_decimal_factor)
+        oracle_precision = 10**(30 - long_decimal_factor)
+
+        reserves = snapshot['pool_reserves'][market['gmx_market_address']]
+        long_pool_amount = reserves['long_pool_amount']
+        short_pool_amount = reserves['short_pool_amount']
+        long_reserve_factor = reserves['long_reserve_factor']
+        short_reserve_factor = reserves['short_reserve_factor']
+        long_open_interest_reserve_factor = (
+            reserves['long_open_interest_reserve_factor']
+        )
+        short_open_interest_reserve_factor = (
+            reserves['short_open_interest_reserve_factor']
+        )
+        reserved_long = snapshot['open_interest']['long'][token_symbol]
+        reserved_short = snapshot['open_interest']['short'][token_symbol]
+
+        # Calculate token price
+        token_price = np.median(
+            [
+                float(
+                    prices[long_token_address]['maxPriceFull']
+                ) / oracle_precision,
+                float(
+                    prices[long_token_address]['minPriceFull']
+                ) / oracle_precision
+            ]
+        )
 
-        short_pool_amount_output = execute_threading(short_pool_amount_list)
-        time.sleep(0.2)
+        # select the lesser of maximum value of pool reserves or open
+        # interest limit
+        if long_open_interest_reserve_factor < long_reserve_factor:
+            long_reserve_factor = long_open_interest_reserve_factor
 
-        long_reserve_factor_list_output = execute_threading(
-            long_reserve_factor_list
-        )
-        time.sleep(0.2)
+        if "2" in token_symbol:
+            long_pool_amount = long_pool_amount / 2
 
-        short_reserve_factor_list_output = execute_threading(
-            short_reserve_factor_list
+        long_max_reserved_tokens = (
+            long_pool_amount * long_reserve_factor
         )
-        time.sleep(0.2)
 
-        long_open_interest_reserve_factor_list_output = execute_threading(
-            long_open_interest_reserve_factor_list
+        long_max_reserved_usd = (
+            long_max_reserved_tokens / long_precision * token_price
         )
-        time.sleep(0.2)
 
-        short_open_interest_reserve_factor_list_output = execute_threading(
-            short_open_interest_reserve_factor_list
-        )
+        long_liquidity = long_max_reserved_usd - float(reserved_long)
 
-        for (
-            long_pool_amount,
-            short_pool_amount,
-            long_reserve_factor,
-            short_reserve_factor,
-            long_open_interest_reserve_factor,
-            short_open_interest_reserve_factor,
-            reserved_long,
-            reserved_short,
-            token_price,
-            token_symbol,
-            long_precision,
-            short_precision
-        ) in zip(
-            long_pool_amount_output,
-            short_pool_amount_output,
-            long_reserve_factor_list_output,
-            short_reserve_factor_list_output,
-            long_open_interest_reserve_factor_list_output,
-            short_open_interest_reserve_factor_list_output,
-            reserved_long_list,
-            reserved_short_list,
-            token_price_list,
-            mapper,
-            long_precision_list,
-            short_precision_list
-        ):
-            self.log.info("Token: {}".format(token_symbol))
+        # select the lesser of maximum value of pool reserves or open
+        # interest limit
+        if short_open_interest_reserve_factor < short_reserve_factor:
+            short_reserve_factor = short_open_interest_reserve_factor
 
-            # select the lesser of maximum value of pool reserves or open
-            # interest limit
-            if long_open_interest_reserve_factor < long_reserve_factor:
-                long_reserve_factor = long_open_interest_reserve_factor
+        short_max_reserved_usd = (short_pool_amount * short_reserve_factor)
+
+        short_liquidity = (
+            short_max_reserved_usd / short_precision - float(
+                reserved_short
+            )
+        )
 
-            if "2" in token_symbol:
-                long_pool_amount = long_pool_amount / 2
+        # If its a single side market need to calculate on token
+        # amount rather than $ value
+        if "2" in token_symbol:
+            short_pool_amount = short_pool_amount / 2
 
-            long_max_reserved_tokens = (
-                long_pool_amount * long_reserve_factor
+            short_max_reserved_tokens = (
+                short_pool_amount * short_reserve_factor
             )
 
-            long_max_reserved_usd = (
-                long_max_reserved_tokens / long_precision * token_price
+            short_max_reserved_usd = (
+                short_max_reserved_tokens / short_precision * token_price
             )
 
-            long_liquidity = long_max_reserved_usd - float(reserved_long)
+            short_liquidity = short_max_reserved_usd - float(reserved_short)
 
+        return {
+            'long': long_liquidity,
+            'short': short_liquidity
+        }
+
+    def _collate(self, markets: list, results: list) -> dict:
+        output = super()._collate(markets, results)
+
+        for token_symbol in output['long']:
+            self.log.info("Token: {}".format(token_symbol))
             self.log.info(
                 "Available Long Liquidity: ${}".format(
-                    numerize.numerize(long_liquidity)
+                    numerize.numerize(output['long'][token_symbol])
                 )
             )
-
-            # select the lesser of maximum value of pool reserves or open
-            # interest limit
-            if short_open_interest_reserve_factor < short_reserve_factor:
-                short_reserve_factor = short_open_interest_reserve_factor
-
-            short_max_reserved_usd = (short_pool_amount * short_reserve_factor)
-
-            short_liquidity = (
-                short_max_reserved_usd / short_precision - float(
-                    reserved_short
+            self.log.info(
+                "Available Short Liquidity: ${}".format(
+                    numerize.numerize(output['short'][token_symbol])
                 )
             )
 
-            # If its a single side market need to calculate on token
-            # amount rather than $ value
-            if "2" in token_symbol:
-                short_pool_amount = short_pool_amount / 2
-
-                short_max_reserved_tokens = (
-                    short_pool_amount * short_reserve_factor
-                )
+        return output
 
-                short_max_reserved_usd = (
-                    short_max_reserved_tokens / short_precision * token_price
-                )
+    def _get_open_interest(self):
+        return OpenInterest(
+            self.config,
+            executor=self.executor
+        ).get_data(to_json=False)
 
-                short_liquidity = short_max_reserved_usd - float(reserved_short)
+    def _get_pool_reserves(self) -> dict:
+        """
+        Get the pool amount, reserve factor and open interest reserve factor
+        of the long and short pool of every market
 
-            self.log.info(
-                "Available Short Liquidity: ${}".format(
-                    numerize.numerize(short_liquidity)
-                )
-            )
+        Returns
+        -------
+        pool_reserves : dict
+            dictionary keyed by market key of the raw datastore values.
 
-            self.output['long'][token_symbol] = long_liquidity
-            self.output['short'][token_symbol] = short_liquidity
+        """
+        markets = list(self.markets.info.values())
+        results = self._map_markets(
+            get_pool_reserves,
+            {'config': self.config},
+            markets
+        )
 
-        return self.output
+        return {
+            market['gmx_market_address']: result
+            for market, result in zip(markets, results)
+        }
 
     def get_max_reserved_usd(self, market: str, token: str, is_long: bool) -> (
         Tuple[Any, Any, Any]
@@ -264,40 +213,96 @@ class GetAvailableLiquidity(GetData):
             uncalled web3 contract object for open interest reserve factor.
 
         """
-        pool_amount: Any  # Type: web3._utils.datatypes.getUint
-        reserve_factor: Any  # Type: web3._utils.datatypes.getUint
-        open_interest_reserve_factor: Any  # Type: web3._utils.datatypes.getUint
-
-        # get web3 datastore object
-        datastore = get_datastore_contract(self.config)
-
-        # get hashed keys for datastore
-        pool_amount_hash_data = pool_amount_key(
+        return get_pool_reserve_calls(
+            get_datastore_contract(self.config, trimmed=True),
             market,
-            token
+            token,
+            is_long
         )
-        reserve_factor_hash_data = reserve_factor_key(
+
+
+def get_pool_reserve_calls(datastore, market: str, token: str, is_long: bool) -> (
+    Tuple[Any, Any, Any]
+):
+    """
+    Uncalled datastore functions for the pool amount, reserve factor and open
+    interest reserve factor of one side of a market
+    """
+    pool_amount: Any  # Type: web3._utils.datatypes.getUint
+    reserve_factor: Any  # Type: web3._utils.datatypes.getUint
+    open_interest_reserve_factor: Any  # Type: web3._utils.datatypes.getUint
+
+    # get hashed keys for datastore
+    pool_amount_hash_data = pool_amount_key(
+        market,
+        token
+    )
+    reserve_factor_hash_data = reserve_factor_key(
+        market,
+        is_long
+    )
+    open_interest_reserve_factor_hash_data = (
+        open_interest_reserve_factor_key(
             market,
             is_long
         )
-        open_interest_reserve_factor_hash_data = (
-            open_interest_reserve_factor_key(
-                market,
-                is_long
-            )
-        )
+    )
 
-        pool_amount = datastore.functions.getUint(
-            pool_amount_hash_data
-        )
-        reserve_factor = datastore.functions.getUint(
-            reserve_factor_hash_data
+    pool_amount = datastore.functions.getUint(
+        pool_amount_hash_data
+    )
+    reserve_factor = datastore.functions.getUint(
+        reserve_factor_hash_data
+    )
+    open_interest_reserve_factor = datastore.functions.getUint(
+        open_interest_reserve_factor_hash_data
+    )
+
+    return pool_amount, reserve_factor, open_interest_reserve_factor
+
+
+def get_pool_reserves(market: dict, snapshot: dict) -> dict:
+    """
+    Work unit fetching the pool amounts and reserve factors of both sides of
+    one market
+
+    Parameters
+    ----------
+    market : dict
+        market record from Markets.info.
+    snapshot : dict
+        config.
+
+    Returns
+    -------
+    pool_reserves : dict
+        raw datastore values keyed by POOL_RESERVE_FIELDS.
+
+    """
+    datastore = get_datastore_contract(snapshot['config'], trimmed=True)
+
+    pool_reserves = {}
+    for side, token_address, is_long in [
+        ('long', market['long_token_address'], True),
+        ('short', market['short_token_address'], False)
+    ]:
+        (
+            pool_amount,
+            reserve_factor,
+            open_interest_reserve_factor
+        ) = get_pool_reserve_calls(
+            datastore,
+            market['gmx_market_address'],
+            token_address,
+            is_long
         )
-        open_interest_reserve_factor = datastore.functions.getUint(
-            open_interest_reserve_factor_hash_data
+        pool_reserves['{}_pool_amount'.format(side)] = pool_amount.call()
+        pool_reserves['{}_reserve_factor'.format(side)] = reserve_factor.call()
+        pool_reserves['{}_open_interest_reserve_factor'.format(side)] = (
+            open_interest_reserve_factor.call()
         )
 
-        return pool_amount, reserve_factor, open_interest_reserve_factor
+    return pool_reserves
 
 
 if __name__ == "__main__":
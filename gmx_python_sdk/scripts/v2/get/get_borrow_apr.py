@@ -1,58 +1,47 @@
 from .get import GetData
-from ..gmx_utils import execute_threading
 
 
 class GetBorrowAPR(GetData):
-    def __init__(self, chain: str):
-        super().__init__(chain)
+    def __init__(self, chain: str, executor=None):
+        super().__init__(chain, executor=executor)
 
-    def _get_data_processing(self):
+    def _get_snapshot(self) -> dict:
+        return {'market_info': self._get_market_info()}
+
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict) -> dict:
         """
-        Generate the dictionary of borrow APR data
+        Long and short hourly borrow rate of one market
 
         Returns
         -------
-        funding_apr : dict
-            dictionary of borrow data.
+        dict
+            dictionary of borrow rates.
 
         """
-        output_list = []
-        mapper = []
-        for market_key in self.markets.info:
-            index_token_address = self.markets.get_index_token_address(
-                market_key
-            )
-
-            self._get_token_addresses(market_key)
-            output = self._get_oracle_prices(
-                market_key,
-                index_token_address,
-            )
-
-            output_list.append(output)
-            mapper.append(self.markets.get_market_symbol(market_key))
+        output = snapshot['market_info'][market['gmx_market_address']]
 
-        threaded_output = execute_threading(output_list)
+        return {
+            'long': (output[1] / 10 ** 28) * 3600,
+            'short': (output[2] / 10 ** 28) * 3600
+        }
 
-        for key, output in zip(mapper, threaded_output):
-            self.output["long"][key] = (
-                output[1] / 10 ** 28
-            ) * 3600
-            self.output["short"][key] = (
-                output[2] / 10 ** 28
-            ) * 3600
+    def _collate(self, markets: list, results: list) -> dict:
+        output = super()._collate(markets, results)
 
+        for key in output['long']:
             self.log.info(
                 (
                     "{}\nLong Borrow Hourly Rate: -{:.5f}%\n"
                     "Short Borrow Hourly Rate: -{:.5f}%\n"
                 ).format(
                     key,
-                    self.output["long"][key],
-                    self.output["short"][key]
+                    output["long"][key],
+                    output["short"][key]
                 )
             )
-        return self.output
+
+        return output
 
 
 if __name__ == "__main__":
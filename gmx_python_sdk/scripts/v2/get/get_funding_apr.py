@@ -3,14 +3,14 @@ import os
 
 from .get import GetData
 from .get_open_interest import OpenInterest
-from ..gmx_utils import (
-    get_funding_factor_per_period, base_dir, execute_threading,
-)
+from ..gmx_utils import get_funding_factor_per_period, base_dir
 
 
 class GetFundingFee(GetData):
-    def __init__(self, config, use_local_datastore: bool = False):
-        super().__init__(config)
+    def __init__(
+        self, config, use_local_datastore: bool = False, executor=None
+    ):
+        super().__init__(config, executor=executor)
         self.config = config
         self.use_local_datastore = use_local_datastore
 
@@ -24,107 +24,85 @@ class GetFundingFee(GetData):
             dictionary of funding data.
 
         """
-
-        # If passing true will use local instance of open interest data
-        if self.use_local_datastore:
-            open_interest = json.load(
-                open(
-                    os.path.join(
-                        base_dir,
-                        "data_store",
-                        "{}_open_interest.json".format(self.config.chain)
-                    )
-                )
-            )
-        else:
-            open_interest = OpenInterest(
-                config=self.config
-            ).get_data(to_json=False)
-
         print("\nGMX v2 Funding Rates (% per hour)")
 
-        # define empty lists to pass to zip iterater later on
-        mapper = []
-        output_list = []
-        long_interest_usd_list = []
-        short_interest_usd_list = []
-
-        # loop markets
-        for market_key in self.markets.info:
-            symbol = self.markets.get_market_symbol(market_key)
-            index_token_address = self.markets.get_index_token_address(
-                market_key
-            )
-            self._get_token_addresses(market_key)
-
-            output = self._get_oracle_prices(
-                market_key,
-                index_token_address,
-            )
+        return super()._get_data_processing()
 
-            mapper.append(symbol)
-            output_list.append(output)
-            long_interest_usd_list = (
-                long_interest_usd_list +
-                [
-                    open_interest['long'][symbol] * 10 ** 30
-                ]
-            )
-            short_interest_usd_list = (
-                short_interest_usd_list +
-                [
-                    open_interest['short'][symbol] * 10 ** 30
-                ]
-            )
-
-        # Multithreaded call on contract
-        threaded_output = execute_threading(output_list)
-        for (
-            output,
-            long_interest_usd,
-            short_interest_usd,
-            symbol
-        ) in zip(
-            threaded_output,
-            long_interest_usd_list,
-            short_interest_usd_list,
-            mapper
-        ):
-            print("\n{}".format(symbol))
+    def _get_snapshot(self) -> dict:
+        return {
+            'open_interest': self._get_open_interest(),
+            'market_info': self._get_market_info()
+        }
 
-            market_info_dict = {
-                "market_token": output[0][0],
-                "index_token": output[0][1],
-                "long_token": output[0][2],
-                "short_token": output[0][3],
-                "long_borrow_fee": output[1],
-                "short_borrow_fee": output[2],
-                "is_long_pays_short": output[4][0],
-                "funding_factor_per_second": output[4][1]
-            }
-
-            long_funding_fee = get_funding_factor_per_period(
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict) -> dict:
+        """
+        Long and short hourly funding rate of one market
+        """
+        symbol = market['market_symbol']
+        output = snapshot['market_info'][market['gmx_market_address']]
+        long_interest_usd = snapshot['open_interest']['long'][symbol] * 10 ** 30
+        short_interest_usd = (
+            snapshot['open_interest']['short'][symbol] * 10 ** 30
+        )
+
+        market_info_dict = {
+            "market_token": output[0][0],
+            "index_token": output[0][1],
+            "long_token": output[0][2],
+            "short_token": output[0][3],
+            "long_borrow_fee": output[1],
+            "short_borrow_fee": output[2],
+            "is_long_pays_short": output[4][0],
+            "funding_factor_per_second": output[4][1]
+        }
+
+        return {
+            'long': get_funding_factor_per_period(
                 market_info_dict,
                 True,
                 3600,
                 long_interest_usd,
                 short_interest_usd
-            )
-            print("Long funding hrly rate {:.4f}%".format(long_funding_fee))
-
-            short_funding_fee = get_funding_factor_per_period(
+            ),
+            'short': get_funding_factor_per_period(
                 market_info_dict,
                 False,
                 3600,
                 long_interest_usd,
                 short_interest_usd
             )
-            print("Short funding hrly rate {:.4f}%".format(short_funding_fee))
+        }
+
+    def _collate(self, markets: list, results: list) -> dict:
+        output = super()._collate(markets, results)
+
+        for symbol in output['long']:
+            print("\n{}".format(symbol))
+            print("Long funding hrly rate {:.4f}%".format(output['long'][symbol]))
+            print(
+                "Short funding hrly rate {:.4f}%".format(output['short'][symbol])
+            )
 
-            self.output['long'][symbol] = long_funding_fee
-            self.output['short'][symbol] = short_funding_fee
+        return output
+
+    def _get_open_interest(self):
+        # If passing true will use local instance of open interest data
+        if self.use_local_datastore:
+            return json.load(
+                open(
+                    os.path.join(
+                        base_dir,
+                        "data_store",
+                        "{}_open_interest.json".format(self.config.chain)
+                    )
+                )
+            )
 
-        return self.output
+        return OpenInterest(
+            config=self.config,
+            executor=self.executor
+        ).get_data(to_json=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+import numpy as np
+
+from .get import GetData
+from .get_oracle_prices import OraclePrices
+from ..approve_token_for_spend import get_token_approval_contract
+from ..gmx_utils import get_datastore_contract, create_connection, ConfigManager
+from ..keys import (
+    pool_amount_key, open_interest_key, open_interest_in_tokens_key
+)
+from ..multicall import multicall
+
+GM_TOKEN_DECIMALS = 18
+
+
+class GMExposure(GetData):
+    """
+    Decompose GM tokens into token exposures from a single pool snapshot.
+
+    For each market the snapshot holds pool amounts of the long and short
+    tokens, open interest in tokens and USD for longs and shorts, and GM
+    supply, all loaded in one multicall. The delta of one GM token is then
+
+        long token:   long pool amount / supply
+        short token:  short pool amount / supply
+        index token:  -(long OI in tokens - short OI in tokens) / supply
+
+    where the index term is the LP side of pending trader PnL. Deltas are
+    held as a (markets x tokens) matrix so any set of holdings is reduced to
+    per token exposure with one matrix product. PnL caps from the max pnl
+    factors are not applied.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+
+        self.market_keys = []
+        self.tokens = []
+        self.token_prices = None
+        self.delta_matrix = None
+        self.pnl_per_gm = None
+        self.value_per_gm = None
+
+    def load_snapshot(self, oracle_prices: dict = None):
+        """
+        Load pool amounts, open interest and GM supply for every market and
+        build the delta matrix
+
+        Parameters
+        ----------
+        oracle_prices : dict, optional
+            already loaded oracle prices. The default is None.
+
+        Returns
+        -------
+        self
+
+        """
+        self._filter_swap_markets()
+
+        if oracle_prices is None:
+            oracle_prices = OraclePrices(
+                chain=self.config.chain
+            ).get_recent_prices()
+
+        datastore = get_datastore_contract(self.config, trimmed=True)
+        connection = create_connection(self.config)
+
+        market_keys = list(self.markets.info)
+        markets = [self.markets.info[market_key] for market_key in market_keys]
+
+        token_decimals = {}
+        for market in markets:
+            token_decimals[market['index_token_address']] = market['market_metadata']['decimals']
+            token_decimals[market['long_token_address']] = market['long_token_metadata']['decimals']
+            token_decimals[market['short_token_address']] = market['short_token_metadata']['decimals']
+        tokens = list(token_decimals)
+
+        # 11 calls per market, see _get_market_calls
+        function_calls = []
+        for market_key, market in zip(market_keys, markets):
+            function_calls.extend(self._get_market_calls(
+                datastore,
+                connection,
+                market_key,
+                market
+            ))
+
+        outputs = np.array(
+            multicall(self.config.chain, function_calls),
+            dtype=float
+        ).reshape(len(market_keys), 11)
+
+        # single token pools hold both sides under the same keys
+        divisor = np.array(
+            [
+                2.0 if market['long_token_address'] == market['short_token_address'] else 1.0
+                for market in markets
+            ]
+        )
+
+        long_decimals = np.array(
+            [token_decimals[m['long_token_address']] for m in markets]
+        )
+        short_decimals = np.array(
+            [token_decimals[m['short_token_address']] for m in markets]
+        )
+        index_decimals = np.array(
+            [token_decimals[m['index_token_address']] for m in markets]
+        )
+
+        long_pool = outputs[:, 0] / divisor / 10 ** long_decimals
+        short_pool = outputs[:, 1] / divisor / 10 ** short_decimals
+        long_oi_tokens = (outputs[:, 2] + outputs[:, 3]) / divisor / 10 ** index_decimals
+        short_oi_tokens = (outputs[:, 4] + outputs[:, 5]) / divisor / 10 ** index_decimals
+        long_oi_usd = (outputs[:, 6] + outputs[:, 7]) / divisor / 10 ** 30
+        short_oi_usd = (outputs[:, 8] + outputs[:, 9]) / divisor / 10 ** 30
+        supply = outputs[:, 10] / 10 ** GM_TOKEN_DECIMALS
+
+        # avoid dividing by zero for markets with no liquidity yet
+        supply = np.where(supply > 0, supply, np.inf)
+
+        token_prices = np.array(
+            [
+                np.median(
+                    [
+                        float(oracle_prices[token]['maxPriceFull']),
+                        float(oracle_prices[token]['minPriceFull'])
+                    ]
+                ) / 10 ** (30 - token_decimals[token])
+                if token in oracle_prices else np.nan
+                for token in tokens
+            ]
+        )
+
+        token_index = {token: i for i, token in enumerate(tokens)}
+        long_columns = np.array(
+            [token_index[m['long_token_address']] for m in markets]
+        )
+        short_columns = np.array(
+            [token_index[m['short_token_address']] for m in markets]
+        )
+        index_columns = np.array(
+            [token_index[m['index_token_address']] for m in markets]
+        )
+        rows = np.arange(len(markets))
+
+        delta_matrix = np.zeros((len(markets), len(tokens)))
+        np.add.at(delta_matrix, (rows, long_columns), long_pool / supply)
+        np.add.at(delta_matrix, (rows, short_columns), short_pool / supply)
+        np.add.at(
+            delta_matrix,
+            (rows, index_columns),
+            -(long_oi_tokens - short_oi_tokens) / supply
+        )
+
+        index_prices = token_prices[index_columns]
+        pending_pnl = (long_oi_tokens * index_prices - long_oi_usd) + \
+            (short_oi_usd - short_oi_tokens * index_prices)
+
+        self.market_keys = market_keys
+        self.tokens = tokens
+        self.token_prices = token_prices
+        self.delta_matrix = delta_matrix
+        self.pnl_per_gm = pending_pnl / supply
+        self.value_per_gm = (
+            long_pool * token_prices[long_columns] +
+            short_pool * token_prices[short_columns] -
+            pending_pnl
+        ) / supply
+
+        return self
+
+    def get_token_exposure(self, holdings: list) -> dict:
+        """
+        Aggregate token delta of a list of GM holdings
+
+        Parameters
+        ----------
+        holdings : list
+            list of (market key, GM amount) tuples, amounts in GM tokens.
+
+        Returns
+        -------
+        dict
+            token delta keyed by token address.
+
+        """
+        amounts = self._get_holdings_vector(holdings)
+        exposure = amounts @ self.delta_matrix
+
+        return {
+            token: float(exposure[i]) for i, token in enumerate(self.tokens)
+            if exposure[i] != 0
+        }
+
+    def get_hedge_notional(self, holdings: list) -> dict:
+        """
+        USD notional to hedge per token for a list of GM holdings, positive
+        when the holdings are long the token
+
+        Parameters
+        ----------
+        holdings : list
+            list of (market key, GM amount) tuples, amounts in GM tokens.
+
+        Returns
+        -------
+        dict
+            USD exposure keyed by token address.
+
+        """
+        amounts = self._get_holdings_vector(holdings)
+        notional = (amounts @ self.delta_matrix) * self.token_prices
+
+        return {
+            token: float(notional[i]) for i, token in enumerate(self.tokens)
+            if notional[i] != 0
+        }
+
+    def _get_data_processing(self):
+        """
+        Per market GM token delta, pending PnL and value
+
+        Returns
+        -------
+        dict
+            dictionary keyed by market symbol.
+
+        """
+        if self.delta_matrix is None:
+            self.load_snapshot()
+
+        output = {}
+        for i, market_key in enumerate(self.market_keys):
+            output[self.markets.get_market_symbol(market_key)] = {
+                'market_key': market_key,
+                'delta': {
+                    token: float(self.delta_matrix[i, j])
+                    for j, token in enumerate(self.tokens)
+                    if self.delta_matrix[i, j] != 0
+                },
+                'pnl_per_gm': float(self.pnl_per_gm[i]),
+                'value_per_gm': float(self.value_per_gm[i])
+            }
+
+        return output
+
+    def _get_holdings_vector(self, holdings: list):
+        if self.delta_matrix is None:
+            self.load_snapshot()
+
+        market_index = {
+            market_key: i for i, market_key in enumerate(self.market_keys)
+        }
+        amounts = np.zeros(len(self.market_keys))
+        for market_key, gm_amount in holdings:
+            amounts[market_index[market_key]] += gm_amount
+
+        return amounts
+
+    def _get_market_calls(self, datastore, connection, market_key: str, market: dict):
+        """
+        Uncalled datastore reads for one market: long and short pool amounts,
+        OI in tokens and USD for each side and collateral, and GM supply
+
+        """
+        long_token = market['long_token_address']
+        short_token = market['short_token_address']
+
+        return [
+            datastore.functions.getUint(pool_amount_key(market_key, long_token)),
+            datastore.functions.getUint(pool_amount_key(market_key, short_token)),
+            datastore.functions.getUint(
+                open_interest_in_tokens_key(market_key, long_token, True)
+            ),
+            datastore.functions.getUint(
+                open_interest_in_tokens_key(market_key, short_token, True)
+            ),
+            datastore.functions.getUint(
+                open_interest_in_tokens_key(market_key, long_token, False)
+            ),
+            datastore.functions.getUint(
+                open_interest_in_tokens_key(market_key, short_token, False)
+            ),
+            datastore.functions.getUint(
+                open_interest_key(market_key, long_token, True)
+            ),
+            datastore.functions.getUint(
+                open_interest_key(market_key, short_token, True)
+            ),
+            datastore.functions.getUint(
+                open_interest_key(market_key, long_token, False)
+            ),
+            datastore.functions.getUint(
+                open_interest_key(market_key, short_token, False)
+            ),
+            get_token_approval_contract(
+                connection,
+                market_key
+            ).functions.totalSupply()
+        ]
+
+
+if __name__ == "__main__":
+    config = ConfigManager(chain='arbitrum')
+    config.set_config()
+
+    data = GMExposure(config).get_data(to_csv=False)
@@ -1,6 +1,6 @@
-from .get import GetData
+from .get import GetData, get_market_prices
 from ..gmx_utils import (
-    get_reader_contract, contract_map, execute_threading,
+    get_reader_contract, contract_map,
     save_json_file_to_datastore, make_timestamped_dataframe,
     save_csv_to_datastore
 )
@@ -11,8 +11,8 @@ from ..keys import (
 
 
 class GMPrices(GetData):
-    def __init__(self, config: str):
-        super().__init__(config)
+    def __init__(self, config: str, executor=None):
+        super().__init__(config, executor=executor)
         self.config = config
         self.to_json = None
         self.to_csv = None
@@ -99,48 +99,18 @@ class GMPrices(GetData):
             dictionary of gm prices.
 
         """
-        output_list = []
-        mapper = []
         self._filter_swap_markets()
 
-        for iter, market_key in enumerate(self.markets.info):
-            self._get_token_addresses(market_key)
-            index_token_address = self.markets.get_index_token_address(
-                market_key
-            )
-            oracle_prices = self._get_oracle_prices(
-                market_key,
-                index_token_address,
-                return_tuple=True
-            )
-
-            market = [
-                market_key,
-                index_token_address,
-                self._long_token_address,
-                self._short_token_address
-            ]
-
-            output = self._make_market_token_price_query(
-                market,
-                oracle_prices[0],
-                oracle_prices[1],
-                oracle_prices[2],
-                pnl_factor_type
-            )
-
-            # add the uncalled web3 object to list
-            output_list.append(output)
+        markets = list(self.markets.info.values())
+        snapshot = self._get_snapshot()
+        snapshot['pnl_factor_type'] = pnl_factor_type
+        results = self._map_markets(self._process_market, snapshot, markets)
 
-            # add the market symbol to a list to use to map to dictionary later
-            mapper.append(self.markets.get_market_symbol(market_key))
-
-        # feed the uncalled web3 objects into threading function
-        threaded_output = execute_threading(output_list)
-
-        for key, output in zip(mapper, threaded_output):
+        gm_pool_prices = {}
+        for market, output in zip(markets, results):
             # divide by 10**30 to turn into USD value
-            self.output[key] = output[0] / 10**30
+            gm_pool_prices[market['market_symbol']] = output[0] / 10**30
+        self.output = gm_pool_prices
 
         if self.to_json:
             filename = "{}_gm_prices.json".format(self.config.chain)
@@ -158,8 +128,33 @@ class GMPrices(GetData):
 
         return self.output
 
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict):
+        """
+        Raw GM price of one market for the pnl factor in the snapshot
+        """
+        config = snapshot['config']
+        oracle_prices = get_market_prices(market, snapshot['prices'])
+
+        return GMPrices._make_market_token_price_query(
+            get_reader_contract(config, trimmed=True),
+            contract_map[config.chain]['datastore']['contract_address'],
+            [
+                market['gmx_market_address'],
+                market['index_token_address'],
+                market['long_token_address'],
+                market['short_token_address']
+            ],
+            oracle_prices[0],
+            oracle_prices[1],
+            oracle_prices[2],
+            snapshot['pnl_factor_type']
+        ).call()
+
+    @staticmethod
     def _make_market_token_price_query(
-            self,
+            reader_contract,
+            data_store_contract_address: str,
             market: list,
             index_price_tuple: tuple,
             long_price_tuple: tuple,
@@ -173,6 +168,10 @@ class GMPrices(GetData):
 
         Parameters
         ----------
+        reader_contract : web3.contract_obj
+            reader contract.
+        data_store_contract_address : str
+            address of the datastore.
         market : list
             list containing contract addresses of the market.
         index_price_tuple : tuple
@@ -192,8 +191,8 @@ class GMPrices(GetData):
         """
         # maximise to take max prices in calculation
         maximise = True
-        output = self.reader_contract.functions.getMarketTokenPrice(
-            self.data_store_contract_address,
+        output = reader_contract.functions.getMarketTokenPrice(
+            data_store_contract_address,
             market,
             index_price_tuple,
             long_price_tuple,
@@ -3,6 +3,7 @@ from ..gmx_utils import (
 )
 
 from .get_oracle_prices import OraclePrices
+from .market_registry import MarketRegistry
 
 
 class Markets:
@@ -10,30 +11,41 @@ class Markets:
         self.config = config
         self.info = self._process_markets()
 
+        # Accessors read the compact registry, info is kept for callers
+        # that want the market dictionaries
+        self.registry = MarketRegistry(self.info)
+
     def get_index_token_address(self, market_key: str) -> str:
-        return self.info[market_key]['index_token_address']
+        return self.registry.get(market_key).index_token_address
 
     def get_long_token_address(self, market_key: str) -> str:
-        return self.info[market_key]['long_token_address']
+        return self.registry.get(market_key).long_token_address
 
     def get_short_token_address(self, market_key: str) -> str:
-        return self.info[market_key]['short_token_address']
+        return self.registry.get(market_key).short_token_address
 
     def get_market_symbol(self, market_key: str) -> str:
-        return self.info[market_key]['market_symbol']
+        return self.registry.get(market_key).symbol
 
     def get_decimal_factor(
         self, market_key: str, long: bool = False, short: bool = False
     ) -> int:
+        record = self.registry.get(market_key)
         if long:
-            return self.info[market_key]['long_token_metadata']['decimals']
+            return record.long_decimals
         elif short:
-            return self.info[market_key]['short_token_metadata']['decimals']
+            return record.short_decimals
         else:
-            return self.info[market_key]['market_metadata']['decimals']
+            return record.index_decimals
 
     def is_synthetic(self, market_key: str) -> bool:
-        return self.info[market_key]['market_metadata']['synthetic']
+        return self.registry.get(market_key).is_synthetic
+
+    def find_market_key(self, index_token_address: str) -> str:
+        """
+        Address of the first listed market for an index token, or None
+        """
+        return self.registry.find_by_index_token(index_token_address)
 
     def get_available_markets(self):
         """
@@ -57,7 +69,7 @@ class Markets:
             tuple of raw output from the reader contract.
 
         """
-        reader_contract = get_reader_contract(self.config)
+        reader_contract = get_reader_contract(self.config, trimmed=True)
         data_store_contract_address = (
             contract_map[self.config.chain]['datastore']['contract_address']
         )
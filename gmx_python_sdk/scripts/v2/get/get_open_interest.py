@@ -1,14 +1,12 @@
-import time
 from numerize import numerize
 
 from .get import GetData
-from .get_oracle_prices import OraclePrices
-from ..gmx_utils import execute_threading
+from ..gmx_utils import get_reader_contract, contract_map
 
 
 class OpenInterest(GetData):
-    def __init__(self, config: str):
-        super().__init__(config)
+    def __init__(self, config: str, executor=None):
+        super().__init__(config, executor=executor)
 
     def _get_data_processing(self):
         """
@@ -20,122 +18,93 @@ class OpenInterest(GetData):
             dictionary of open interest data.
 
         """
-        oracle_prices_dict = OraclePrices(
-            self.config.chain
-        ).get_recent_prices()
         print("GMX v2 Open Interest\n")
 
-        long_oi_output_list = []
-        short_oi_output_list = []
-        long_pnl_output_list = []
-        short_pnl_output_list = []
-        mapper = []
-        long_precision_list = []
+        return super()._get_data_processing()
 
-        for market_key in self.markets.info:
-            self._filter_swap_markets()
-            self._get_token_addresses(market_key)
-
-            index_token_address = self.markets.get_index_token_address(
-                market_key
-            )
-
-            market = [
-                market_key,
-                index_token_address,
-                self._long_token_address,
-                self._short_token_address
-            ]
-
-            min_price = int(
-                oracle_prices_dict[index_token_address]['minPriceFull']
-            )
-            max_price = int(
-                oracle_prices_dict[index_token_address]['maxPriceFull']
+    @staticmethod
+    def _process_market(market: dict, snapshot: dict) -> dict:
+        """
+        Long and short open interest in USD of one market, excluding pnl
+        """
+        config = snapshot['config']
+        reader_contract = get_reader_contract(config, trimmed=True)
+        data_store_contract_address = (
+            contract_map[config.chain]['datastore']['contract_address']
+        )
+        oracle_prices_dict = snapshot['prices']
+        index_token_address = market['index_token_address']
+
+        market_addresses = [
+            market['gmx_market_address'],
+            index_token_address,
+            market['long_token_address'],
+            market['short_token_address']
+        ]
+
+        prices_list = [
+            int(oracle_prices_dict[index_token_address]['minPriceFull']),
+            int(oracle_prices_dict[index_token_address]['maxPriceFull'])
+        ]
+
+        # If the market is a synthetic one we need to use the decimals
+        # from the index token
+        try:
+            if market['market_metadata']['synthetic']:
+                decimal_factor = market['market_metadata']['decimals']
+            else:
+                decimal_factor = market['long_token_metadata']['decimals']
+        except KeyError:
+            decimal_factor = market['long_token_metadata']['decimals']
+
+        oracle_factor = (30 - decimal_factor)
+        long_precision = 10 ** (decimal_factor + oracle_factor)
+        precision = 10 ** 30
+
+        output = {}
+        for side, is_long, side_precision in [
+            ('long', True, long_precision),
+            ('short', False, precision)
+        ]:
+            open_interest_with_pnl = (
+                reader_contract.functions.getOpenInterestWithPnl(
+                    data_store_contract_address,
+                    market_addresses,
+                    prices_list,
+                    is_long,
+                    False
+                ).call()
             )
-            prices_list = [min_price, max_price]
-
-            # If the market is a synthetic one we need to use the decimals
-            # from the index token
-            print(market_key)
-            try:
-                if self.markets.is_synthetic(market_key):
-                    decimal_factor = self.markets.get_decimal_factor(
-                        market_key,
-                    )
-                else:
-                    decimal_factor = self.markets.get_decimal_factor(
-                        market_key,
-                        long=True
-                    )
-            except KeyError:
-                decimal_factor = self.markets.get_decimal_factor(
-                    market_key,
-                    long=True
-                )
-
-            oracle_factor = (30 - decimal_factor)
-            precision = 10 ** (decimal_factor + oracle_factor)
-            long_precision_list = long_precision_list + [precision]
-
-            long_oi_with_pnl, long_pnl = self._get_pnl(
-                market,
+            pnl = reader_contract.functions.getPnl(
+                data_store_contract_address,
+                market_addresses,
                 prices_list,
-                is_long=True
-            )
+                is_long,
+                False
+            ).call()
 
-            short_oi_with_pnl, short_pnl = self._get_pnl(
-                market,
-                prices_list,
-                is_long=False
-            )
+            output[side] = (open_interest_with_pnl - pnl) / side_precision
 
-            long_oi_output_list.append(long_oi_with_pnl)
-            short_oi_output_list.append(short_oi_with_pnl)
-            long_pnl_output_list.append(long_pnl)
-            short_pnl_output_list.append(short_pnl)
-            mapper.append(self.markets.get_market_symbol(market_key))
-
-        # TODO - currently just waiting x amount of time to not hit rate limit,
-        # but needs a retry
-        long_oi_threaded_output = execute_threading(long_oi_output_list)
-        time.sleep(0.2)
-        short_oi_threaded_output = execute_threading(short_oi_output_list)
-        time.sleep(0.2)
-        long_pnl_threaded_output = execute_threading(long_pnl_output_list)
-        time.sleep(0.2)
-        short_pnl_threaded_output = execute_threading(short_pnl_output_list)
-
-        for (
-            market_symbol,
-            long_oi,
-            short_oi,
-            long_pnl,
-            short_pnl,
-            long_precision
-        ) in zip(
-            mapper,
-            long_oi_threaded_output,
-            short_oi_threaded_output,
-            long_pnl_threaded_output,
-            short_pnl_threaded_output,
-            long_precision_list
-        ):
-            precision = 10 ** 30
-            long_value = (long_oi - long_pnl) / long_precision
-            short_value = (short_oi - short_pnl) / precision
+        return output
 
+    def _collate(self, markets: list, results: list) -> dict:
+        output = super()._collate(markets, results)
+
+        for market_symbol in output['long']:
             self.log.info(
-                f"{market_symbol} Long: ${numerize.numerize(long_value)}"
+                "{} Long: ${}".format(
+                    market_symbol,
+                    numerize.numerize(output['long'][market_symbol])
+                )
             )
             self.log.info(
-                f"{market_symbol} Short: ${numerize.numerize(short_value)}"
+                "{} Short: ${}".format(
+                    market_symbol,
+                    numerize.numerize(output['short'][market_symbol])
+                )
             )
 
-            self.output['long'][market_symbol] = long_value
-            self.output['short'][market_symbol] = short_value
-
-        return self.output
+        return output
 
 
 if __name__ == '__main__':
@@ -1,12 +1,10 @@
 import logging
-import numpy as np
 
 from .get import GetData
 from .get_oracle_prices import OraclePrices
 
-from ..gmx_utils import (get_tokens_address_dict, convert_to_checksum_address)
-
-chain = 'arbitrum'
+from ..gmx_utils import convert_to_checksum_address
+from ..token_resolver import get_token_resolver
 
 
 class GetOpenPositions(GetData):
@@ -47,6 +45,12 @@ class GetOpenPositions(GetData):
             )
         processed_positions = {}
 
+        # Token list and prices are shared by every position
+        self._chain_tokens = get_token_resolver(self.config.chain).tokens
+        self._prices = OraclePrices(
+            chain=self.config.chain
+        ).get_price_table(self._chain_tokens)
+
         for raw_position in raw_positions:
             processed_position = self._get_data_processing(raw_position)
 
@@ -81,7 +85,7 @@ class GetOpenPositions(GetData):
         """
         market_info = self.markets.info[raw_position[0][1]]
 
-        chain_tokens = get_tokens_address_dict(chain)
+        chain_tokens = self._chain_tokens
 
         entry_price = (
             raw_position[1][0] / raw_position[1][1]
@@ -96,19 +100,7 @@ class GetOpenPositions(GetData):
                 raw_position[0][2]
             ]['decimals']
         )
-        prices = OraclePrices(chain=chain).get_recent_prices()
-        mark_price = np.median(
-            [
-                float(
-                    prices[market_info['index_token_address']]['maxPriceFull']
-                ),
-                float(
-                    prices[market_info['index_token_address']]['minPriceFull']
-                )
-            ]
-        ) / 10 ** (
-            30 - chain_tokens[market_info['index_token_address']]['decimals']
-        )
+        mark_price = self._prices.usd(market_info['index_token_address'])
 
         return {
             "account": raw_position[0][0],
@@ -1,5 +1,7 @@
 import requests
 
+from .oracle_price_table import OraclePriceTable
+
 
 class OraclePrices:
     def __init__(self, chain: str):
@@ -26,6 +28,30 @@ class OraclePrices:
         raw_output = self._make_query().json()
         return self._process_output(raw_output)
 
+    def get_price_table(self, tokens: dict = None):
+        """
+        Get recent prices parsed into an OraclePriceTable
+
+        Parameters
+        ----------
+        tokens : dict, optional
+            token metadata keyed by address for the token decimals. The
+            default is None, the shared token list of the chain.
+
+        Returns
+        -------
+        OraclePriceTable
+            parsed prices, also usable as the get_recent_prices dictionary.
+
+        """
+        # gmx_utils is only needed for the token list
+        from ..token_resolver import get_token_resolver
+
+        if tokens is None:
+            tokens = get_token_resolver(self.chain).tokens
+
+        return OraclePriceTable(self.get_recent_prices(), tokens)
+
     def _make_query(self):
         """
         Make request using oracle url
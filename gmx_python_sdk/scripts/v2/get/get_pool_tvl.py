@@ -1,5 +1,3 @@
-import numpy as np
-
 from .get_markets import Markets
 from .get_oracle_prices import OraclePrices
 from ..keys import pool_amount_key
@@ -12,9 +10,7 @@ from ..gmx_utils import (
 class GetPoolTVL:
     def __init__(self, config: str):
         self.config = config
-        self.oracle_prices_dict = OraclePrices(
-            chain=config.chain
-        ).get_recent_prices
+        self.prices = None
 
     def get_pool_balances(self, to_json: bool = False, to_csv: bool = False):
         """
@@ -35,6 +31,7 @@ class GetPoolTVL:
 
         """
         markets = Markets(self.config).get_available_markets()
+        self.prices = OraclePrices(chain=self.config.chain).get_price_table()
         pool_tvl_dict = {
             "total_tvl": {},
             "long_token": {},
@@ -136,7 +133,7 @@ class GetPoolTVL:
         short_token_balance : int
             amount of tokens.
         """
-        datastore = get_datastore_contract(self.config)
+        datastore = get_datastore_contract(self.config, trimmed=True)
         pool_amount_hash_data = pool_amount_key(
             market,
             long_token_metadata['address']
@@ -145,7 +142,7 @@ class GetPoolTVL:
             pool_amount_hash_data
         ).call()
 
-        datastore = get_datastore_contract(self.config)
+        datastore = get_datastore_contract(self.config, trimmed=True)
         pool_amount_hash_data = pool_amount_key(
             market,
             short_token_metadata['address']
@@ -180,20 +177,7 @@ class GetPoolTVL:
             USD value of the token amount.
         """
         try:
-            token_price = np.median(
-                [
-                    float(
-                        self.oracle_prices_dict()[
-                            token_address
-                        ]['maxPriceFull']
-                    ) / oracle_precision,
-                    float(
-                        self.oracle_prices_dict()[
-                            token_address
-                        ]['minPriceFull']
-                    ) / oracle_precision
-                ]
-            )
+            token_price = self.prices.mid(token_address) / oracle_precision
             return token_price * token_balance
         except KeyError:
             return token_balance
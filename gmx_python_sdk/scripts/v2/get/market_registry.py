@@ -0,0 +1,213 @@
+import numpy as np
+
+
+class MarketRecord:
+    """
+    Flat, read only view of one market in a MarketRegistry
+    """
+
+    __slots__ = (
+        'market_id', 'address', 'symbol', 'index_token_address',
+        'long_token_address', 'short_token_address', 'index_decimals',
+        'long_decimals', 'short_decimals', 'is_synthetic', 'is_swap'
+    )
+
+    def __init__(
+        self, market_id: int, address: str, symbol: str,
+        index_token_address: str, long_token_address: str,
+        short_token_address: str, index_decimals: int, long_decimals: int,
+        short_decimals: int, is_synthetic: bool, is_swap: bool
+    ):
+        self.market_id = market_id
+        self.address = address
+        self.symbol = symbol
+        self.index_token_address = index_token_address
+        self.long_token_address = long_token_address
+        self.short_token_address = short_token_address
+        self.index_decimals = index_decimals
+        self.long_decimals = long_decimals
+        self.short_decimals = short_decimals
+        self.is_synthetic = is_synthetic
+        self.is_swap = is_swap
+
+    def __repr__(self):
+        return "MarketRecord({}, {})".format(self.symbol, self.address)
+
+
+class MarketRegistry:
+    """
+    Compact, column oriented store of markets and their tokens with integer
+    ids and hash indexes, so lookups by market address, index token, symbol
+    or (long, short) pair are O(1) and per market math can be vectorized
+    over the NumPy columns, eg
+
+        registry.token_decimals[registry.long_token]
+
+    gives the long token decimals of every market. Build from Markets.info
+    with MarketRegistry(markets.info) or use Markets.registry.
+
+    Parameters
+    ----------
+    markets_info : dict
+        market dictionaries keyed by market address, as in Markets.info.
+    """
+
+    def __init__(self, markets_info: dict):
+        # Token columns
+        self.token_addresses = []
+        self.token_symbols = []
+        token_decimals = []
+        token_synthetic = []
+        self.token_ids = {}
+
+        def _add_token(address: str, metadata: dict) -> int:
+            if address not in self.token_ids:
+                self.token_ids[address] = len(self.token_addresses)
+                self.token_addresses.append(address)
+                self.token_symbols.append(metadata.get('symbol'))
+                token_decimals.append(metadata.get('decimals', 0))
+                token_synthetic.append(bool(metadata.get('synthetic', False)))
+
+            return self.token_ids[address]
+
+        # Market columns
+        self.addresses = []
+        self.symbols = []
+        index_token = []
+        long_token = []
+        short_token = []
+        is_swap = []
+        self.market_ids = {}
+
+        for address, market in markets_info.items():
+            self.market_ids[address] = len(self.addresses)
+            self.addresses.append(address)
+            self.symbols.append(market['market_symbol'])
+            index_token.append(
+                _add_token(
+                    market['index_token_address'],
+                    market['market_metadata']
+                )
+            )
+            long_token.append(
+                _add_token(
+                    market['long_token_address'],
+                    market['long_token_metadata']
+                )
+            )
+            short_token.append(
+                _add_token(
+                    market['short_token_address'],
+                    market['short_token_metadata']
+                )
+            )
+            is_swap.append('SWAP' in market['market_symbol'])
+
+        self.token_decimals = np.array(token_decimals, dtype=np.int64)
+        self.token_synthetic = np.array(token_synthetic, dtype=bool)
+
+        self.index_token = np.array(index_token, dtype=np.int64)
+        self.long_token = np.array(long_token, dtype=np.int64)
+        self.short_token = np.array(short_token, dtype=np.int64)
+        self.is_swap = np.array(is_swap, dtype=bool)
+        self.is_synthetic = self.token_synthetic[self.index_token]
+
+        self.records = [
+            MarketRecord(
+                market_id,
+                address,
+                self.symbols[market_id],
+                self.token_addresses[self.index_token[market_id]],
+                self.token_addresses[self.long_token[market_id]],
+                self.token_addresses[self.short_token[market_id]],
+                int(self.token_decimals[self.index_token[market_id]]),
+                int(self.token_decimals[self.long_token[market_id]]),
+                int(self.token_decimals[self.short_token[market_id]]),
+                bool(self.is_synthetic[market_id]),
+                bool(self.is_swap[market_id])
+            )
+            for market_id, address in enumerate(self.addresses)
+        ]
+
+        # Hash indexes, keeping the first listed market where several match
+        self._by_symbol = {}
+        self._by_index_token = {}
+        self._by_pair = {}
+        for record in self.records:
+            self._by_symbol.setdefault(record.symbol, record.market_id)
+            self._by_index_token.setdefault(
+                record.index_token_address, []
+            ).append(record.market_id)
+            self._by_pair.setdefault(
+                (record.long_token_address, record.short_token_address), []
+            ).append(record.market_id)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __contains__(self, market_key: str):
+        return market_key in self.market_ids
+
+    def get(self, market_key: str) -> MarketRecord:
+        """
+        Record of a market by address, raising KeyError if unknown
+        """
+        return self.records[self.market_ids[market_key]]
+
+    def find_by_index_token(
+        self, index_token_address: str, include_swap: bool = True
+    ) -> str:
+        """
+        Address of the first listed market for an index token
+
+        Parameters
+        ----------
+        index_token_address : str
+            address of the index token.
+        include_swap : bool, optional
+            consider swap only markets. The default is True.
+
+        Returns
+        -------
+        str
+            market address, or None if no market matches.
+
+        """
+        for market_id in self._by_index_token.get(index_token_address, []):
+            if include_swap or not self.is_swap[market_id]:
+                return self.addresses[market_id]
+
+        return None
+
+    def find_all_by_index_token(self, index_token_address: str) -> list:
+        return [
+            self.addresses[market_id]
+            for market_id in self._by_index_token.get(index_token_address, [])
+        ]
+
+    def find_by_symbol(self, symbol: str) -> str:
+        market_id = self._by_symbol.get(symbol)
+        if market_id is None:
+            return None
+
+        return self.addresses[market_id]
+
+    def find_by_pair(self, long_token_address: str, short_token_address: str) -> list:
+        """
+        Addresses of the markets with a given long and short token
+        """
+        return [
+            self.addresses[market_id]
+            for market_id in self._by_pair.get(
+                (long_token_address, short_token_address), []
+            )
+        ]
+
+    def ids(self, market_keys: list) -> np.ndarray:
+        """
+        Integer ids of market_keys, to index the market columns
+        """
+        return np.array(
+            [self.market_ids[market_key] for market_key in market_keys],
+            dtype=np.int64
+        )
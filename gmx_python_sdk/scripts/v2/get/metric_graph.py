@@ -0,0 +1,271 @@
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .get import GetData
+from .get_available_liquidity import GetAvailableLiquidity
+from .get_borrow_apr import GetBorrowAPR
+from .get_funding_apr import GetFundingFee
+from .get_gm_prices import GMPrices
+from .get_markets import Markets
+from .get_open_interest import OpenInterest
+from .get_oracle_prices import OraclePrices
+from ..executors import get_executor
+
+
+class _GraphCollectorMixin:
+    """
+    Routes the shared inputs a collector would fetch for itself to the nodes
+    of a MetricGraph. Must come before the GetData subclass in the MRO.
+    """
+
+    def __init__(self, graph, *args, **kwargs):
+        self._graph = graph
+        super().__init__(
+            graph.config, *args, executor=graph.executor, **kwargs
+        )
+
+    def _get_markets(self):
+        # Collectors filter markets.info in place, so each gets its own dict
+        markets = copy.copy(self._graph.value('markets'))
+        markets.info = dict(markets.info)
+        return markets
+
+    def _get_recent_prices(self):
+        return self._graph.value('oracle_prices')
+
+    def _get_market_info(self):
+        return self._graph.value('market_info')
+
+    def _get_open_interest(self):
+        return self._graph.value('open_interest')
+
+    def _get_pool_reserves(self):
+        return self._graph.value('pool_reserves')
+
+
+class _GraphGetData(_GraphCollectorMixin, GetData):
+    pass
+
+
+class _GraphOpenInterest(_GraphCollectorMixin, OpenInterest):
+    pass
+
+
+class _GraphFundingFee(_GraphCollectorMixin, GetFundingFee):
+    pass
+
+
+class _GraphBorrowAPR(_GraphCollectorMixin, GetBorrowAPR):
+    pass
+
+
+class _GraphAvailableLiquidity(_GraphCollectorMixin, GetAvailableLiquidity):
+    pass
+
+
+class _GraphGMPrices(_GraphCollectorMixin, GMPrices):
+    pass
+
+
+def _compute_market_info(graph):
+    collector = _GraphGetData(graph)
+    collector._filter_swap_markets()
+    return GetData._get_market_info(collector)
+
+
+def _compute_pool_reserves(graph):
+    collector = _GraphAvailableLiquidity(graph)
+    collector._filter_swap_markets()
+    return GetAvailableLiquidity._get_pool_reserves(collector)
+
+
+# Node name: (dependencies, compute function taking the graph)
+NODES = {
+    'markets': (
+        [],
+        lambda graph: Markets(graph.config)
+    ),
+    'oracle_prices': (
+        [],
+        lambda graph: OraclePrices(graph.config.chain).get_recent_prices()
+    ),
+    'open_interest': (
+        ['markets', 'oracle_prices'],
+        lambda graph: _GraphOpenInterest(graph).get_data()
+    ),
+    'market_info': (
+        ['markets', 'oracle_prices'],
+        _compute_market_info
+    ),
+    'pool_reserves': (
+        ['markets'],
+        _compute_pool_reserves
+    ),
+    'funding': (
+        ['markets', 'open_interest', 'market_info'],
+        lambda graph: _GraphFundingFee(graph).get_data()
+    ),
+    'borrow': (
+        ['markets', 'market_info'],
+        lambda graph: _GraphBorrowAPR(graph).get_data()
+    ),
+    'liquidity': (
+        ['markets', 'oracle_prices', 'open_interest', 'pool_reserves'],
+        lambda graph: _GraphAvailableLiquidity(graph).get_data()
+    ),
+    'gm_prices': (
+        ['markets', 'oracle_prices'],
+        lambda graph: _GraphGMPrices(graph).get_price_traders()
+    )
+}
+
+
+class MetricGraph:
+    """
+    Market metrics as nodes of a dependency graph over one snapshot of
+    markets and oracle prices. Requesting any set of metrics computes only
+    the nodes they need, each once, running independent nodes in parallel,
+    so funding and liquidity share a single open interest and market info
+    fetch:
+
+        graph = MetricGraph(config)
+        data = graph.get('funding', 'borrow', 'liquidity')
+        graph.refresh()
+
+    Values are memoized until refresh() and are shared between callers, so
+    treat them as read only.
+
+    Parameters
+    ----------
+    config : ConfigManager
+        chain config.
+    max_workers : int, optional
+        nodes evaluated at once. The default is None, one per node.
+    executor : str or object, optional
+        executor the collectors map their per market work units on, see
+        executors.get_executor. The default is None, the shared thread pool.
+    """
+
+    def __init__(self, config, max_workers: int = None, executor=None):
+        self.config = config
+        self.max_workers = max_workers
+        self.executor = get_executor(executor)
+        self.snapshot = 0
+        self.timings = {}
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._values = {}
+        self._node_locks = {name: threading.Lock() for name in NODES}
+
+    def get(self, *names: str) -> dict:
+        """
+        Compute the requested metrics and everything they depend on
+
+        Parameters
+        ----------
+        *names : str
+            node names, eg funding, borrow, liquidity.
+
+        Returns
+        -------
+        dict
+            value of each requested node keyed by name.
+
+        """
+        pending = [
+            name for name in self.resolve(*names) if name not in self._values
+        ]
+
+        if len(pending) > 0:
+            # Workers block on the lock of an unfinished dependency, so nodes
+            # start as soon as their inputs are ready
+            with ThreadPoolExecutor(
+                max_workers=self.max_workers or len(pending)
+            ) as executor:
+                list(executor.map(self.value, pending))
+
+        return {name: self._values[name] for name in names}
+
+    def value(self, name: str):
+        """
+        Memoized value of one node, computing it and its dependencies in the
+        calling thread if needed
+        """
+        if name in self._values:
+            return self._values[name]
+
+        dependencies, compute = _get_node(name)
+        for dependency in dependencies:
+            self.value(dependency)
+
+        with self._node_locks[name]:
+            if name not in self._values:
+                start = time.perf_counter()
+                self._values[name] = compute(self)
+                self.timings[name] = (time.perf_counter() - start) * 1000
+                self.log.info(
+                    "{} computed in {:.0f}ms".format(name, self.timings[name])
+                )
+
+        return self._values[name]
+
+    def resolve(self, *names: str) -> list:
+        """
+        Nodes needed for names, dependencies first
+
+        Parameters
+        ----------
+        *names : str
+            node names.
+
+        Returns
+        -------
+        list
+            node names in topological order.
+
+        """
+        order = []
+
+        def _visit(name):
+            if name in order:
+                return
+            for dependency in _get_node(name)[0]:
+                _visit(dependency)
+            order.append(name)
+
+        for name in names:
+            _visit(name)
+
+        return order
+
+    def refresh(self, *names: str):
+        """
+        Start a new snapshot, dropping the memoized value of names and every
+        node depending on them, or of every node if no names are given
+        """
+        if len(names) == 0:
+            stale = set(NODES)
+        else:
+            stale = {
+                node for node in NODES
+                if any(name in self.resolve(node) for name in names)
+            }
+
+        for name in stale:
+            self._values.pop(name, None)
+            self.timings.pop(name, None)
+
+        self.snapshot += 1
+
+
+def _get_node(name: str) -> tuple:
+    if name not in NODES:
+        raise Exception(
+            "Unknown metric '{}', choose from {}".format(name, list(NODES))
+        )
+
+    return NODES[name]
@@ -0,0 +1,168 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+PRECISION = 30
+
+
+class OraclePriceTable(Mapping):
+    """
+    Oracle prices parsed once into arrays aligned by token id, so hot paths
+    read numbers instead of parsing API strings and can convert or price
+    many tokens in one vectorized call. Prices are 30 decimal fixed point
+    per smallest token unit, as in the API, held exactly as Python ints
+    since they overflow int64, with float64 copies for vectorized math.
+
+    Behaves as the dictionary from OraclePrices.get_recent_prices, raw API
+    entries keyed by token address, so it can be passed where that is
+    expected. Use OraclePrices.get_price_table to build one.
+
+    Parameters
+    ----------
+    prices : dict
+        raw API entries keyed by token address, from get_recent_prices.
+    tokens : dict, optional
+        token metadata keyed by address, as from get_tokens_address_dict,
+        for the token decimals. The default is None, decimals unknown.
+    """
+
+    def __init__(self, prices: dict, tokens: dict = None):
+        self.raw = prices
+        tokens = tokens or {}
+
+        self.token_addresses = list(prices)
+        self.token_ids = {
+            address: token_id
+            for token_id, address in enumerate(self.token_addresses)
+        }
+
+        min_prices = [int(prices[address]['minPriceFull']) for address in self.token_addresses]
+        max_prices = [int(prices[address]['maxPriceFull']) for address in self.token_addresses]
+
+        self.min_price = np.array(min_prices, dtype=object)
+        self.max_price = np.array(max_prices, dtype=object)
+        self.mid_price = (self.min_price + self.max_price) // 2
+
+        self.min_price_float = np.array(min_prices, dtype=np.float64)
+        self.max_price_float = np.array(max_prices, dtype=np.float64)
+        self.mid_price_float = (self.min_price_float + self.max_price_float) / 2
+
+        # -1 where the token list has no decimals for the token
+        self.decimals = np.array(
+            [
+                tokens.get(address, {}).get('decimals', -1)
+                for address in self.token_addresses
+            ],
+            dtype=np.int64
+        )
+
+        # Multiplier from oracle price to USD per whole token
+        self.price_scale = np.where(
+            self.decimals >= 0,
+            10.0 ** (self.decimals - PRECISION).astype(np.float64),
+            np.nan
+        )
+        self.usd_price = self.mid_price_float * self.price_scale
+
+    def __getitem__(self, address: str) -> dict:
+        return self.raw[address]
+
+    def __iter__(self):
+        return iter(self.token_addresses)
+
+    def __len__(self):
+        return len(self.token_addresses)
+
+    def ids(self, addresses: list) -> np.ndarray:
+        """
+        Token ids of addresses, raising KeyError if any has no price
+        """
+        return np.array(
+            [self.token_ids[address] for address in addresses],
+            dtype=np.int64
+        )
+
+    def min_max(self, address: str) -> tuple:
+        """
+        Exact (min, max) oracle price of a token, as passed on chain
+        """
+        token_id = self.token_ids[address]
+        return self.min_price[token_id], self.max_price[token_id]
+
+    def mid(self, address: str) -> float:
+        """
+        Mid oracle price of a token
+        """
+        return self.mid_price_float[self.token_ids[address]]
+
+    def usd(self, address: str) -> float:
+        """
+        Mid USD price of one whole token
+        """
+        return self.usd_price[self.token_ids[address]]
+
+    def to_usd(self, addresses: list, amounts) -> np.ndarray:
+        """
+        USD value of token amounts at mid price
+
+        Parameters
+        ----------
+        addresses : list
+            token addresses.
+        amounts : array_like
+            amounts in the smallest token unit, aligned with addresses.
+
+        Returns
+        -------
+        np.ndarray
+            USD values.
+
+        """
+        return (
+            np.asarray(amounts, dtype=np.float64)
+            * self.mid_price_float[self.ids(addresses)]
+            / 10 ** PRECISION
+        )
+
+    def from_usd(self, addresses: list, usd_values) -> np.ndarray:
+        """
+        Token amounts in the smallest token unit worth usd_values at mid price
+        """
+        return (
+            np.asarray(usd_values, dtype=np.float64)
+            * 10 ** PRECISION
+            / self.mid_price_float[self.ids(addresses)]
+        )
+
+    def acceptable_prices(
+        self, addresses: list, is_long, is_open, slippage_percent
+    ) -> np.ndarray:
+        """
+        Acceptable oracle price of market orders, the mid price moved against
+        the trader by slippage_percent
+
+        Parameters
+        ----------
+        addresses : list
+            index token addresses.
+        is_long : bool or array_like
+            position direction.
+        is_open : bool or array_like
+            True for increase orders, False for decrease orders.
+        slippage_percent : float or array_like
+            slippage as a fraction, eg 0.003.
+
+        Returns
+        -------
+        np.ndarray
+            acceptable prices as Python ints, as passed on chain.
+
+        """
+        # Buying (opening a long or closing a short) accepts a higher price
+        direction = np.where(
+            np.asarray(is_long) == np.asarray(is_open), 1.0, -1.0
+        )
+        price = self.mid_price_float[self.ids(addresses)]
+        acceptable = price + direction * price * np.asarray(slippage_percent)
+
+        return np.array([int(value) for value in acceptable], dtype=object)
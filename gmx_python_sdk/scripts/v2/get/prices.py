@@ -70,6 +70,7 @@ def fetch_eth_price(chain: str):
     else:
         raise Exception("ETH price not found in the oracle data")
 
-# Example usage
-eth_price = fetch_eth_price("arbitrum")
-print(f"ETH Price (USD): {eth_price}")
+
+if __name__ == "__main__":
+    eth_price = fetch_eth_price("arbitrum")
+    print(f"ETH Price (USD): {eth_price}")
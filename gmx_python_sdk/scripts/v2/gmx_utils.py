@@ -1,14 +1,13 @@
 from eth_abi import encode
 from web3 import Web3
-import yaml
 import logging
 import os
 import json
 import requests
-
-import pandas as pd
+import threading
 
 from datetime import datetime
+from functools import lru_cache
 
 from concurrent.futures import ThreadPoolExecutor
 
@@ -18,14 +17,19 @@ base_dir = os.path.abspath(
     os.path.join(current_script_path, '..', '..', '..', '..')
 )
 package_dir = base_dir + '/gmx_python_sdk/'
-print('base_dir', base_dir)
 
-logging.basicConfig(
-    format='{asctime} {levelname}: {message}',
-    datefmt='%m/%d/%Y %I:%M:%S %p',
-    style='{',
-    level=logging.INFO
-)
+
+def configure_logging(level: int = logging.INFO):
+    """
+    Default SDK log format, applied when a ConfigManager is created rather
+    than on import. Does nothing if the root logger is already configured.
+    """
+    logging.basicConfig(
+        format='{asctime} {levelname}: {message}',
+        datefmt='%m/%d/%Y %I:%M:%S %p',
+        style='{',
+        level=level
+    )
 
 
 # Functions required for multithreading
@@ -81,6 +85,11 @@ contract_map = {
         {
             "contract_address": "0x7452c558d45f8afC8c83dAe62C3f8A5BE19c71f6",
             "abi_path": "contracts/arbitrum/syntheticsrouter.json"
+        },
+        "multicall3":
+        {
+            "contract_address": "0xcA11bde05977b3631167028862bE2a173976CA11",
+            "abi_path": "contracts/multicall3.json"
         }
     },
     'avalanche':
@@ -124,6 +133,11 @@ contract_map = {
         {
             "contract_address": "0x820F5FfC5b525cD4d88Cd91aCf2c28F16530Cc68",
             "abi_path": "contracts/avalanche/syntheticsrouter.json"
+        },
+        "multicall3":
+        {
+            "contract_address": "0xcA11bde05977b3631167028862bE2a173976CA11",
+            "abi_path": "contracts/multicall3.json"
         }
     }
 }
@@ -132,6 +146,7 @@ contract_map = {
 class ConfigManager:
 
     def __init__(self, chain: str):
+        configure_logging()
 
         self.chain = chain
         self.rpc = None
@@ -141,6 +156,7 @@ class ConfigManager:
         self.tg_bot_token = None
 
     def set_config(self, filepath: str = os.path.join(base_dir, "config.yaml")):
+        import yaml
 
         with open(filepath, 'r') as file:
             config_file = yaml.safe_load(file)
@@ -163,12 +179,94 @@ class ConfigManager:
         self.private_key = value
 
 
+# Wrapped native token per chain, sent as value so it never needs an
+# allowance and its balance is read with eth_getBalance
+NATIVE_TOKEN_ADDRESSES = {
+    "arbitrum": "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1",
+    "avalanche": "0xB31f66AA3C1e785363F0875A1B74E27b85FD66c7"
+}
+
+
+def get_native_token_address(chain: str) -> str:
+    """
+    Checksummed address of the wrapped native token of a chain
+    """
+    return NATIVE_TOKEN_ADDRESSES[chain]
+
+
+# Callables taking a provider and config and returning a provider, applied
+# innermost first to every connection, eg by a Cassette or Instrumentation
+_provider_wrappers = []
+
+# Bumped when wrappers change so shared connections are rebuilt with them
+_provider_wrappers_version = 0
+
+# Connections reused by the contract getters, per thread
+_shared_connections = threading.local()
+
+
+def add_provider_wrapper(provider_wrapper, innermost: bool = False):
+    """
+    Wrap the provider of every connection made by create_connection
+
+    Parameters
+    ----------
+    provider_wrapper : callable
+        function taking a web3 provider and config and returning a provider.
+    innermost : bool, optional
+        apply before other wrappers, for wrappers that replace the transport.
+        The default is False.
+
+    """
+    global _provider_wrappers_version
+
+    if innermost:
+        _provider_wrappers.insert(0, provider_wrapper)
+    else:
+        _provider_wrappers.append(provider_wrapper)
+    _provider_wrappers_version += 1
+
+
+def remove_provider_wrapper(provider_wrapper):
+    """
+    Stop wrapping new connections with provider_wrapper
+    """
+    global _provider_wrappers_version
+
+    if provider_wrapper in _provider_wrappers:
+        _provider_wrappers.remove(provider_wrapper)
+        _provider_wrappers_version += 1
+
+
 def create_connection(config):
     """
     Create a connection to the blockchain
     """
+    provider = Web3.HTTPProvider(config.rpc)
+
+    for provider_wrapper in _provider_wrappers:
+        provider = provider_wrapper(provider, config)
+
+    web3_obj = Web3(provider)
+
+    return web3_obj
+
+
+def get_shared_connection(config):
+    """
+    Connection reused for the chain and RPC of config within the calling
+    thread, so contract objects built on it are served from the contract
+    cache. Rebuilt when provider wrappers are added or removed.
+    """
+    key = (config.chain, config.rpc)
+    connections = getattr(_shared_connections, 'connections', None)
+    if connections is None:
+        connections = _shared_connections.connections = {}
 
-    web3_obj = Web3(Web3.HTTPProvider(config.rpc))
+    version, web3_obj = connections.get(key, (None, None))
+    if version != _provider_wrappers_version:
+        web3_obj = create_connection(config)
+        connections[key] = (_provider_wrappers_version, web3_obj)
 
     return web3_obj
 
@@ -190,19 +288,88 @@ def convert_to_checksum_address(config, address: str):
         checksum formatted address.
 
     """
-    web3_obj = create_connection(config)
-
     # Added to support older versions of web3.py for now
     try:
-        return web3_obj.toChecksumAddress(address)
+        return Web3.to_checksum_address(address)
     except AttributeError:
-        return web3_obj.to_checksum_address(address)
+        return Web3.toChecksumAddress(address)
 
 
-def get_contract_object(web3_obj, contract_name: str, chain: str):
+# Per chain file of ABIs trimmed to what the SDK uses, see build_abis.py
+TRIMMED_ABI_FILENAME = "abis.trimmed.json"
+
+# Attribute holding the contract objects built on a web3 connection, so
+# they are released with it
+CONTRACT_CACHE_ATTRIBUTE = "_gmx_contracts"
+
+
+@lru_cache(maxsize=None)
+def _load_trimmed_abis(chain: str) -> dict:
+    filepath = os.path.join(
+        package_dir, 'contracts', chain, TRIMMED_ABI_FILENAME
+    )
+    if not os.path.exists(filepath):
+        return {}
+
+    with open(filepath) as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_contract_abi(chain: str, contract_name: str, trimmed: bool = False):
+    """
+    ABI of a contract in contract_map, parsed once per process. The trimmed
+    ABI only holds the functions and events the SDK calls, the full ABI is
+    used if trimmed is False or no trimmed artifact was built.
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    contract_name : str
+        name of contract to use to map.
+    trimmed : bool, optional
+        use the trimmed artifact. The default is False.
+
+    Returns
+    -------
+    list
+        contract ABI, shared between callers so must not be modified.
+
+    """
+    if trimmed:
+        artifact = _load_trimmed_abis(chain).get(contract_name)
+        if artifact is not None:
+            return artifact['abi']
+
+    with open(
+        os.path.join(package_dir, contract_map[chain][contract_name]["abi_path"])
+    ) as f:
+        return json.load(f)
+
+
+def get_function_selector(chain: str, contract_name: str, function_name: str):
+    """
+    Precomputed 4 byte selector of a contract function, as hex
+
+    Returns
+    -------
+    str
+        selector, or None if the function is not in the trimmed artifact.
+
+    """
+    return _load_trimmed_abis(chain).get(
+        contract_name, {}
+    ).get('selectors', {}).get(function_name)
+
+
+def get_contract_object(
+    web3_obj, contract_name: str, chain: str, trimmed: bool = False
+):
     """
     Using a contract name, retrieve the address and api from contract map
-    and create a web3 contract object
+    and create a web3 contract object. Objects are cached per connection so
+    repeated calls reuse the same contract.
 
     Parameters
     ----------
@@ -212,6 +379,10 @@ def get_contract_object(web3_obj, contract_name: str, chain: str):
         name of contract to use to map.
     chain : str
         arbitrum or avalanche.
+    trimmed : bool, optional
+        only expose the functions and events the SDK uses, which is cheaper
+        to build. Only for SDK internals that call nothing else on the
+        contract. The default is False.
 
     Returns
     -------
@@ -219,21 +390,16 @@ def get_contract_object(web3_obj, contract_name: str, chain: str):
         an instantied web3 contract object.
 
     """
-    contract_address = contract_map[chain][contract_name]["contract_address"]
+    contracts = web3_obj.__dict__.setdefault(CONTRACT_CACHE_ATTRIBUTE, {})
+    key = (chain, contract_name, trimmed)
 
-    contract_abi = json.load(
-        open(
-            os.path.join(
-                base_dir,
-                'gmx_python_sdk',
-                contract_map[chain][contract_name]["abi_path"]
-            )
+    if key not in contracts:
+        contracts[key] = web3_obj.eth.contract(
+            address=contract_map[chain][contract_name]["contract_address"],
+            abi=load_contract_abi(chain, contract_name, trimmed)
         )
-    )
-    return web3_obj.eth.contract(
-        address=contract_address,
-        abi=contract_abi
-    )
+
+    return contracts[key]
 
 
 def get_token_balance_contract(config: str, contract_address: str):
@@ -306,7 +472,7 @@ def get_tokens_address_dict(chain: str):
     return token_address_dict
 
 
-def get_reader_contract(config):
+def get_reader_contract(config, trimmed: bool = False):
     """
     Get a reader contract web3_obj for a given chain
 
@@ -314,18 +480,22 @@ def get_reader_contract(config):
     ----------
     chain : str
         avalanche or arbitrum.
+    trimmed : bool, optional
+        only expose the functions the SDK uses, see get_contract_object.
+        The default is False.
 
     """
 
-    web3_obj = create_connection(config)
+    web3_obj = get_shared_connection(config)
     return get_contract_object(
         web3_obj,
         'syntheticsreader',
-        config.chain
+        config.chain,
+        trimmed=trimmed
     )
 
 
-def get_event_emitter_contract(config):
+def get_event_emitter_contract(config, trimmed: bool = False):
     """
     Get a event emitter contract web3_obj for a given chain
 
@@ -333,18 +503,22 @@ def get_event_emitter_contract(config):
     ----------
     chain : str
         avalanche or arbitrum.
+    trimmed : bool, optional
+        only expose the functions the SDK uses, see get_contract_object.
+        The default is False.
 
     """
 
-    web3_obj = create_connection(config)
+    web3_obj = get_shared_connection(config)
     return get_contract_object(
         web3_obj,
         'eventemitter',
-        config.chain
+        config.chain,
+        trimmed=trimmed
     )
 
 
-def get_datastore_contract(config):
+def get_datastore_contract(config, trimmed: bool = False):
     """
     Get a datastore contract web3_obj for a given chain
 
@@ -352,18 +526,22 @@ def get_datastore_contract(config):
     ----------
     chain : str
         avalanche or arbitrum.
+    trimmed : bool, optional
+        only expose the functions the SDK uses, see get_contract_object.
+        The default is False.
 
     """
 
-    web3_obj = create_connection(config)
+    web3_obj = get_shared_connection(config)
     return get_contract_object(
         web3_obj,
         'datastore',
-        config.chain
+        config.chain,
+        trimmed=trimmed
     )
 
 
-def get_exchange_router_contract(config):
+def get_exchange_router_contract(config, trimmed: bool = False):
     """
     Get a exchange router contract web3_obj for a given chain
 
@@ -371,14 +549,18 @@ def get_exchange_router_contract(config):
     ----------
     chain : str
         avalanche or arbitrum.
+    trimmed : bool, optional
+        only expose the functions the SDK uses, see get_contract_object.
+        The default is False.
 
     """
 
-    web3_obj = create_connection(config)
+    web3_obj = get_shared_connection(config)
     return get_contract_object(
         web3_obj,
         'exchangerouter',
-        config.chain
+        config.chain,
+        trimmed=trimmed
     )
 
 
@@ -441,7 +623,7 @@ def create_hash_string(string: str):
 
 
 def get_execution_price_and_price_impact(
-    config, params: dict, decimals: int
+    config, params: dict, decimals: int, reader_contract_obj=None
 ):
     """
     Get the execution price and price impact for a position
@@ -454,9 +636,12 @@ def get_execution_price_and_price_impact(
         dictionary of the position parameters.
     decimals : int
         number of decimals of the token being traded eg ETH == 18.
+    reader_contract_obj : web3_obj, optional
+        existing reader contract to reuse. The default is None.
 
     """
-    reader_contract_obj = get_reader_contract(config)
+    if reader_contract_obj is None:
+        reader_contract_obj = get_reader_contract(config, trimmed=True)
 
     output = reader_contract_obj.functions.getExecutionPrice(
         params['data_store_address'],
@@ -472,7 +657,7 @@ def get_execution_price_and_price_impact(
             'price_impact_usd': output[0] / 10**PRECISION}
 
 
-def get_estimated_swap_output(config, params: dict):
+def get_estimated_swap_output(config, params: dict, reader_contract_obj=None):
     """
     For a given chain and requested swap get the amount of tokens
     out and the price impact the swap will have.
@@ -483,9 +668,12 @@ def get_estimated_swap_output(config, params: dict):
         arbitrum or avalanche.
     params : dict
         dictionary of the swap parameters.
+    reader_contract_obj : web3_obj, optional
+        existing reader contract to reuse. The default is None.
 
     """
-    reader_contract_obj = get_reader_contract(config)
+    if reader_contract_obj is None:
+        reader_contract_obj = get_reader_contract(config, trimmed=True)
 
     output = reader_contract_obj.functions.getSwapAmountOut(
         params['data_store_address'],
@@ -514,7 +702,7 @@ def get_estimated_deposit_amount_out(config, params: dict):
         dictionary of the gm input parameters.
 
     """
-    reader_contract_obj = get_reader_contract(config)
+    reader_contract_obj = get_reader_contract(config, trimmed=True)
 
     output = reader_contract_obj.functions.getDepositAmountOut(
         params['data_store_address'],
@@ -541,7 +729,7 @@ def get_estimated_withdrawal_amount_out(config, params: dict):
         dictionary of the gm parameters.
 
     """
-    reader_contract_obj = get_reader_contract(config)
+    reader_contract_obj = get_reader_contract(config, trimmed=True)
 
     output = reader_contract_obj.functions.getWithdrawalAmountOut(
         params['data_store_address'],
@@ -686,6 +874,8 @@ def make_timestamped_dataframe(data):
         dataframe to add timestamp column to.
 
     """
+    import pandas as pd
+
     dataframe = pd.DataFrame(data, index=[0])
     dataframe['timestamp'] = datetime.now()
 
@@ -704,6 +894,7 @@ def save_csv_to_datastore(filename: str, dataframe):
         pandas dataframe
 
     """
+    import pandas as pd
 
     archive_filepath = os.path.join(
         package_dir,
@@ -737,8 +928,9 @@ def determine_swap_route(markets: dict, in_token: str, out_token: str):
 
     Parameters
     ----------
-    markets : dict
-        dictionary of markets output by getMarketInfo.
+    markets : dict or MarketRegistry
+        dictionary of markets output by getMarketInfo, or a MarketRegistry
+        for O(1) lookups.
     in_token : str
         contract address of in token.
     out_token : str
@@ -753,19 +945,11 @@ def determine_swap_route(markets: dict, in_token: str, out_token: str):
 
     """
     if in_token == "0xaf88d065e77c8cC2239327C5EDb3A432268e5831":
-        gmx_market_address = find_dictionary_by_key_value(
-            markets,
-            "index_token_address",
-            out_token
-        )['gmx_market_address']
+        gmx_market_address = _find_market_by_index_token(markets, out_token)
     else:
         if in_token == "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f":
             in_token = "0x47904963fc8b2340414262125aF798B9655E58Cd"
-        gmx_market_address = find_dictionary_by_key_value(
-            markets,
-            "index_token_address",
-            in_token
-        )['gmx_market_address']
+        gmx_market_address = _find_market_by_index_token(markets, in_token)
 
     is_requires_multi_swap = False
 
@@ -774,17 +958,28 @@ def determine_swap_route(markets: dict, in_token: str, out_token: str):
         is_requires_multi_swap = True
         if out_token == "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f":
             out_token = "0x47904963fc8b2340414262125aF798B9655E58Cd"
-        second_gmx_market_address = find_dictionary_by_key_value(
+        second_gmx_market_address = _find_market_by_index_token(
             markets,
-            "index_token_address",
             out_token
-        )['gmx_market_address']
+        )
 
         return [gmx_market_address, second_gmx_market_address], is_requires_multi_swap
 
     return [gmx_market_address], is_requires_multi_swap
 
 
+def _find_market_by_index_token(markets, index_token_address: str) -> str:
+    # A MarketRegistry has a hash index, plain dictionaries need a scan
+    if hasattr(markets, 'find_by_index_token'):
+        return markets.find_by_index_token(index_token_address)
+
+    return find_dictionary_by_key_value(
+        markets,
+        "index_token_address",
+        index_token_address
+    )['gmx_market_address']
+
+
 if __name__ == "__main__":
     arbitrum_config_object = ConfigManager(chain='arbitrum')
     arbitrum_config_object.set_config()
@@ -0,0 +1,335 @@
+import logging
+
+import numpy as np
+
+from .approve_token_for_spend import get_allowance_cache
+from .get.get_markets import Markets
+from .get.get_oracle_prices import OraclePrices
+from .get.market_registry import MarketRegistry
+from .gmx_utils import (
+    get_reader_contract, contract_map, convert_to_checksum_address
+)
+from .token_resolver import get_token_resolver
+
+# Default band either side of target, in USD, before a rebalance is emitted
+DEFAULT_TOLERANCE_USD = 50
+
+# Residual order sizes below this, in USD, are dropped
+DEFAULT_MIN_ORDER_USD = 10
+
+MAX_POSITIONS = 100
+
+
+class HedgeEngine:
+    """
+    Keep the net token delta of each asset inside a tolerance band around a
+    target. Net delta is the sum of wallet balances, GM LP exposure and open
+    GMX positions from a snapshot (see get_hedge_snapshot). On each tick only
+    assets whose inputs changed since the last tick are recomputed, and for
+    each asset outside its band the minimal set of orders is emitted,
+    decreasing opposing positions before opening new ones.
+
+    Targets are keyed by index token address, eg
+    {"0x82aF...": {"target_delta": 0, "tolerance_usd": 100}}
+    """
+
+    def __init__(
+        self, targets: dict, tolerance_usd: float = DEFAULT_TOLERANCE_USD,
+        min_order_usd: float = DEFAULT_MIN_ORDER_USD
+    ):
+        self.tolerance_usd = tolerance_usd
+        self.min_order_usd = min_order_usd
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._targets = {}
+        for token, target in targets.items():
+            self.set_target(
+                token,
+                target['target_delta'],
+                target.get('tolerance_usd')
+            )
+
+        self._inputs = {}
+        self._net_deltas = {}
+        self._pending = {}
+
+    def set_target(
+        self, token: str, target_delta: float, tolerance_usd: float = None
+    ):
+        """
+        Set the target net delta for an asset
+
+        Parameters
+        ----------
+        token : str
+            index token address.
+        target_delta : float
+            target net delta in tokens, 0 for delta neutral.
+        tolerance_usd : float, optional
+            band either side of target in USD. The default is the engine
+            tolerance.
+
+        """
+        self._targets[token] = {
+            'target_delta': target_delta,
+            'tolerance_usd': (
+                self.tolerance_usd if tolerance_usd is None else tolerance_usd
+            )
+        }
+
+    def get_net_delta(self, token: str) -> float:
+        """
+        Net delta of an asset in tokens as of the last tick, including orders
+        emitted but not yet reflected in positions
+        """
+        return self._net_deltas.get(token, 0) + self._pending.get(token, 0)
+
+    def clear_pending(self, token: str = None):
+        """
+        Forget emitted orders, eg after they were cancelled or failed to
+        execute, so the next tick recomputes the asset from its inputs
+        """
+        tokens = [token] if token is not None else list(self._pending)
+        for token in tokens:
+            self._pending.pop(token, None)
+            self._inputs.pop(token, None)
+
+    def tick(self, snapshot: dict) -> list:
+        """
+        Recompute assets whose inputs changed and emit rebalancing orders
+
+        Parameters
+        ----------
+        snapshot : dict
+            dictionary with prices, wallet, gm, positions and markets keyed
+            by index token address, as returned by get_hedge_snapshot.
+
+        Returns
+        -------
+        list
+            list of order dictionaries.
+
+        """
+        orders = []
+
+        for token, target in self._targets.items():
+            inputs = self._get_inputs(snapshot, token, target)
+
+            if self._inputs.get(token) == inputs:
+                continue
+
+            previous = self._inputs.get(token)
+            self._inputs[token] = inputs
+
+            # pending orders are assumed executed once positions change
+            if previous is not None and previous[2:4] != inputs[2:4]:
+                self._pending.pop(token, None)
+
+            self._net_deltas[token] = inputs[0] + inputs[1] + inputs[2] - inputs[3]
+
+            token_orders = self._rebalance(snapshot, token, target)
+            if len(token_orders) > 0:
+                self._pending[token] = self._pending.get(token, 0) + sum(
+                    order['size_delta_tokens'] * (
+                        1 if order['is_long'] == order['is_increase'] else -1
+                    )
+                    for order in token_orders
+                )
+                orders = orders + token_orders
+
+        return orders
+
+    def _get_inputs(self, snapshot: dict, token: str, target: dict) -> tuple:
+        positions = snapshot['positions'].get(token, [])
+
+        return (
+            snapshot['wallet'].get(token, 0),
+            snapshot['gm'].get(token, 0),
+            sum(p['size_in_tokens'] for p in positions if p['is_long']),
+            sum(p['size_in_tokens'] for p in positions if not p['is_long']),
+            snapshot['prices'].get(token),
+            target['target_delta'],
+            target['tolerance_usd']
+        )
+
+    def _rebalance(self, snapshot: dict, token: str, target: dict) -> list:
+        """
+        Orders needed to bring an asset back to target, decreasing positions
+        on the opposing side first and opening the remainder on the hedge
+        market
+
+        """
+        price = snapshot['prices'].get(token)
+        if price is None:
+            self.log.warning("No price for {}, skipping".format(token))
+            return []
+
+        deviation = self.get_net_delta(token) - target['target_delta']
+        if abs(deviation) * price <= target['tolerance_usd']:
+            return []
+
+        # reducing delta closes longs before opening shorts and vice versa
+        reduce_long = deviation > 0
+        remaining = abs(deviation)
+
+        orders = []
+        positions = sorted(
+            [
+                p for p in snapshot['positions'].get(token, [])
+                if p['is_long'] == reduce_long
+            ],
+            key=lambda p: p['size_in_tokens'],
+            reverse=True
+        )
+        for position in positions:
+            if remaining * price < self.min_order_usd:
+                break
+
+            size_delta_tokens = min(position['size_in_tokens'], remaining)
+            orders.append({
+                'index_token_address': token,
+                'market_key': position['market_key'],
+                'collateral_address': position['collateral_address'],
+                'is_long': position['is_long'],
+                'is_increase': False,
+                'size_delta_tokens': size_delta_tokens,
+                'size_delta_usd': position['size_in_usd'] * (
+                    size_delta_tokens / position['size_in_tokens']
+                )
+            })
+            remaining -= size_delta_tokens
+
+        if remaining * price >= self.min_order_usd:
+            market_key = snapshot['markets'].get(token)
+            if market_key is None:
+                self.log.warning("No hedge market for {}".format(token))
+                return orders
+
+            orders.append({
+                'index_token_address': token,
+                'market_key': market_key,
+                'collateral_address': None,
+                'is_long': not reduce_long,
+                'is_increase': True,
+                'size_delta_tokens': remaining,
+                'size_delta_usd': remaining * price
+            })
+
+        return orders
+
+
+def get_hedge_snapshot(
+    config, address: str, wallet_tokens: list, gm_exposure: dict = None,
+    markets: dict = None, oracle_prices: dict = None
+) -> dict:
+    """
+    Build a HedgeEngine snapshot: oracle prices, wallet balances, GM
+    exposure, open positions and the market to hedge each index token on
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+    address : str
+        wallet address.
+    wallet_tokens : list
+        addresses of wallet tokens counted towards exposure, each against
+        the index token its markets are listed under.
+    gm_exposure : dict, optional
+        token delta of GM holdings keyed by token address, as returned by
+        GMExposure.get_token_exposure. The default is None.
+    markets : dict, optional
+        already loaded markets, eg from OrderClient.get_markets. The default
+        is None.
+    oracle_prices : dict, optional
+        already loaded oracle prices, eg from OrderClient.get_prices. The
+        default is None.
+
+    Returns
+    -------
+    dict
+        snapshot dictionary.
+
+    """
+    address = convert_to_checksum_address(config, address)
+    if markets is None:
+        markets = Markets(config).info
+    if oracle_prices is None:
+        oracle_prices = OraclePrices(chain=config.chain).get_recent_prices()
+
+    registry = MarketRegistry(markets)
+    resolver = get_token_resolver(config.chain)
+
+    def _get_decimals(token: str) -> int:
+        token_id = registry.token_ids.get(token)
+        if token_id is not None:
+            return int(registry.token_decimals[token_id])
+
+        return resolver.decimals(token)
+
+    # First listed market per index token that is neither swap only nor a
+    # single sided pool, falling back to a single sided one
+    hedge_markets = {}
+    single_sided = {}
+    for record in registry.records:
+        if record.is_swap:
+            continue
+        if record.long_token_address == record.short_token_address:
+            single_sided.setdefault(record.index_token_address, record.address)
+        else:
+            hedge_markets.setdefault(record.index_token_address, record.address)
+    for token, market_key in single_sided.items():
+        hedge_markets.setdefault(token, market_key)
+
+    prices = {}
+    for token, decimals in zip(registry.token_addresses, registry.token_decimals):
+        if token in oracle_prices:
+            prices[token] = np.median(
+                [
+                    float(oracle_prices[token]['maxPriceFull']),
+                    float(oracle_prices[token]['minPriceFull'])
+                ]
+            ) / 10 ** (30 - int(decimals))
+
+    # Wallet tokens count against the index token their markets are listed
+    # under, eg WBTC against BTC
+    wallet = {}
+    if len(wallet_tokens) > 0:
+        allowance_cache = get_allowance_cache(config)
+        allowance_cache.load(address, wallet_tokens, [])
+        for token in wallet_tokens:
+            token = convert_to_checksum_address(config, token)
+            index_token = resolver.market_index_address(token)
+            wallet[index_token] = wallet.get(index_token, 0) + \
+                allowance_cache.get_balance(address, token) / 10 ** _get_decimals(token)
+
+    reader_contract = get_reader_contract(config, trimmed=True)
+    raw_positions = reader_contract.functions.getAccountPositions(
+        contract_map[config.chain]['datastore']['contract_address'],
+        address,
+        0,
+        MAX_POSITIONS
+    ).call()
+
+    positions = {}
+    for raw_position in raw_positions:
+        if raw_position[0][1] not in registry:
+            continue
+        record = registry.get(raw_position[0][1])
+        token = record.index_token_address
+        positions.setdefault(token, []).append({
+            'market_key': raw_position[0][1],
+            'collateral_address': raw_position[0][2],
+            'is_long': raw_position[2][0],
+            'size_in_usd': raw_position[1][0] / 10**30,
+            'size_in_tokens': raw_position[1][1] / 10 ** record.index_decimals
+        })
+
+    return {
+        'prices': prices,
+        'wallet': wallet,
+        'gm': gm_exposure or {},
+        'positions': positions,
+        'markets': hedge_markets
+    }
@@ -0,0 +1,407 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from eth_abi import decode
+from eth_utils import function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from web3.providers.base import BaseProvider
+
+from . import gmx_utils
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Latest latencies kept per key for the summary percentiles
+DEFAULT_WINDOW = 10000
+
+# Modules skipped when looking for the class that made a request
+INTERNAL_MODULES = ['instrumentation', 'cassette', 'gmx_utils', 'multicall']
+LIBRARY_PREFIXES = (
+    'web3', 'eth_', 'requests', 'urllib3', 'http', 'socket', 'ssl',
+    'threading', 'concurrent', 'functools'
+)
+
+
+class InstrumentedProvider(BaseProvider):
+    """
+    Web3 provider that times and sizes each request of a wrapped provider
+    """
+
+    def __init__(self, instrumentation, provider, chain: str):
+        self.instrumentation = instrumentation
+        self.provider = provider
+        self.chain = chain
+
+    def make_request(self, method, params):
+        if not self.instrumentation.enabled:
+            return self.provider.make_request(method, params)
+
+        return self.instrumentation.rpc_request(
+            self.provider, self.chain, method, params
+        )
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return self.provider.is_connected(show_traceback)
+
+    # web3 versions before 6 call isConnected
+    isConnected = is_connected
+
+
+class Instrumentation:
+    """
+    Count, time and size every JSON-RPC request made through
+    create_connection and every requests.get, keyed by chain, contract,
+    function (or host and path for HTTP) and the SDK class that made the
+    call. Calls batched through Multicall3 aggregate3 are also counted per
+    inner function.
+
+    Nothing is wrapped until enabled, so a disabled Instrumentation costs
+    nothing. Enable after entering a Cassette so replayed HTTP requests are
+    seen too:
+
+        with Instrumentation() as instrumentation:
+            GetBorrowAPR(config).get_data()
+        print(instrumentation.summary())
+        print(instrumentation.to_prometheus())
+
+    Counts, bytes, latency totals and the histogram cover every call, the
+    summary percentiles the latest window calls per key.
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        enable on creation. The default is False.
+    window : int, optional
+        latencies kept per key. The default is DEFAULT_WINDOW.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = DEFAULT_WINDOW):
+        self.enabled = False
+        self.window = window
+
+        self._metrics = {}
+        self._subcalls = {}
+        self._contracts = {}
+        self._token_functions = None
+        self._lock = threading.Lock()
+        self._requests_get = None
+
+        if enabled:
+            self.enable()
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def enable(self):
+        if self.enabled:
+            return self
+
+        gmx_utils.add_provider_wrapper(self._wrap_provider)
+        self._requests_get = requests.get
+        requests.get = self.http_get
+        self.enabled = True
+
+        return self
+
+    def disable(self):
+        if not self.enabled:
+            return
+
+        gmx_utils.remove_provider_wrapper(self._wrap_provider)
+        requests.get = self._requests_get
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+            self._subcalls = {}
+
+    def rpc_request(self, provider, chain: str, method: str, params) -> dict:
+        """
+        Forward one JSON-RPC request and record it
+        """
+        caller = _get_caller()
+        contract, function, subcalls = self._resolve_rpc(chain, method, params)
+
+        response = None
+        error = True
+        start = time.perf_counter()
+        try:
+            response = provider.make_request(method, params)
+            error = 'error' in response
+        finally:
+            self._record(
+                (chain, contract, function, caller),
+                time.perf_counter() - start,
+                len(json.dumps(params, default=str)),
+                len(json.dumps(response, default=str)) if response is not None else 0,
+                error
+            )
+
+        if len(subcalls) > 0:
+            with self._lock:
+                for sub_contract, sub_function in subcalls:
+                    key = (chain, sub_contract, sub_function, caller)
+                    self._subcalls[key] = self._subcalls.get(key, 0) + 1
+
+        return response
+
+    def http_get(self, url, *args, **kwargs):
+        """
+        Forward a requests.get call and record it
+        """
+        caller = _get_caller()
+        parsed = urlparse(url)
+        chain = next(
+            (chain for chain in gmx_utils.contract_map if chain in parsed.netloc),
+            "unknown"
+        )
+
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self._requests_get(url, *args, **kwargs)
+        finally:
+            self._record(
+                (chain, parsed.netloc, parsed.path, caller),
+                time.perf_counter() - start,
+                len(url),
+                len(response.content) if response is not None else 0,
+                response is None or response.status_code >= 400
+            )
+
+        return response
+
+    def summary(self):
+        """
+        Per key summary of the run, busiest first
+
+        Returns
+        -------
+        pd.DataFrame
+            calls, multicall subcalls, errors, latency percentiles and bytes.
+
+        """
+        import pandas as pd
+
+        with self._lock:
+            keys = list(self._metrics) + [
+                key for key in self._subcalls if key not in self._metrics
+            ]
+            rows = []
+            for key in keys:
+                metric = self._metrics.get(key)
+                latencies = np.array(metric['latencies']) * 1000 if metric else []
+                rows.append({
+                    'chain': key[0],
+                    'contract': key[1],
+                    'function': key[2],
+                    'caller': key[3],
+                    'calls': metric['calls'] if metric else 0,
+                    'subcalls': self._subcalls.get(key, 0),
+                    'errors': metric['errors'] if metric else 0,
+                    'p50_ms': np.percentile(latencies, 50) if metric else np.nan,
+                    'p99_ms': np.percentile(latencies, 99) if metric else np.nan,
+                    'total_ms': metric['latency_sum'] * 1000 if metric else 0,
+                    'request_bytes': metric['request_bytes'] if metric else 0,
+                    'response_bytes': metric['response_bytes'] if metric else 0
+                })
+
+        return pd.DataFrame(
+            rows,
+            columns=[
+                'chain', 'contract', 'function', 'caller', 'calls',
+                'subcalls', 'errors', 'p50_ms', 'p99_ms', 'total_ms',
+                'request_bytes', 'response_bytes'
+            ]
+        ).sort_values(['calls', 'subcalls'], ascending=False, ignore_index=True)
+
+    def to_prometheus(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format
+
+        Returns
+        -------
+        str
+            metrics text.
+
+        """
+        lines = []
+
+        def _header(name, metric_type, help_text):
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+
+        with self._lock:
+            metrics = {key: dict(value) for key, value in self._metrics.items()}
+            subcalls = dict(self._subcalls)
+
+        for name, field, help_text in [
+            ('gmx_requests_total', 'calls', "RPC and HTTP requests."),
+            ('gmx_request_errors_total', 'errors', "Failed RPC and HTTP requests."),
+            ('gmx_request_bytes_total', 'request_bytes', "Request payload bytes."),
+            ('gmx_response_bytes_total', 'response_bytes', "Response payload bytes.")
+        ]:
+            _header(name, "counter", help_text)
+            for key, metric in metrics.items():
+                lines.append("{}{{{}}} {}".format(name, _labels(key), metric[field]))
+
+        _header(
+            'gmx_multicall_subcalls_total',
+            "counter",
+            "Contract calls batched through Multicall3."
+        )
+        for key, count in subcalls.items():
+            lines.append(
+                "gmx_multicall_subcalls_total{{{}}} {}".format(_labels(key), count)
+            )
+
+        name = 'gmx_request_duration_seconds'
+        _header(name, "histogram", "RPC and HTTP request latency.")
+        for key, metric in metrics.items():
+            labels = _labels(key)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, metric['buckets']):
+                cumulative += count
+                lines.append(
+                    '{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative)
+                )
+            lines.append(
+                '{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, metric['calls'])
+            )
+            lines.append(
+                "{}_sum{{{}}} {}".format(name, labels, metric['latency_sum'])
+            )
+            lines.append("{}_count{{{}}} {}".format(name, labels, metric['calls']))
+
+        return "\n".join(lines) + "\n"
+
+    def _wrap_provider(self, provider, config):
+        return InstrumentedProvider(self, provider, config.chain)
+
+    def _record(
+        self, key: tuple, latency: float, request_bytes: int,
+        response_bytes: int, error: bool
+    ):
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = {
+                    'calls': 0,
+                    'errors': 0,
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                    'latency_sum': 0,
+                    'latencies': deque(maxlen=self.window),
+                    'buckets': [0] * len(LATENCY_BUCKETS)
+                }
+                self._metrics[key] = metric
+
+            metric['calls'] += 1
+            metric['errors'] += int(error)
+            metric['request_bytes'] += request_bytes
+            metric['response_bytes'] += response_bytes
+            metric['latency_sum'] += latency
+            metric['latencies'].append(latency)
+
+            bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+            if bucket < len(LATENCY_BUCKETS):
+                metric['buckets'][bucket] += 1
+
+    def _resolve_rpc(self, chain: str, method: str, params) -> tuple:
+        """
+        Contract and function names of an eth_call or eth_estimateGas, and
+        of each inner call if it is a Multicall3 aggregate3
+
+        """
+        if method not in ['eth_call', 'eth_estimateGas'] or len(params) == 0:
+            return "-", method, []
+
+        to = params[0].get('to')
+        data = HexBytes(params[0].get('data', params[0].get('input', '0x')))
+        contract, function = self._resolve_function(chain, to, data)
+
+        subcalls = []
+        if contract == 'multicall3' and function == 'aggregate3':
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            subcalls = [
+                self._resolve_function(chain, target, call_data)
+                for target, _, call_data in calls
+            ]
+
+        return contract, function, subcalls
+
+    def _resolve_function(self, chain: str, to: str, data: bytes) -> tuple:
+        if chain not in self._contracts:
+            self._load_contracts(chain)
+
+        selector = bytes(data[:4])
+        contract = self._contracts[chain].get((to or "").lower())
+        if contract is not None:
+            return contract[0], contract[1].get(selector, selector.hex())
+
+        return "erc20", self._token_functions.get(selector, selector.hex())
+
+    def _load_contracts(self, chain: str):
+        contracts = {}
+        for name, contract in gmx_utils.contract_map.get(chain, {}).items():
+            contracts[contract['contract_address'].lower()] = (
+                name,
+                _get_function_names(contract['abi_path'])
+            )
+
+        self._token_functions = _get_function_names(
+            "contracts/token_approval.json"
+        )
+        self._contracts[chain] = contracts
+
+
+def _get_function_names(abi_path: str) -> dict:
+    abi = json.load(
+        open(os.path.join(gmx_utils.base_dir, 'gmx_python_sdk', abi_path))
+    )
+
+    return {
+        function_abi_to_4byte_selector(entry): entry['name']
+        for entry in abi if entry['type'] == 'function'
+    }
+
+
+def _get_caller() -> str:
+    """
+    Class name, or function name, of the innermost frame on the stack outside
+    web3, requests and the SDK plumbing modules
+
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', "")
+        if not module.startswith(LIBRARY_PREFIXES) and not (
+            module.startswith('gmx_python_sdk') and
+            module.rsplit(".", 1)[-1] in INTERNAL_MODULES
+        ):
+            instance = frame.f_locals.get('self')
+            if instance is not None:
+                return instance.__class__.__name__
+            return frame.f_code.co_name
+        frame = frame.f_back
+
+    return "unknown"
+
+
+def _labels(key: tuple) -> str:
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(['chain', 'contract', 'function', 'caller'], key)
+    )
@@ -1,68 +1,85 @@
+from functools import lru_cache
+
 from .gmx_utils import create_hash_string, create_hash, get_datastore_contract
 
-ACCOUNT_POSITION_LIST = create_hash_string("ACCOUNT_POSITION_LIST")
-CLAIMABLE_FEE_AMOUNT = create_hash_string("CLAIMABLE_FEE_AMOUNT")
-DECREASE_ORDER_GAS_LIMIT = create_hash_string("DECREASE_ORDER_GAS_LIMIT")
-DEPOSIT_GAS_LIMIT = create_hash_string("DEPOSIT_GAS_LIMIT")
-
-WITHDRAWAL_GAS_LIMIT = create_hash_string("WITHDRAWAL_GAS_LIMIT")
-
-EXECUTION_GAS_FEE_BASE_AMOUNT = create_hash_string("EXECUTION_GAS_FEE_BASE_AMOUNT")
-EXECUTION_GAS_FEE_MULTIPLIER_FACTOR = create_hash_string("EXECUTION_GAS_FEE_MULTIPLIER_FACTOR")
-INCREASE_ORDER_GAS_LIMIT = create_hash_string("INCREASE_ORDER_GAS_LIMIT")
-MAX_OPEN_INTEREST = create_hash_string("MAX_OPEN_INTEREST")
-MAX_PNL_FACTOR_FOR_TRADERS = create_hash_string("MAX_PNL_FACTOR_FOR_TRADERS")
-MAX_PNL_FACTOR_FOR_DEPOSITS = create_hash_string("MAX_PNL_FACTOR_FOR_DEPOSITS")
-MAX_PNL_FACTOR_FOR_WITHDRAWALS = create_hash_string("MAX_PNL_FACTOR_FOR_WITHDRAWALS")
-MIN_ADDITIONAL_GAS_FOR_EXECUTION = create_hash_string("MIN_ADDITIONAL_GAS_FOR_EXECUTION")
-OPEN_INTEREST_IN_TOKENS = create_hash_string("OPEN_INTEREST_IN_TOKENS")
-OPEN_INTEREST = create_hash_string("OPEN_INTEREST")
-OPEN_INTEREST_RESERVE_FACTOR = create_hash_string(
-    "OPEN_INTEREST_RESERVE_FACTOR"
-)
-POOL_AMOUNT = create_hash_string("POOL_AMOUNT")
-RESERVE_FACTOR = create_hash_string("RESERVE_FACTOR")
-SINGLE_SWAP_GAS_LIMIT = create_hash_string("SINGLE_SWAP_GAS_LIMIT")
-SWAP_ORDER_GAS_LIMIT = create_hash_string("SWAP_ORDER_GAS_LIMIT")
-VIRTUAL_TOKEN_ID = create_hash_string("VIRTUAL_TOKEN_ID")
+# Datastore key prefixes, hashed on first use rather than on import. Each is
+# also readable as a module attribute, eg keys.POOL_AMOUNT
+KEY_NAMES = [
+    "ACCOUNT_POSITION_LIST",
+    "CLAIMABLE_FEE_AMOUNT",
+    "DECREASE_ORDER_GAS_LIMIT",
+    "DEPOSIT_GAS_LIMIT",
+    "WITHDRAWAL_GAS_LIMIT",
+    "EXECUTION_GAS_FEE_BASE_AMOUNT",
+    "EXECUTION_GAS_FEE_MULTIPLIER_FACTOR",
+    "INCREASE_ORDER_GAS_LIMIT",
+    "MAX_OPEN_INTEREST",
+    "MAX_PNL_FACTOR_FOR_TRADERS",
+    "MAX_PNL_FACTOR_FOR_DEPOSITS",
+    "MAX_PNL_FACTOR_FOR_WITHDRAWALS",
+    "MIN_ADDITIONAL_GAS_FOR_EXECUTION",
+    "NONCE",
+    "OPEN_INTEREST_IN_TOKENS",
+    "OPEN_INTEREST",
+    "OPEN_INTEREST_RESERVE_FACTOR",
+    "POOL_AMOUNT",
+    "RESERVE_FACTOR",
+    "SINGLE_SWAP_GAS_LIMIT",
+    "SWAP_ORDER_GAS_LIMIT",
+    "VIRTUAL_TOKEN_ID"
+]
+
+
+@lru_cache(maxsize=None)
+def _key(name: str):
+    return create_hash_string(name)
+
+
+def __getattr__(name: str):
+    if name in KEY_NAMES:
+        return _key(name)
+
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+    )
 
 
 def accountPositionListKey(account):
     return create_hash(
         ["bytes32", "address"],
-        [ACCOUNT_POSITION_LIST, account]
+        [_key("ACCOUNT_POSITION_LIST"), account]
     )
 
 
 def claimable_fee_amount_key(market: str, token: str):
     return create_hash(
         ["bytes32", "address", "address"],
-        [CLAIMABLE_FEE_AMOUNT, market, token]
+        [_key("CLAIMABLE_FEE_AMOUNT"), market, token]
     )
 
 
 def decrease_order_gas_limit_key():
-    return DECREASE_ORDER_GAS_LIMIT
+    return _key("DECREASE_ORDER_GAS_LIMIT")
 
 
 def deposit_gas_limit_key():
-    return DEPOSIT_GAS_LIMIT
+    return _key("DEPOSIT_GAS_LIMIT")
 
 
 def execution_gas_fee_base_amount_key():
-    return EXECUTION_GAS_FEE_BASE_AMOUNT
+    return _key("EXECUTION_GAS_FEE_BASE_AMOUNT")
 
 
 def execution_gas_fee_multiplier_key():
-    return EXECUTION_GAS_FEE_MULTIPLIER_FACTOR
+    return _key("EXECUTION_GAS_FEE_MULTIPLIER_FACTOR")
 
 
 def increase_order_gas_limit_key():
-    return INCREASE_ORDER_GAS_LIMIT
+    return _key("INCREASE_ORDER_GAS_LIMIT")
 
 
 def min_additional_gas_for_execution_key():
-    return MIN_ADDITIONAL_GAS_FOR_EXECUTION
+    return _key("MIN_ADDITIONAL_GAS_FOR_EXECUTION")
 
 
 def max_open_interest_key(market: str,
@@ -70,10 +87,14 @@ def max_open_interest_key(market: str,
 
     return create_hash(
         ["bytes32", "address", "bool"],
-        [MAX_OPEN_INTEREST, market, is_long]
+        [_key("MAX_OPEN_INTEREST"), market, is_long]
     )
 
 
+def nonce_key():
+    return _key("NONCE")
+
+
 def open_interest_in_tokens_key(
     market: str,
     collateral_token: str,
@@ -81,7 +102,7 @@ def open_interest_in_tokens_key(
 ):
     return create_hash(
         ["bytes32", "address", "address", "bool"],
-        [OPEN_INTEREST_IN_TOKENS, market, collateral_token, is_long]
+        [_key("OPEN_INTEREST_IN_TOKENS"), market, collateral_token, is_long]
     )
 
 
@@ -92,7 +113,7 @@ def open_interest_key(
 ):
     return create_hash(
         ["bytes32", "address", "address", "bool"],
-        [OPEN_INTEREST, market, collateral_token, is_long]
+        [_key("OPEN_INTEREST"), market, collateral_token, is_long]
     )
 
 
@@ -102,7 +123,7 @@ def open_interest_reserve_factor_key(
 ):
     return create_hash(
         ["bytes32", "address", "bool"],
-        [OPEN_INTEREST_RESERVE_FACTOR, market, is_long]
+        [_key("OPEN_INTEREST_RESERVE_FACTOR"), market, is_long]
     )
 
 
@@ -112,7 +133,7 @@ def pool_amount_key(
 ):
     return create_hash(
         ["bytes32", "address", "address"],
-        [POOL_AMOUNT, market, token]
+        [_key("POOL_AMOUNT"), market, token]
     )
 
 
@@ -122,24 +143,24 @@ def reserve_factor_key(
 ):
     return create_hash(
         ["bytes32", "address", "bool"],
-        [RESERVE_FACTOR, market, is_long]
+        [_key("RESERVE_FACTOR"), market, is_long]
     )
 
 
 def single_swap_gas_limit_key():
-    return SINGLE_SWAP_GAS_LIMIT
+    return _key("SINGLE_SWAP_GAS_LIMIT")
 
 
 def swap_order_gas_limit_key():
-    return SWAP_ORDER_GAS_LIMIT
+    return _key("SWAP_ORDER_GAS_LIMIT")
 
 
 def virtualTokenIdKey(token: str):
-    return create_hash(["bytes32", "address"], [VIRTUAL_TOKEN_ID, token])
+    return create_hash(["bytes32", "address"], [_key("VIRTUAL_TOKEN_ID"), token])
 
 
 def withdraw_gas_limit_key():
-    return WITHDRAWAL_GAS_LIMIT
+    return _key("WITHDRAWAL_GAS_LIMIT")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,921 @@
+import bisect
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_account._utils.legacy_transactions import Transaction
+from eth_account._utils.typed_transactions import TypedTransaction
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.abi import (
+    collapse_if_tuple, get_abi_input_types, get_abi_output_types
+)
+
+from .gmx_utils import (
+    base_dir, contract_map, create_hash, order_type as order_types
+)
+from .keys import nonce_key, open_interest_key, open_interest_in_tokens_key
+
+# Datastore getters served from the state model, keyed by value type
+DATASTORE_GETTERS = {
+    'getUint': 'uint',
+    'getInt': 'int',
+    'getAddress': 'address',
+    'getBool': 'bool',
+    'getBytes32': 'bytes32',
+    'getString': 'string',
+}
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Journal marker for a key that did not exist before a write
+_MISSING = object()
+
+
+def _load_abi(abi_path: str) -> list:
+    return json.load(open(os.path.join(base_dir, 'gmx_python_sdk', abi_path)))
+
+
+def _function_abis(abi: list) -> dict:
+    return {
+        function_abi_to_4byte_selector(entry): entry
+        for entry in abi if entry['type'] == 'function'
+    }
+
+
+def _to_hex(value) -> str:
+    return Web3.to_hex(value)
+
+
+class LocalNodeError(Exception):
+    """
+    JSON-RPC error returned to the client, eg a revert
+    """
+
+    def __init__(self, code: int, message: str, data: str = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class LocalChainState:
+    """
+    In memory model of the GMX contracts the SDK reads and writes.
+
+    Datastore getters, ERC20 balances and allowances, native balances,
+    account nonces, the reader market list and Multicall3 are served from
+    state. Any other eth_call (eg reader pricing functions) is answered from
+    the recorded snapshot by exact calldata. Signed transactions to the
+    exchange router apply simple effects: tokens and value move, the
+    datastore nonce advances, market increase and decrease orders update open
+    interest immediately, and EventEmitter logs are emitted for eth_getLogs.
+    Token approvals update allowances and emit Approval logs. A transaction
+    that reverts part way is mined with status 0, its effects rolled back and
+    only its nonce consumed, and one sending more value than the sender
+    holds is rejected.
+    """
+
+    def __init__(
+        self, chain: str = 'arbitrum', chain_id: int = 42161,
+        block_number: int = 1, base_fee: int = 10**8
+    ):
+        self.chain = chain
+        self.chain_id = chain_id
+        self.block_number = block_number
+        self.base_fee = base_fee
+
+        self.datastore = {}
+        self.markets = []
+        self.eth_balances = {}
+        self.token_balances = {}
+        self.allowances = {}
+        self.total_supply = {}
+        self.nonces = {}
+        self.logs = []
+        self.receipts = {}
+        self.recorded_calls = {}
+        self.recorded_responses = {}
+
+        # Logs by block, and the blocks holding logs in ascending order
+        self._logs_by_block = {}
+        self._log_blocks = []
+        # (store, key, previous value) of every write by the transaction
+        # being applied, undone in reverse on revert
+        self._journal = None
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._addresses = {
+            name: contract_map[chain][name]['contract_address'].lower()
+            for name in [
+                'datastore', 'syntheticsreader', 'exchangerouter',
+                'syntheticsrouter', 'eventemitter', 'multicall3'
+            ]
+        }
+        self._datastore_functions = _function_abis(
+            _load_abi(contract_map[chain]['datastore']['abi_path'])
+        )
+        self._reader_functions = _function_abis(
+            _load_abi(contract_map[chain]['syntheticsreader']['abi_path'])
+        )
+        self._router_functions = _function_abis(
+            _load_abi(contract_map[chain]['exchangerouter']['abi_path'])
+        )
+        self._multicall_functions = _function_abis(
+            _load_abi(contract_map[chain]['multicall3']['abi_path'])
+        )
+        self._token_functions = _function_abis(
+            _load_abi('contracts/token_approval.json')
+        )
+        self._events = {
+            entry['name']: entry
+            for entry in _load_abi(contract_map[chain]['eventemitter']['abi_path'])
+            if entry['type'] == 'event'
+        }
+
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_cassette(cls, path: str, chain: str = 'arbitrum'):
+        """
+        Seed state from a Cassette recording. Every recorded eth_call is
+        decoded into the state model where possible and kept by calldata
+        otherwise, and other recorded methods are kept as static responses.
+
+        Parameters
+        ----------
+        path : str
+            cassette file.
+        chain : str, optional
+            chain the cassette was recorded on. The default is 'arbitrum'.
+
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            recorded = json.load(f)['rpc']
+
+        state = cls(chain=chain)
+        for key, responses in recorded.items():
+            method, params = key.split(" ", 1)
+            params = json.loads(params)
+            response = responses[-1]
+
+            if 'result' not in response:
+                continue
+
+            if method == 'eth_call':
+                state.seed_call(
+                    params[0]['to'],
+                    params[0].get('data', params[0].get('input')),
+                    response['result']
+                )
+            elif method == 'eth_chainId':
+                state.chain_id = int(response['result'], 16)
+            elif method == 'eth_blockNumber':
+                state.block_number = max(
+                    state.block_number,
+                    int(response['result'], 16)
+                )
+            else:
+                state.recorded_responses[key] = response['result']
+
+        return state
+
+    def seed_call(self, to: str, data: str, result: str):
+        """
+        Record the result of an eth_call into state
+
+        Parameters
+        ----------
+        to : str
+            contract address.
+        data : str
+            calldata as hex.
+        result : str
+            return data as hex.
+
+        """
+        to = to.lower()
+        data = HexBytes(data)
+        result = HexBytes(result)
+        selector = bytes(data[:4])
+
+        with self._lock:
+            self.recorded_calls[(to, _to_hex(data))] = result
+
+            if to == self._addresses['multicall3'] and \
+                    self._multicall_functions.get(selector, {}).get('name') == 'aggregate3':
+                (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+                (results,) = decode(["(bool,bytes)[]"], result)
+                for call, (success, return_data) in zip(calls, results):
+                    if success:
+                        self.seed_call(call[0], call[2], return_data)
+
+            elif to == self._addresses['datastore'] and selector in self._datastore_functions:
+                function_abi = self._datastore_functions[selector]
+                value_type = DATASTORE_GETTERS.get(function_abi['name'])
+                if value_type is not None:
+                    (key,) = decode(["bytes32"], data[4:])
+                    (value,) = decode(get_abi_output_types(function_abi), result)
+                    self.datastore[(value_type, key)] = value
+
+            elif to == self._addresses['syntheticsreader'] and \
+                    self._reader_functions.get(selector, {}).get('name') == 'getMarkets':
+                function_abi = self._reader_functions[selector]
+                _, start, _ = decode(get_abi_input_types(function_abi), data[4:])
+                (markets,) = decode(get_abi_output_types(function_abi), result)
+                for i, market in enumerate(markets):
+                    if start + i < len(self.markets):
+                        self.markets[start + i] = market
+                    elif start + i == len(self.markets):
+                        self.markets.append(market)
+
+            elif selector in self._token_functions:
+                function_abi = self._token_functions[selector]
+                if function_abi['name'] in ['balanceOf', 'allowance', 'totalSupply']:
+                    args = decode(get_abi_input_types(function_abi), data[4:])
+                    (value,) = decode(["uint256"], result)
+                    self._set_token_value(to, function_abi['name'], args, value)
+
+    def handle(self, method: str, params: list):
+        """
+        Answer a single JSON-RPC request
+
+        Raises
+        ------
+        LocalNodeError
+            unsupported method, unknown call or revert.
+
+        """
+        if method == 'eth_chainId':
+            return hex(self.chain_id)
+        if method == 'net_version':
+            return str(self.chain_id)
+        if method == 'eth_blockNumber':
+            return hex(self.block_number)
+        if method == 'eth_gasPrice':
+            return hex(self.base_fee)
+        if method == 'eth_maxPriorityFeePerGas':
+            return hex(0)
+        if method == 'eth_estimateGas':
+            return hex(2000000)
+        if method == 'eth_getBalance':
+            return hex(self.eth_balances.get(params[0].lower(), 0))
+        if method == 'eth_getTransactionCount':
+            return hex(self.nonces.get(params[0].lower(), 0))
+        if method == 'eth_getBlockByNumber':
+            return self._get_block()
+        if method == 'eth_feeHistory':
+            return self._fee_history(params)
+        if method == 'eth_call':
+            return _to_hex(self.call(params[0]))
+        if method == 'eth_sendRawTransaction':
+            return self.send_raw_transaction(params[0])
+        if method == 'eth_getTransactionReceipt':
+            return self.receipts.get(params[0])
+        if method == 'eth_getLogs':
+            return self.get_logs(params[0])
+
+        key = "{} {}".format(
+            method,
+            json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        )
+        if key in self.recorded_responses:
+            return self.recorded_responses[key]
+
+        raise LocalNodeError(-32601, "Method not supported: {}".format(method))
+
+    def call(self, transaction: dict) -> bytes:
+        """
+        Execute an eth_call against state
+
+        Parameters
+        ----------
+        transaction : dict
+            call object with to and data (or input).
+
+        Returns
+        -------
+        bytes
+            return data.
+
+        """
+        to = transaction['to'].lower()
+        data = HexBytes(transaction.get('data', transaction.get('input', '0x')))
+        selector = bytes(data[:4])
+
+        with self._lock:
+            if to == self._addresses['multicall3'] and selector in self._multicall_functions:
+                return self._multicall(selector, data)
+
+            if to == self._addresses['datastore'] and selector in self._datastore_functions:
+                function_abi = self._datastore_functions[selector]
+                value_type = DATASTORE_GETTERS.get(function_abi['name'])
+                if value_type is not None:
+                    (key,) = decode(["bytes32"], data[4:])
+                    value = self.datastore.get(
+                        (value_type, key),
+                        self._default_value(value_type)
+                    )
+                    return encode(get_abi_output_types(function_abi), [value])
+
+            if to == self._addresses['syntheticsreader'] and \
+                    self._reader_functions.get(selector, {}).get('name') == 'getMarkets' and \
+                    len(self.markets) > 0:
+                function_abi = self._reader_functions[selector]
+                _, start, end = decode(get_abi_input_types(function_abi), data[4:])
+                return encode(
+                    get_abi_output_types(function_abi),
+                    [self.markets[start:end]]
+                )
+
+            if selector in self._token_functions:
+                function_abi = self._token_functions[selector]
+                if function_abi['name'] in ['balanceOf', 'allowance', 'totalSupply']:
+                    args = decode(get_abi_input_types(function_abi), data[4:])
+                    value = self._get_token_value(to, function_abi['name'], args)
+                    if value is not None:
+                        return encode(["uint256"], [value])
+
+            recorded = self.recorded_calls.get((to, _to_hex(data)))
+
+        if recorded is None:
+            raise LocalNodeError(
+                3,
+                "execution reverted: call not in snapshot",
+                "0x"
+            )
+
+        return bytes(recorded)
+
+    def send_raw_transaction(self, raw_transaction: str) -> str:
+        """
+        Decode a signed transaction and apply its effects to state
+
+        Parameters
+        ----------
+        raw_transaction : str
+            signed transaction as hex.
+
+        Returns
+        -------
+        str
+            transaction hash.
+
+        """
+        raw_transaction = HexBytes(raw_transaction)
+        sender = Account.recover_transaction(raw_transaction).lower()
+
+        if raw_transaction[0] < 0x80:
+            transaction = TypedTransaction.from_bytes(raw_transaction).as_dict()
+        else:
+            transaction = rlp.decode(raw_transaction, Transaction).as_dict()
+
+        tx_hash = _to_hex(Web3.keccak(raw_transaction))
+        to = _to_hex(transaction['to']).lower()
+        data = HexBytes(transaction['data'])
+
+        with self._lock:
+            if transaction['nonce'] != self.nonces.get(sender, 0):
+                raise LocalNodeError(
+                    -32000,
+                    "nonce too {}".format(
+                        "low" if transaction['nonce'] < self.nonces.get(sender, 0)
+                        else "high"
+                    )
+                )
+
+            value = transaction['value']
+            if self.eth_balances.get(sender, 0) < value:
+                raise LocalNodeError(
+                    -32000,
+                    "insufficient funds for gas * price + value"
+                )
+
+            block_number = self.block_number
+            self._journal = []
+            try:
+                self.block_number += 1
+                self._write(self.nonces, sender, transaction['nonce'] + 1)
+
+                # A revert is mined with status 0, consuming only the nonce
+                status = '0x1'
+                try:
+                    logs = self._apply_transaction(sender, to, data, value)
+                except LocalNodeError as e:
+                    self._rollback(1)
+                    self.log.info("Transaction {} reverted: {}".format(tx_hash, e.message))
+                    logs = []
+                    status = '0x0'
+
+                for i, log in enumerate(logs):
+                    log['logIndex'] = hex(len(self.logs) + i)
+                    log['blockNumber'] = hex(self.block_number)
+                    log['transactionHash'] = tx_hash
+
+                receipt = {
+                    'transactionHash': tx_hash,
+                    'transactionIndex': '0x0',
+                    'blockNumber': hex(self.block_number),
+                    'blockHash': _to_hex(Web3.keccak(self.block_number)),
+                    'from': sender,
+                    'to': to,
+                    'cumulativeGasUsed': hex(transaction['gas']),
+                    'gasUsed': hex(transaction['gas']),
+                    'effectiveGasPrice': hex(self.base_fee),
+                    'contractAddress': None,
+                    'logs': logs,
+                    'logsBloom': _to_hex(bytes(256)),
+                    'status': status,
+                    'type': '0x2'
+                }
+            except Exception:
+                # Any other failure is a fault in the model, so the
+                # transaction is dropped as if never sent
+                self._rollback(0)
+                self.block_number = block_number
+                raise
+            finally:
+                self._journal = None
+
+            self._add_logs(logs)
+            self.receipts[tx_hash] = receipt
+
+        return tx_hash
+
+    def get_logs(self, log_filter: dict) -> list:
+        """
+        Filter emitted logs by block range, address and topics
+        """
+        from_block = self._block_number(log_filter.get('fromBlock', 'earliest'))
+        to_block = self._block_number(log_filter.get('toBlock', 'latest'))
+
+        addresses = log_filter.get('address')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses is not None:
+            addresses = [address.lower() for address in addresses]
+
+        topics = log_filter.get('topics', [])
+
+        matches = []
+        with self._lock:
+            blocks = self._log_blocks[
+                bisect.bisect_left(self._log_blocks, from_block):
+                bisect.bisect_right(self._log_blocks, to_block)
+            ]
+            for block_number in blocks:
+                for log in self._logs_by_block[block_number]:
+                    if addresses is not None and log['address'] not in addresses:
+                        continue
+                    if not self._match_topics(log['topics'], topics):
+                        continue
+                    matches.append(log)
+
+        return matches
+
+    def _apply_transaction(self, sender: str, to: str, data: bytes, value: int) -> list:
+        """
+        Apply the effects of a transaction, raising LocalNodeError on revert
+        """
+        self._write(self.eth_balances, sender, self.eth_balances.get(sender, 0) - value)
+
+        logs = []
+        selector = bytes(data[:4])
+        if to == self._addresses['exchangerouter'] and \
+                self._router_functions.get(selector, {}).get('name') == 'multicall':
+            (calls,) = decode(["bytes[]"], data[4:])
+            for call in calls:
+                logs.extend(self._apply_router_call(sender, HexBytes(call)))
+
+        elif self._token_functions.get(selector, {}).get('name') == 'approve':
+            spender, amount = decode(["address", "uint256"], data[4:])
+            self._set_token_value(to, 'allowance', (sender, spender), amount)
+            logs.append(
+                self._make_log(
+                    to,
+                    [
+                        Web3.keccak(text="Approval(address,address,uint256)"),
+                        self._address_topic(sender),
+                        self._address_topic(spender)
+                    ],
+                    encode(["uint256"], [amount])
+                )
+            )
+
+        return logs
+
+    def _write(self, store: dict, key, value):
+        """
+        Set store[key], journalling the previous value while a transaction
+        is being applied
+        """
+        if self._journal is not None:
+            self._journal.append((store, key, store.get(key, _MISSING)))
+        store[key] = value
+
+    def _rollback(self, mark: int):
+        """
+        Undo the journalled writes made after the first mark
+        """
+        while len(self._journal) > mark:
+            store, key, previous = self._journal.pop()
+            if previous is _MISSING:
+                store.pop(key, None)
+            else:
+                store[key] = previous
+
+    def _add_logs(self, logs: list):
+        for log in logs:
+            block_number = int(log['blockNumber'], 16)
+            if block_number not in self._logs_by_block:
+                self._logs_by_block[block_number] = []
+                bisect.insort(self._log_blocks, block_number)
+            self._logs_by_block[block_number].append(log)
+
+        self.logs.extend(logs)
+
+    def _apply_router_call(self, sender: str, call: bytes) -> list:
+        """
+        Apply one call of an exchange router multicall
+        """
+        selector = bytes(call[:4])
+        function_abi = self._router_functions.get(selector)
+        if function_abi is None:
+            raise LocalNodeError(3, "execution reverted: unknown router call")
+
+        args = decode(get_abi_input_types(function_abi), call[4:])
+        name = function_abi['name']
+        logs = []
+
+        if name == 'sendTokens':
+            token, receiver, amount = args
+            token = token.lower()
+            balance_key = (token, 'balanceOf', (sender,))
+            allowance_key = (token, 'allowance', (sender, self._addresses['syntheticsrouter']))
+            if self.token_balances.get(balance_key, 0) < amount:
+                raise LocalNodeError(3, "execution reverted: insufficient balance")
+            if self.allowances.get(allowance_key, 0) < amount:
+                raise LocalNodeError(3, "execution reverted: insufficient allowance")
+
+            self._write(self.token_balances, balance_key, self.token_balances[balance_key] - amount)
+            self._write(self.allowances, allowance_key, self.allowances[allowance_key] - amount)
+            logs.append(
+                self._make_log(
+                    token,
+                    [
+                        Web3.keccak(text="Transfer(address,address,uint256)"),
+                        self._address_topic(sender),
+                        self._address_topic(receiver)
+                    ],
+                    encode(["uint256"], [amount])
+                )
+            )
+
+        elif name in ['createOrder', 'createDeposit', 'createWithdrawal']:
+            key = self._next_key()
+            params = args[0]
+            event_name = {
+                'createOrder': 'OrderCreated',
+                'createDeposit': 'DepositCreated',
+                'createWithdrawal': 'WithdrawalCreated'
+            }[name]
+
+            address_items = {'account': sender}
+            uint_items = {}
+            bool_items = {}
+            if name == 'createOrder':
+                addresses, numbers, order_type, _, is_long = params[:5]
+                address_items['market'] = addresses[3]
+                address_items['initialCollateralToken'] = addresses[4]
+                uint_items['sizeDeltaUsd'] = numbers[0]
+                uint_items['initialCollateralDeltaAmount'] = numbers[1]
+                uint_items['acceptablePrice'] = numbers[3]
+                uint_items['executionFee'] = numbers[4]
+                uint_items['orderType'] = order_type
+                bool_items['isLong'] = is_long
+
+            logs.append(
+                self._make_event_log(
+                    event_name,
+                    [key, self._address_topic(sender)],
+                    address_items,
+                    uint_items,
+                    bool_items,
+                    {'key': key}
+                )
+            )
+
+            if name == 'createOrder' and order_type in [
+                order_types['market_increase'],
+                order_types['market_decrease']
+            ]:
+                self._apply_position_change(
+                    addresses[3],
+                    addresses[4],
+                    is_long,
+                    numbers[0],
+                    numbers[3],
+                    order_type == order_types['market_increase']
+                )
+                logs.append(
+                    self._make_event_log(
+                        'OrderExecuted',
+                        [key],
+                        {'account': sender},
+                        {},
+                        {},
+                        {'key': key}
+                    )
+                )
+
+        return logs
+
+    def _apply_position_change(
+        self, market: str, collateral_token: str, is_long: bool,
+        size_delta_usd: int, acceptable_price: int, is_increase: bool
+    ):
+        """
+        Move open interest as if the order executed at its acceptable price
+        """
+        size_delta_tokens = size_delta_usd // acceptable_price if acceptable_price > 0 else 0
+        sign = 1 if is_increase else -1
+
+        for key, delta in [
+            (open_interest_key(market, collateral_token, is_long), size_delta_usd),
+            (open_interest_in_tokens_key(market, collateral_token, is_long), size_delta_tokens)
+        ]:
+            state_key = ('uint', bytes(key))
+            self._write(
+                self.datastore,
+                state_key,
+                max(self.datastore.get(state_key, 0) + sign * delta, 0)
+            )
+
+    def _next_key(self) -> bytes:
+        state_key = ('uint', bytes(nonce_key()))
+        nonce = self.datastore.get(state_key, 0) + 1
+        self._write(self.datastore, state_key, nonce)
+
+        return bytes(
+            create_hash(
+                ["address", "uint256"],
+                [Web3.to_checksum_address(self._addresses['datastore']), nonce]
+            )
+        )
+
+    def _multicall(self, selector: bytes, data: bytes) -> bytes:
+        name = self._multicall_functions[selector]['name']
+
+        if name == 'getBlockNumber':
+            return encode(["uint256"], [self.block_number])
+        if name == 'getCurrentBlockTimestamp':
+            return encode(["uint256"], [int(time.time())])
+        if name == 'getEthBalance':
+            (address,) = decode(["address"], data[4:])
+            return encode(["uint256"], [self.eth_balances.get(address.lower(), 0)])
+
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        results = []
+        for target, allow_failure, call_data in calls:
+            try:
+                results.append(
+                    (True, self.call({'to': target, 'data': call_data}))
+                )
+            except LocalNodeError:
+                if not allow_failure:
+                    raise
+                results.append((False, b""))
+
+        return encode(["(bool,bytes)[]"], [results])
+
+    def _set_token_value(self, token: str, name: str, args: tuple, value: int):
+        args = tuple(arg.lower() for arg in args)
+        if name == 'allowance':
+            self._write(self.allowances, (token, name, args), value)
+        elif name == 'totalSupply':
+            self._write(self.total_supply, token, value)
+        else:
+            self._write(self.token_balances, (token, name, args), value)
+
+    def _get_token_value(self, token: str, name: str, args: tuple):
+        args = tuple(arg.lower() for arg in args)
+        if name == 'allowance':
+            return self.allowances.get((token, name, args))
+        if name == 'totalSupply':
+            return self.total_supply.get(token)
+
+        return self.token_balances.get((token, name, args))
+
+    def _make_event_log(
+        self, event_name: str, topics: list, address_items: dict,
+        uint_items: dict, bool_items: dict, bytes32_items: dict
+    ) -> dict:
+        """
+        EventEmitter EventLog1/EventLog2 log in the layout GMX emits
+        """
+        event_abi = self._events['EventLog{}'.format(len(topics))]
+
+        def _items(values: dict):
+            return ([(k, v) for k, v in values.items()], [])
+
+        event_data = (
+            _items(address_items),
+            _items(uint_items),
+            _items({}),
+            _items(bool_items),
+            _items(bytes32_items),
+            _items({}),
+            _items({})
+        )
+        data_types = [
+            collapse_if_tuple(i) for i in event_abi['inputs'] if not i['indexed']
+        ]
+
+        return self._make_log(
+            self._addresses['eventemitter'],
+            [
+                event_abi_to_log_topic(event_abi),
+                Web3.keccak(text=event_name)
+            ] + topics,
+            encode(
+                data_types,
+                [self._addresses['exchangerouter'], event_name, event_data]
+            )
+        )
+
+    def _make_log(self, address: str, topics: list, data: bytes) -> dict:
+        return {
+            'address': address.lower(),
+            'topics': [_to_hex(topic) for topic in topics],
+            'data': _to_hex(data),
+            'blockNumber': hex(self.block_number),
+            'blockHash': _to_hex(Web3.keccak(self.block_number)),
+            'transactionIndex': '0x0',
+            'logIndex': '0x0',
+            'removed': False
+        }
+
+    def _get_block(self) -> dict:
+        return {
+            'number': hex(self.block_number),
+            'hash': _to_hex(Web3.keccak(self.block_number)),
+            'parentHash': _to_hex(Web3.keccak(self.block_number - 1)),
+            'timestamp': hex(int(time.time())),
+            'baseFeePerGas': hex(self.base_fee),
+            'gasLimit': hex(30000000),
+            'gasUsed': hex(0),
+            'transactions': []
+        }
+
+    def _fee_history(self, params: list) -> dict:
+        block_count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+        percentiles = params[2] if len(params) > 2 else []
+
+        return {
+            'oldestBlock': hex(max(self.block_number - block_count + 1, 0)),
+            'baseFeePerGas': [hex(self.base_fee)] * (block_count + 1),
+            'gasUsedRatio': [0.5] * block_count,
+            'reward': [[hex(0)] * len(percentiles)] * block_count
+        }
+
+    def _block_number(self, block) -> int:
+        if block in ['latest', 'pending', 'safe', 'finalized']:
+            return self.block_number
+        if block == 'earliest':
+            return 0
+
+        return int(block, 16) if isinstance(block, str) else block
+
+    @staticmethod
+    def _match_topics(log_topics: list, filter_topics: list) -> bool:
+        for i, topic in enumerate(filter_topics):
+            if topic is None:
+                continue
+            if i >= len(log_topics):
+                return False
+            options = topic if isinstance(topic, list) else [topic]
+            if log_topics[i].lower() not in [o.lower() for o in options]:
+                return False
+
+        return True
+
+    @staticmethod
+    def _address_topic(address: str) -> bytes:
+        return bytes(12) + bytes.fromhex(address[2:])
+
+    @staticmethod
+    def _default_value(value_type: str):
+        return {
+            'uint': 0,
+            'int': 0,
+            'address': ZERO_ADDRESS,
+            'bool': False,
+            'bytes32': bytes(32),
+            'string': ""
+        }[value_type]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    # keep connections alive, web3 reuses a requests session
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(
+            self.rfile.read(int(self.headers['Content-Length']))
+        )
+
+        if isinstance(body, list):
+            response = [self._handle(request) for request in body]
+        else:
+            response = self._handle(body)
+
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, request: dict) -> dict:
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        try:
+            response['result'] = self.server.state.handle(
+                request['method'],
+                request.get('params', [])
+            )
+        except LocalNodeError as e:
+            response['error'] = {'code': e.code, 'message': e.message}
+            if e.data is not None:
+                response['error']['data'] = e.data
+        except Exception as e:
+            # eg a malformed transaction, answered rather than dropping the
+            # connection
+            response['error'] = {'code': -32603, 'message': str(e)}
+
+        return response
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalNode:
+    """
+    JSON-RPC server over a LocalChainState, point config.rpc at url
+
+    Parameters
+    ----------
+    state : LocalChainState
+        state to serve.
+    host : str, optional
+        interface to bind. The default is "127.0.0.1".
+    port : int, optional
+        port to bind, 0 for any free port. The default is 0.
+    """
+
+    def __init__(self, state: LocalChainState, host: str = "127.0.0.1", port: int = 0):
+        self.state = state
+
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.state = state
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="LocalNode",
+            daemon=True
+        )
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,118 @@
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+from .gmx_utils import get_contract_object
+
+# Keep each aggregate3 call well below the node eth_call gas cap
+MAX_CALLS_PER_BATCH = 500
+
+
+def get_multicall_contract(web3_obj, chain: str):
+    """
+    Get a Multicall3 contract web3_obj for a given chain
+
+    Parameters
+    ----------
+    web3_obj : web3_obj
+        web3 connection.
+    chain : str
+        avalanche or arbitrum.
+
+    """
+
+    return get_contract_object(
+        web3_obj,
+        'multicall3',
+        chain,
+        trimmed=True
+    )
+
+
+def decode_function_output(function_call, return_data: bytes):
+    """
+    Decode the raw bytes returned for an uncalled web3 contract function in
+    the same way web3 would have done if .call() had been used
+
+    Parameters
+    ----------
+    function_call : web3 contract function
+        the uncalled web3 object the return data belongs to.
+    return_data : bytes
+        raw return data.
+
+    Returns
+    -------
+    output
+        decoded output, single values are unwrapped from their tuple.
+
+    """
+    output_types = get_abi_output_types(function_call.abi)
+    output_data = function_call.w3.codec.decode(output_types, return_data)
+    normalized_data = map_abi_data(
+        BASE_RETURN_NORMALIZERS,
+        output_types,
+        output_data
+    )
+
+    if len(normalized_data) == 1:
+        return normalized_data[0]
+
+    return normalized_data
+
+
+def multicall(
+    chain: str, function_calls: list, allow_failure: bool = False,
+    block_identifier="latest"
+):
+    """
+    Execute a list of uncalled web3 contract functions using Multicall3 so
+    they resolve in as few eth_call requests as possible, all against the
+    same block
+
+    Parameters
+    ----------
+    chain : str
+        avalanche or arbitrum.
+    function_calls : list
+        list of uncalled web3 contract functions.
+    allow_failure : bool, optional
+        if True failed calls return None rather than reverting the batch.
+        The default is False.
+    block_identifier : str or int, optional
+        block to execute the calls against. The default is "latest".
+
+    Returns
+    -------
+    results : list
+        decoded outputs in the same order as function_calls.
+
+    """
+    if len(function_calls) == 0:
+        return []
+
+    multicall_contract_obj = get_multicall_contract(
+        function_calls[0].w3,
+        chain
+    )
+
+    results = []
+    for i in range(0, len(function_calls), MAX_CALLS_PER_BATCH):
+        batch = function_calls[i:i + MAX_CALLS_PER_BATCH]
+        raw_outputs = multicall_contract_obj.functions.aggregate3(
+            [
+                (
+                    function_call.address,
+                    allow_failure,
+                    function_call._encode_transaction_data()
+                )
+                for function_call in batch
+            ]
+        ).call(block_identifier=block_identifier)
+
+        for function_call, (success, return_data) in zip(batch, raw_outputs):
+            if not success:
+                results.append(None)
+                continue
+            results.append(decode_function_output(function_call, return_data))
+
+    return results
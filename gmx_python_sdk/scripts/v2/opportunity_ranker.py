@@ -0,0 +1,393 @@
+import logging
+
+METRICS = ['funding', 'borrow', 'liquidity', 'open_interest']
+SIDES = ['long', 'short']
+
+
+class _IndexedMaxHeap:
+    """
+    Binary max heap of (score, key) with a position index, so the score of
+    any key can be changed or removed in O(log n)
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def set(self, key, score: float):
+        position = self.positions.get(key)
+        if position is None:
+            self.entries.append((score, key))
+            self.positions[key] = len(self.entries) - 1
+            self._sift_up(len(self.entries) - 1)
+            return
+
+        old_score = self.entries[position][0]
+        self.entries[position] = (score, key)
+        if score > old_score:
+            self._sift_up(position)
+        elif score < old_score:
+            self._sift_down(position)
+
+    def remove(self, key):
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+
+        last = self.entries.pop()
+        if position == len(self.entries):
+            return
+
+        self.entries[position] = last
+        self.positions[last[1]] = position
+        self._sift_up(position)
+        self._sift_down(self.positions[last[1]])
+
+    def top(self, k: int) -> list:
+        """
+        The k highest (score, key) entries, best first, in O(k log k) by
+        walking the heap from the root
+        """
+        entries = self.entries
+        result = []
+        frontier = _IndexedMaxHeap()
+        if entries:
+            frontier.set(0, entries[0][0])
+
+        while frontier.entries and len(result) < k:
+            score, position = frontier.entries[0]
+            frontier.remove(position)
+            result.append(entries[position])
+
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(entries):
+                    frontier.set(child, entries[child][0])
+
+        return result
+
+    def _swap(self, i: int, j: int):
+        entries = self.entries
+        entries[i], entries[j] = entries[j], entries[i]
+        self.positions[entries[i][1]] = i
+        self.positions[entries[j][1]] = j
+
+    def _sift_up(self, position: int):
+        entries = self.entries
+        while position > 0:
+            parent = (position - 1) // 2
+            if entries[parent][0] >= entries[position][0]:
+                return
+            self._swap(parent, position)
+            position = parent
+
+    def _sift_down(self, position: int):
+        entries = self.entries
+        size = len(entries)
+        while True:
+            largest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and entries[child][0] > entries[largest][0]:
+                    largest = child
+            if largest == position:
+                return
+            self._swap(position, largest)
+            position = largest
+
+
+class OpportunityRanker:
+    """
+    Rank funding farming opportunities, one side of one market each, by net
+    rate (funding - borrow, % per hour) and keep the best k of those passing
+    the liquidity and open interest imbalance filters.
+
+    Farms are held in an indexed heap, so a change to one market costs
+    O(log n) and the top k is read in O(k log k) without sorting the
+    universe. Feed it whole MetricGraph outputs, of which only the changed
+    values are applied, or single values as they arrive:
+
+        ranker = OpportunityRanker(k=5, position_size_usd=10000)
+        ranker.update_metrics(graph.get(*METRICS))
+        ranker.update("ETH", "short", funding=0.0012)
+        ranker.top()
+
+    Parameters
+    ----------
+    k : int, optional
+        opportunities returned by top and watched by on_change. The default
+        is 10.
+    min_net_rate : float, optional
+        lowest net rate, % per hour, to rank. The default is 0.
+    position_size_usd : float, optional
+        available liquidity and, unless ignore_oi_imbalance, open interest
+        imbalance toward the other side must cover it. The default is None,
+        no liquidity or imbalance filter.
+    ignore_oi_imbalance : bool, optional
+        skip the open interest imbalance filter. The default is False.
+    on_change : callable, optional
+        function called with top() after an update changes it. The default
+        is None.
+    """
+
+    def __init__(
+        self, k: int = 10, min_net_rate: float = 0,
+        position_size_usd: float = None, ignore_oi_imbalance: bool = False,
+        on_change=None
+    ):
+        self.k = k
+        self.min_net_rate = min_net_rate
+        self.position_size_usd = position_size_usd
+        self.ignore_oi_imbalance = ignore_oi_imbalance
+        self.on_change = on_change
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        # Latest metric values per (market, side)
+        self.farms = {}
+        self._heap = _IndexedMaxHeap()
+        self._top = []
+
+    def __len__(self):
+        """
+        Number of farms passing the filters
+        """
+        return len(self._heap)
+
+    def update(
+        self, market: str, side: str, funding: float = None,
+        borrow: float = None, liquidity: float = None,
+        open_interest: float = None
+    ) -> bool:
+        """
+        Set the metrics of one farm that changed, leaving the others as
+        they were
+
+        Parameters
+        ----------
+        market : str
+            market symbol, eg ETH.
+        side : str
+            long or short.
+        funding, borrow : float, optional
+            funding and borrow rate, % per hour.
+        liquidity : float, optional
+            available liquidity, USD.
+        open_interest : float, optional
+            open interest of this side, USD.
+
+        Returns
+        -------
+        bool
+            True if the top k changed.
+
+        """
+        changed = self._set(
+            market,
+            side,
+            {
+                'funding': funding,
+                'borrow': borrow,
+                'liquidity': liquidity,
+                'open_interest': open_interest
+            }
+        )
+        if changed:
+            return self._rerank(changed)
+
+        return False
+
+    def update_metrics(self, data: dict) -> bool:
+        """
+        Apply MetricGraph output holding any of METRICS, each keyed by side
+        then market, re-scoring only the farms whose values changed
+
+        Returns
+        -------
+        bool
+            True if the top k changed.
+
+        """
+        values = {}
+        for metric in METRICS:
+            for side in SIDES:
+                for market, value in data.get(metric, {}).get(side, {}).items():
+                    values.setdefault((market, side), {})[metric] = value
+
+        changed = set()
+        for (market, side), farm_values in values.items():
+            changed.update(self._set(market, side, farm_values))
+
+        if changed:
+            return self._rerank(changed)
+
+        return False
+
+    def remove(self, market: str, side: str = None):
+        """
+        Drop a farm, or both sides of a market, eg once it is delisted
+        """
+        for side in [side] if side is not None else SIDES:
+            self.farms.pop((market, side), None)
+            self._heap.remove((market, side))
+
+        self._rerank(set())
+
+    def top(self, k: int = None) -> list:
+        """
+        Best opportunities by net rate
+
+        Parameters
+        ----------
+        k : int, optional
+            number to return. The default is None, the k of the ranker.
+
+        Returns
+        -------
+        list
+            dictionaries of rank, market, side, net_rate_per_hour,
+            available_liquidity and open_interest_imbalance, best first.
+
+        """
+        k = self.k if k is None else k
+        if k == self.k:
+            return [dict(opportunity) for opportunity in self._top]
+
+        return self._build_top(k)
+
+    def get(self, market: str, side: str) -> dict:
+        """
+        Opportunity of one farm without rank, or None if it is filtered out
+        """
+        if (market, side) not in self._heap:
+            return None
+
+        return self._describe((market, side))
+
+    def to_dict(self) -> dict:
+        """
+        Every opportunity passing the filters keyed by side then market,
+        as returned by the farming example script
+        """
+        opportunities = {side: {} for side in SIDES}
+        for opportunity in self._build_top(len(self._heap)):
+            opportunities[opportunity['side']][opportunity['market']] = {
+                'net_rate_per_hour': opportunity['net_rate_per_hour'],
+                'available_liquidity': opportunity['available_liquidity'],
+                'open_interest_imbalance': opportunity['open_interest_imbalance']
+            }
+
+        return opportunities
+
+    def _set(self, market: str, side: str, values: dict) -> set:
+        """
+        Store the given values, returning the farms whose score may have
+        moved. Open interest also moves the imbalance of the other side.
+        """
+        farm = self.farms.setdefault((market, side), {})
+        changed = set()
+        for metric, value in values.items():
+            if value is None or farm.get(metric) == value:
+                continue
+
+            farm[metric] = value
+            changed.add((market, side))
+            if metric == 'open_interest':
+                changed.add((market, self._opposite(side)))
+
+        return changed
+
+    def _rerank(self, changed: set) -> bool:
+        top_keys = set((opportunity['market'], opportunity['side']) for opportunity in self._top)
+        cutoff = self._top[-1]['net_rate_per_hour'] if len(self._top) >= self.k else None
+        affects_top = len(changed) == 0
+
+        for key in changed:
+            net_rate = self._score(key)
+            if net_rate is None:
+                self._heap.remove(key)
+            else:
+                self._heap.set(key, net_rate)
+
+            if key in top_keys or (
+                net_rate is not None and (cutoff is None or net_rate >= cutoff)
+            ):
+                affects_top = True
+
+        # Farms outside the top k that stay below it cannot change it
+        if not affects_top:
+            return False
+
+        top = self._build_top(self.k)
+        if top == self._top:
+            return False
+
+        self._top = top
+        if self.on_change is not None:
+            try:
+                self.on_change(self.top())
+            except Exception as e:
+                self.log.warning("Opportunity subscriber failed: {}".format(e))
+
+        return True
+
+    def _score(self, key: tuple) -> float:
+        """
+        Net rate of a farm, or None if it is filtered out or incomplete
+        """
+        farm = self.farms.get(key)
+        if farm is None or 'funding' not in farm or 'borrow' not in farm:
+            return None
+
+        net_rate = farm['funding'] - farm['borrow']
+        if net_rate < self.min_net_rate:
+            return None
+
+        size = self.position_size_usd
+        if size is None:
+            return net_rate
+
+        if farm.get('liquidity') is None or farm['liquidity'] < size:
+            return None
+
+        if not self.ignore_oi_imbalance:
+            imbalance = self._imbalance(key)
+            if imbalance is None or imbalance < size:
+                return None
+
+        return net_rate
+
+    def _imbalance(self, key: tuple) -> float:
+        market, side = key
+        opposite = self.farms.get((market, self._opposite(side)), {})
+        if 'open_interest' not in opposite or 'open_interest' not in self.farms[key]:
+            return None
+
+        return opposite['open_interest'] - self.farms[key]['open_interest']
+
+    def _describe(self, key: tuple) -> dict:
+        farm = self.farms[key]
+        return {
+            'market': key[0],
+            'side': key[1],
+            'net_rate_per_hour': farm['funding'] - farm['borrow'],
+            'available_liquidity': farm.get('liquidity'),
+            'open_interest_imbalance': self._imbalance(key)
+        }
+
+    def _build_top(self, k: int) -> list:
+        top = []
+        for rank, (net_rate, key) in enumerate(self._heap.top(k), 1):
+            opportunity = {'rank': rank}
+            opportunity.update(self._describe(key))
+            top.append(opportunity)
+
+        return top
+
+    @staticmethod
+    def _opposite(side: str) -> str:
+        return "short" if side == "long" else "long"
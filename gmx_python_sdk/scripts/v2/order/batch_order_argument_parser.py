@@ -0,0 +1,181 @@
+import logging
+
+from .order_argument_parser import OrderArgumentParser
+from ..get.oracle_price_table import OraclePriceTable
+from ..token_resolver import get_token_resolver
+
+# Parsed order keys passed to OrderClient.increase and decrease, and the
+# argument names they are passed as
+POSITION_CLIENT_ARGUMENTS = {
+    'market_key': 'market_key',
+    'collateral_address': 'collateral_address',
+    'index_token_address': 'index_token_address',
+    'is_long': 'is_long',
+    'size_delta': 'size_delta',
+    'initial_collateral_delta': 'initial_collateral_delta_amount',
+    'slippage_percent': 'slippage_percent',
+    'swap_path': 'swap_path'
+}
+
+# Parsed order keys passed to OrderClient.swap
+SWAP_CLIENT_ARGUMENTS = {
+    'start_token_address': 'start_token',
+    'out_token_address': 'out_token',
+    'initial_collateral_delta': 'initial_collateral_delta_amount',
+    'slippage_percent': 'slippage_percent',
+    'swap_path': 'swap_path'
+}
+
+
+class BatchOrderArgumentParser(OrderArgumentParser):
+    """
+    Parse a portfolio of order intents of one type against a single
+    snapshot of markets and oracle prices. Symbols, market keys, swap paths,
+    collateral values and leverage checks for every order are resolved from
+    the shared snapshot, and swap routes are computed once per token pair:
+
+        parser = BatchOrderArgumentParser(config, is_increase=True)
+        columns = parser.process_orders(intents)
+        for arguments in parser.to_client_arguments(columns):
+            client.increase(**arguments, broadcast=False)
+
+    Parameters
+    ----------
+    config : ConfigManager
+        chain config, every order must be on this chain.
+    is_increase : bool, optional
+        orders open or increase positions. The default is False.
+    is_decrease : bool, optional
+        orders close or decrease positions. The default is False.
+    is_swap : bool, optional
+        orders are swaps. The default is False.
+    markets : Markets, optional
+        markets snapshot, eg from an OrderClient. The default is None, load
+        on first use.
+    prices : OraclePriceTable or dict, optional
+        oracle prices snapshot, eg from an OrderClient. The default is None,
+        load on first use.
+    """
+
+    def __init__(
+        self, config, is_increase: bool = False, is_decrease: bool = False,
+        is_swap: bool = False, markets=None, prices: dict = None
+    ):
+        super().__init__(
+            config,
+            is_increase=is_increase,
+            is_decrease=is_decrease,
+            is_swap=is_swap
+        )
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        if prices is not None and not isinstance(prices, OraclePriceTable):
+            prices = OraclePriceTable(
+                prices,
+                get_token_resolver(config.chain).tokens
+            )
+
+        self._markets = markets
+        self._prices = prices
+        self._swap_routes = {}
+        self.errors = {}
+
+    def process_orders(self, orders, raise_on_error: bool = True) -> dict:
+        """
+        Validate and format a batch of order intents
+
+        Parameters
+        ----------
+        orders : list or pd.DataFrame
+            parameter dictionaries as taken by process_parameters_dictionary,
+            or a DataFrame with one row per order. Missing or NaN values are
+            treated as not supplied.
+        raise_on_error : bool, optional
+            raise on the first invalid order. If False, invalid orders are
+            logged, left out of the result and kept in errors keyed by
+            their position in orders. The default is True.
+
+        Returns
+        -------
+        dict
+            one list per parameter, aligned across orders, with the position
+            of each order in orders under 'row'.
+
+        """
+        if hasattr(orders, 'to_dict'):
+            orders = orders.to_dict('records')
+
+        self.errors = {}
+        parsed_orders = []
+        rows = []
+        for row, order in enumerate(orders):
+            try:
+                parsed_orders.append(
+                    self.process_parameters_dictionary(self._clean_order(order))
+                )
+            except Exception as e:
+                if raise_on_error:
+                    raise Exception("Order {}: {}".format(row, e))
+
+                self.log.warning("Skipping order {}: {}".format(row, e))
+                self.errors[row] = str(e)
+                continue
+
+            rows.append(row)
+
+        keys = []
+        for parsed_order in parsed_orders:
+            keys.extend(key for key in parsed_order if key not in keys)
+
+        columns = {'row': rows}
+        for key in keys:
+            columns[key] = [parsed_order.get(key) for parsed_order in parsed_orders]
+
+        return columns
+
+    def to_client_arguments(self, columns: dict) -> list:
+        """
+        Convert process_orders columns to keyword arguments for
+        OrderClient.increase, decrease or swap, one dictionary per order
+        """
+        if self.is_swap:
+            argument_names = SWAP_CLIENT_ARGUMENTS
+        else:
+            argument_names = POSITION_CLIENT_ARGUMENTS
+
+        return [
+            {
+                argument_names[key]: columns[key][i]
+                for key in argument_names
+            }
+            for i in range(len(columns['row']))
+        ]
+
+    def _clean_order(self, order: dict) -> dict:
+        # Drop unset DataFrame cells so the missing key handlers fill them
+        order = {
+            key: value for key, value in order.items()
+            if value is not None and not (isinstance(value, float) and value != value)
+        }
+
+        order.setdefault('chain', self.config.chain)
+        if order['chain'] != self.config.chain:
+            raise Exception(
+                "Order is on {} but the batch is on {}".format(
+                    order['chain'], self.config.chain
+                )
+            )
+
+        return order
+
+    def _determine_swap_route(self, start_token_address: str, out_token_address: str):
+        key = (start_token_address, out_token_address)
+        if key not in self._swap_routes:
+            self._swap_routes[key] = super()._determine_swap_route(
+                start_token_address,
+                out_token_address
+            )
+
+        # Callers may mutate the path they are given
+        return list(self._swap_routes[key])
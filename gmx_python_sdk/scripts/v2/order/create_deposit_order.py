@@ -1,6 +1,5 @@
 from .deposit import Deposit
-from ..gas_utils import get_gas_limits
-from ..gmx_utils import get_datastore_contract
+from ..gas_utils import get_gas_parameters
 
 
 class DepositOrder(Deposit):
@@ -19,6 +18,6 @@ class DepositOrder(Deposit):
 
     def determine_gas_limits(self):
 
-        datastore = get_datastore_contract(self.config)
-        self._gas_limits = get_gas_limits(datastore)
-        self._gas_limits_order_type = self._gas_limits["increase_order"]
+        self._gas_parameters = get_gas_parameters(self.config)
+        self._gas_limits = self._gas_parameters.get_gas_limits()
+        self._gas_limits_order_type = "deposit"
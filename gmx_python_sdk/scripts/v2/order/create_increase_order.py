@@ -1,6 +1,5 @@
 from .order import Order
-from ..gas_utils import get_gas_limits
-from ..gmx_utils import get_datastore_contract
+from ..gas_utils import get_gas_parameters
 
 
 class IncreaseOrder(Order):
@@ -18,6 +17,6 @@ class IncreaseOrder(Order):
         self.order_builder(is_open=True)
 
     def determine_gas_limits(self):
-        datastore = get_datastore_contract(self.config)
-        self._gas_limits = get_gas_limits(datastore)
-        self._gas_limits_order_type = self._gas_limits["increase_order"]
+        self._gas_parameters = get_gas_parameters(self.config)
+        self._gas_limits = self._gas_parameters.get_gas_limits()
+        self._gas_limits_order_type = "increase_order"
@@ -1,10 +1,9 @@
 from web3 import Web3
 
 from .order import Order
-from ..gas_utils import get_gas_limits
-from ..get.get_oracle_prices import OraclePrices
+from ..gas_utils import get_gas_parameters
 from ..gmx_utils import (
-    get_estimated_swap_output, contract_map, get_datastore_contract
+    get_estimated_swap_output, contract_map
 )
 
 
@@ -26,9 +25,9 @@ class SwapOrder(Order):
 
     def determine_gas_limits(self):
 
-        datastore = get_datastore_contract(self.config)
-        self._gas_limits = get_gas_limits(datastore)
-        self._gas_limits_order_type = self._gas_limits["swap_order"]
+        self._gas_parameters = get_gas_parameters(self.config)
+        self._gas_limits = self._gas_parameters.get_gas_limits()
+        self._gas_limits_order_type = "swap_order"
 
     def estimated_swap_output(self, market: dict, in_token: str, in_token_amount: int):
         """
@@ -51,7 +50,7 @@ class SwapOrder(Order):
 
         """
 
-        prices = OraclePrices(chain=self.config.chain).get_recent_prices()
+        prices = self._get_oracle_prices()
 
         try:
             in_token = Web3.to_checksum_address(in_token)
@@ -71,18 +70,12 @@ class SwapOrder(Order):
                 market['short_token_address']
             ],
             'token_prices_tuple': [
-                [
-                    int(prices[market['index_token_address']]['maxPriceFull']),
-                    int(prices[market['index_token_address']]['minPriceFull'])
-                ],
-                [
-                    int(prices[market['long_token_address']]['maxPriceFull']),
-                    int(prices[market['long_token_address']]['minPriceFull'])
-                ],
-                [
-                    int(prices[market['short_token_address']]['maxPriceFull']),
-                    int(prices[market['short_token_address']]['minPriceFull'])
-                ],
+                list(prices.min_max(market[token])[::-1])
+                for token in [
+                    'index_token_address',
+                    'long_token_address',
+                    'short_token_address'
+                ]
             ],
             'token_in': in_token,
             'token_amount_in': in_token_amount,
@@ -90,8 +83,9 @@ class SwapOrder(Order):
         }
 
         estimated_swap_output = get_estimated_swap_output(
-            self.config.chain,
-            estimated_swap_output_parameters
+            self.config,
+            estimated_swap_output_parameters,
+            reader_contract_obj=self._get_reader_contract()
         )
 
         return estimated_swap_output
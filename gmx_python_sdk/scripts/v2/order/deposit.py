@@ -11,9 +11,9 @@ from ..gmx_utils import convert_to_checksum_address, \
     get_exchange_router_contract, create_connection, \
     determine_swap_route, contract_map, get_estimated_deposit_amount_out
 
-from ..approve_token_for_spend import check_if_approved
-
-from ..gas_utils import get_execution_fee
+from ..approve_token_for_spend import check_if_approved, get_allowance_cache
+from ..fee_oracle import get_fee_oracle
+from .simulation import simulate_execution
 
 
 class Deposit:
@@ -27,7 +27,9 @@ class Deposit:
         long_token_amount: int,
         short_token_amount: int,
         max_fee_per_gas: int = None,
-        debug_mode: bool = False
+        debug_mode: bool = False,
+        urgency: str = "medium",
+        preflight: bool = False
     ) -> None:
         self.config = config
         self.market_key = market_key
@@ -38,16 +40,21 @@ class Deposit:
         self.long_token_swap_path = []
         self.short_token_swap_path = []
         self.max_fee_per_gas = max_fee_per_gas
+        self.max_priority_fee_per_gas = 0
         self.debug_mode = debug_mode
+        self.preflight = preflight
+        self.multicall_args = None
+        self.raw_txn = None
+        self._prices = None
 
+        self._fee_oracle = self._get_fee_oracle()
         if self.max_fee_per_gas is None:
-            block = create_connection(
-                config.rpc
-            ).eth.get_block('latest')
-            self.max_fee_per_gas = block['baseFeePerGas'] * 1.35
+            fee_suggestion = self._fee_oracle.get_fee_suggestion(urgency)
+            self.max_fee_per_gas = fee_suggestion['maxFeePerGas']
+            self.max_priority_fee_per_gas = fee_suggestion['maxPriorityFeePerGas']
 
         self._exchange_router_contract_obj = get_exchange_router_contract(
-            config
+            config, trimmed=True
         )
 
         self._connection = create_connection(config)
@@ -57,6 +64,9 @@ class Deposit:
         self.log = logging.getLogger(__name__)
         self.log.info("Creating order...")
 
+    def _get_fee_oracle(self):
+        return get_fee_oracle(self.config)
+
     def determine_gas_limits(self):
 
         pass
@@ -106,16 +116,23 @@ class Deposit:
                 'value': value_amount,
                 'chainId': self.config.chain_id,
 
-                # TODO - this is NOT correct
-                'gas': (
-                    self._gas_limits_order_type.call() + self._gas_limits_order_type.call()
+                'gas': self._gas_parameters.get_transaction_gas_limit(
+                    self._gas_limits_order_type,
+                    len(self.long_token_swap_path) + len(self.short_token_swap_path)
                 ),
                 'maxFeePerGas': int(self.max_fee_per_gas),
-                'maxPriorityFeePerGas': 0,
+                'maxPriorityFeePerGas': self.max_priority_fee_per_gas,
                 'nonce': nonce
             }
         )
 
+        self.multicall_args = multicall_args
+        self.raw_txn = raw_txn
+
+        # Raises a SimulationError if the keeper would fail to execute
+        if self.preflight:
+            self.simulate()
+
         if not self.debug_mode:
             signed_txn = self._connection.eth.account.sign_transaction(
                 raw_txn, self.config.private_key
@@ -130,6 +147,54 @@ class Deposit:
 
             self.log.info("Transaction submitted!")
 
+            self._record_spends(user_wallet_address)
+
+    def simulate(self):
+        """
+        Simulate keeper execution of the built request at the oracle prices
+        it was built with
+
+        Raises
+        ------
+        SimulationError
+            execution would revert.
+
+        """
+        simulate_execution(
+            self.config,
+            self._connection,
+            self._exchange_router_contract_obj,
+            self.multicall_args,
+            self.raw_txn['value'],
+            "simulateExecuteDeposit",
+            [self.market_key] + self.long_token_swap_path + self.short_token_swap_path,
+            self.all_markets_info,
+            self._prices
+        )
+
+    def _record_spends(self, user_wallet_address: str):
+        """
+        Update the cached token balances and allowances after submitting
+        """
+        spender = contract_map[self.config.chain]["syntheticsrouter"]['contract_address']
+        allowance_cache = get_allowance_cache(self.config)
+
+        if self.long_token_amount > 0:
+            allowance_cache.record_spend(
+                user_wallet_address,
+                self.initial_long_token,
+                spender,
+                self.long_token_amount
+            )
+
+        if self.short_token_amount > 0:
+            allowance_cache.record_spend(
+                user_wallet_address,
+                self.initial_short_token,
+                spender,
+                self.short_token_amount
+            )
+
     def create_deposit_order(self):
 
         user_wallet_address = self.config.user_wallet_address
@@ -159,15 +224,6 @@ class Deposit:
         # Minimum number of GM tokens we should expect
         min_market_tokens = self._estimate_deposit()
 
-        # Giving a 10% buffer here
-        execution_fee = int(
-            get_execution_fee(
-                self._gas_limits,
-                self._gas_limits_order_type,
-                self._connection.eth.gas_price
-            ) * 1.1
-        )
-
         callback_gas_limit = 0
 
         # If we havent defined either long/short set it to market default
@@ -176,6 +232,15 @@ class Deposit:
         # build swap paths for long/short deposit
         self._determine_swap_paths()
 
+        # Giving a 10% buffer here
+        execution_fee = int(
+            self._gas_parameters.get_execution_fee(
+                self._gas_limits_order_type,
+                self._fee_oracle.get_gas_price(),
+                len(self.long_token_swap_path) + len(self.short_token_swap_path)
+            ) * 1.1
+        )
+
         arguments = (
             user_wallet_address,
             eth_zero_address,
@@ -335,6 +400,7 @@ class Deposit:
 
         market = self.all_markets_info[self.market_key]
         oracle_prices_dict = OraclePrices(chain=self.config.chain).get_recent_prices()
+        self._prices = oracle_prices_dict
 
         index_token_address = market['index_token_address']
         long_token_address = market['long_token_address']
@@ -1,19 +1,24 @@
-import numpy as np
-
 from ..get.get_markets import Markets
 from ..get.get_oracle_prices import OraclePrices
 
-from ..gmx_utils import get_tokens_address_dict
+from ..gmx_utils import ConfigManager
+from ..token_resolver import get_token_resolver
 
 
 class LiquidityArgumentParser:
 
-    def __init__(self, is_deposit: bool = False, is_withdrawal: bool = False):
+    def __init__(
+        self, is_deposit: bool = False, is_withdrawal: bool = False, config=None
+    ):
 
+        self.config = config
         self.parameters_dict = None
         self.is_deposit = is_deposit
         self.is_withdrawal = is_withdrawal
 
+        self._markets = None
+        self._prices = None
+
         if is_deposit:
 
             self.required_keys = [
@@ -108,12 +113,8 @@ class LiquidityArgumentParser:
         except KeyError:
             raise Exception("Market Token Address and Symbol not provided!")
 
-        self.parameters_dict['market_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']
-            ),
+        self.parameters_dict['market_token_address'] = self._get_token_resolver().address(
             token_symbol
-
         )
 
     def _handle_missing_market_key(self):
@@ -124,9 +125,8 @@ class LiquidityArgumentParser:
         self._handle_missing_index_token_address()
         index_token_address = self.parameters_dict['market_token_address']
 
-        # use the index token address to find the market key from get_available_markets
-        self.parameters_dict['market_key'] = self.find_market_key_by_index_address(
-            Markets(chain=self.parameters_dict['chain']).get_available_markets(),
+        # use the index token address to find the market key from the market registry
+        self.parameters_dict['market_key'] = self._get_markets().registry.find_by_index_token(
             index_token_address
         )
 
@@ -138,12 +138,6 @@ class LiquidityArgumentParser:
 
         try:
             long_token_symbol = self.parameters_dict['long_token_symbol']
-
-            if long_token_symbol == "BTC":
-                self.parameters_dict[
-                    'long_token_address'
-                ] = "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
-                return
             if long_token_symbol is None:
                 raise KeyError
         except KeyError:
@@ -152,10 +146,9 @@ class LiquidityArgumentParser:
             return
 
         # search the known tokens for a contract address using the user supplied symbol
-        self.parameters_dict['long_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
-            long_token_symbol
+        self.parameters_dict['long_token_address'] = self._get_token_resolver().address(
+            long_token_symbol,
+            role="collateral"
         )
 
     def _handle_missing_short_token_address(self):
@@ -174,9 +167,7 @@ class LiquidityArgumentParser:
             return
 
         # search the known tokens for a contract address using the user supplied symbol
-        self.parameters_dict['short_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
+        self.parameters_dict['short_token_address'] = self._get_token_resolver().address(
             short_token_symbol
         )
 
@@ -195,19 +186,14 @@ class LiquidityArgumentParser:
             raise Exception("Must provided either out token symbol or address")
 
         # search the known tokens for a contract address using the user supplied symbol
-        out_token_address = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
-            out_token_symbol
+        out_token_address = self._get_token_resolver().address(
+            out_token_symbol,
+            role="collateral"
         )
 
-        markets = Markets(chain=self.parameters_dict['chain']).get_available_markets()
-        market = markets[self.parameters_dict['market_key']]
+        market = self._get_markets().registry.get(self.parameters_dict['market_key'])
 
-        if out_token_symbol == "BTC":
-            out_token_address = "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
-
-        if out_token_address not in [market['long_token_address'], market['short_token_address']]:
+        if out_token_address not in [market.long_token_address, market.short_token_address]:
             raise Exception(
                 "Out token must be either the long or short token of the market")
         else:
@@ -222,17 +208,10 @@ class LiquidityArgumentParser:
         if self.parameters_dict["long_token_address"] is None:
             self.parameters_dict["long_token_amount"] = 0
             return
-        prices = OraclePrices(chain=self.parameters_dict['chain']).get_recent_prices()
-        price = np.median(
-            [float(prices[self.parameters_dict["long_token_address"]]['maxPriceFull']),
-             float(prices[self.parameters_dict["long_token_address"]]['minPriceFull'])]
+        price = self._get_oracle_prices().usd(self.parameters_dict["long_token_address"])
+        decimal = self._get_token_resolver().decimals(
+            self.parameters_dict["long_token_address"]
         )
-        decimal = get_tokens_address_dict(
-            self.parameters_dict['chain']
-        )[self.parameters_dict["long_token_address"]]['decimals']
-        oracle_factor = decimal - 30
-
-        price = price * 10 ** oracle_factor
 
         self.parameters_dict["long_token_amount"] = int((
             self.parameters_dict["long_token_usd"] / price) * 10**decimal)
@@ -247,21 +226,37 @@ class LiquidityArgumentParser:
             self.parameters_dict["short_token_amount"] = 0
             return
 
-        prices = OraclePrices(chain=self.parameters_dict['chain']).get_recent_prices()
-        price = np.median(
-            [float(prices[self.parameters_dict["short_token_address"]]['maxPriceFull']),
-             float(prices[self.parameters_dict["short_token_address"]]['minPriceFull'])]
+        price = self._get_oracle_prices().usd(self.parameters_dict["short_token_address"])
+        decimal = self._get_token_resolver().decimals(
+            self.parameters_dict["short_token_address"]
         )
-        decimal = get_tokens_address_dict(
-            self.parameters_dict['chain']
-        )[self.parameters_dict["short_token_address"]]['decimals']
-        oracle_factor = decimal - 30
-
-        price = price * 10 ** oracle_factor
 
         self.parameters_dict["short_token_amount"] = int((
             self.parameters_dict["short_token_usd"] / price) * 10**decimal)
 
+    def _get_token_resolver(self):
+        return get_token_resolver(self.parameters_dict['chain'])
+
+    def _get_markets(self):
+        # Markets are loaded at most once per parser
+        if self._markets is None:
+            if self.config is None:
+                self.config = ConfigManager(chain=self.parameters_dict['chain'])
+                self.config.set_config()
+
+            self._markets = Markets(self.config)
+
+        return self._markets
+
+    def _get_oracle_prices(self):
+        # Prices are loaded at most once per parser
+        if self._prices is None:
+            self._prices = OraclePrices(
+                chain=self.parameters_dict['chain']
+            ).get_price_table()
+
+        return self._prices
+
     @staticmethod
     def find_key_by_symbol(input_dict: dict, search_symbol: str):
         """
@@ -1,5 +1,5 @@
 import logging
-import numpy as np
+import uuid
 
 from hexbytes import HexBytes
 from web3 import Web3
@@ -8,12 +8,15 @@ from ..get.get_markets import Markets
 from ..get.get_oracle_prices import OraclePrices
 from ..gmx_utils import (
     get_exchange_router_contract, create_connection, contract_map,
+    get_reader_contract,
     PRECISION, get_execution_price_and_price_impact, order_type as order_types,
     decrease_position_swap_type as decrease_position_swap_types,
     convert_to_checksum_address
 )
-from ..gas_utils import get_execution_fee
-from ..approve_token_for_spend import check_if_approved
+from ..approve_token_for_spend import check_if_approved, get_allowance_cache
+from ..fee_oracle import get_fee_oracle
+from ..tracing import get_tracer
+from .simulation import simulate_execution
 
 
 class Order:
@@ -22,39 +25,103 @@ class Order:
         self, config: str, market_key: str, collateral_address: str,
         index_token_address: str, is_long: bool, size_delta: float,
         initial_collateral_delta_amount: str, slippage_percent: float,
-        swap_path: list, max_fee_per_gas: int = None, debug_mode: bool = False
+        swap_path: list, max_fee_per_gas: int = None, debug_mode: bool = False,
+        urgency: str = "medium", preflight: bool = False,
+        correlation_id: str = None
     ) -> None:
 
-        self.config = config
-        self.market_key = market_key
-        self.collateral_address = collateral_address
-        self.index_token_address = index_token_address
-        self.is_long = is_long
-        self.size_delta = size_delta
-        self.initial_collateral_delta_amount = initial_collateral_delta_amount
-        self.slippage_percent = slippage_percent
-        self.swap_path = swap_path
-        self.max_fee_per_gas = max_fee_per_gas
-        self.debug_mode = debug_mode
-
-        if self.max_fee_per_gas is None:
-            block = create_connection(
-                config
-            ).eth.get_block('latest')
-            self.max_fee_per_gas = block['baseFeePerGas'] * 1.35
-
-        self._exchange_router_contract_obj = get_exchange_router_contract(
-            config=self.config
+        # Every stage of building and sending the order is traced under this
+        # id, pass one in to tie the order to the signal that created it
+        self.correlation_id = correlation_id or uuid.uuid4().hex
+        self._tracer = get_tracer()
+        self._trace = self._tracer.start_span(
+            "order",
+            trace_id=self.correlation_id,
+            order_class=self.__class__.__name__,
+            chain=config.chain,
+            market_key=market_key,
+            is_long=is_long
         )
-        self._connection = create_connection(config)
-        self._is_swap = False
 
-        self.log = logging.getLogger(__name__)
-        self.log.info("Creating order...")
+        try:
+            self.config = config
+            self.market_key = market_key
+            self.collateral_address = collateral_address
+            self.index_token_address = index_token_address
+            self.is_long = is_long
+            self.size_delta = size_delta
+            self.initial_collateral_delta_amount = initial_collateral_delta_amount
+            self.slippage_percent = slippage_percent
+            self.swap_path = swap_path
+            self.max_fee_per_gas = max_fee_per_gas
+            self.max_priority_fee_per_gas = 0
+            self.debug_mode = debug_mode
+            self.preflight = preflight
+
+            with self._stage("fee_suggestion"):
+                self._fee_oracle = self._get_fee_oracle()
+                if self.max_fee_per_gas is None:
+                    fee_suggestion = self._fee_oracle.get_fee_suggestion(urgency)
+                    self.max_fee_per_gas = fee_suggestion['maxFeePerGas']
+                    self.max_priority_fee_per_gas = fee_suggestion['maxPriorityFeePerGas']
+
+            with self._stage("connection"):
+                self._exchange_router_contract_obj = self._get_exchange_router_contract()
+                self._connection = self._get_connection()
+            self._is_swap = False
+            self.multicall_args = None
+            self.raw_txn = None
+            self.signed_txn = None
+            self.tx_hash = None
+            self._markets = None
+            self._prices = None
+
+            self.log = logging.getLogger(__name__)
+            self.log.info("Creating order...")
+        except Exception as e:
+            self._trace.end(error=e)
+            raise
 
     def determine_gas_limits(self):
         pass
 
+    def _stage(self, name: str):
+        """
+        Span timing one stage of this order
+        """
+        return self._tracer.start_span(name, parent=self._trace)
+
+    def _get_connection(self):
+        return create_connection(self.config)
+
+    def _get_fee_oracle(self):
+        return get_fee_oracle(self.config)
+
+    def _get_exchange_router_contract(self):
+        return get_exchange_router_contract(config=self.config, trimmed=True)
+
+    def _get_markets(self):
+        return Markets(self.config).get_available_markets()
+
+    def _get_oracle_prices(self):
+        return OraclePrices(chain=self.config.chain).get_price_table()
+
+    def _get_nonce(self, wallet_address: str):
+        return self._connection.eth.get_transaction_count(wallet_address)
+
+    def _get_reader_contract(self):
+        return get_reader_contract(self.config, trimmed=True)
+
+    def _sign_transaction(self, raw_txn: dict):
+        return self._connection.eth.account.sign_transaction(
+            raw_txn, self.config.private_key
+        )
+
+    def _send_transaction(self, signed_txn):
+        return self._connection.eth.send_raw_transaction(
+            signed_txn.rawTransaction
+        )
+
     def check_for_approval(self):
         """
         Check for Approval
@@ -80,41 +147,79 @@ class Order:
             wallet_address = Web3.to_checksum_address(user_wallet_address)
         except AttributeError:
             wallet_address = Web3.toChecksumAddress(user_wallet_address)
-        nonce = self._connection.eth.get_transaction_count(
-            wallet_address
-        )
+        with self._stage("nonce"):
+            nonce = self._get_nonce(wallet_address)
+
+        with self._stage("build_transaction"):
+            raw_txn = self._exchange_router_contract_obj.functions.multicall(
+                multicall_args
+            ).build_transaction(
+                {
+                    'value': value_amount,
+                    'chainId': self.config.chain_id,
+
+                    'gas': self._gas_parameters.get_transaction_gas_limit(
+                        self._gas_limits_order_type,
+                        len(self.swap_path)
+                    ),
+                    'maxFeePerGas': int(self.max_fee_per_gas),
+                    'maxPriorityFeePerGas': self.max_priority_fee_per_gas,
+                    'nonce': nonce
+                }
+            )
 
-        raw_txn = self._exchange_router_contract_obj.functions.multicall(
-            multicall_args
-        ).build_transaction(
-            {
-                'value': value_amount,
-                'chainId': self.config.chain_id,
-
-                # TODO - this is NOT correct
-                'gas': (
-                    self._gas_limits_order_type.call(
-                    ) + self._gas_limits_order_type.call()
-                ),
-                'maxFeePerGas': int(self.max_fee_per_gas),
-                'maxPriorityFeePerGas': 0,
-                'nonce': nonce
-            }
-        )
+        self.multicall_args = multicall_args
+        self.raw_txn = raw_txn
+
+        # Raises a SimulationError if the keeper would fail to execute
+        if self.preflight:
+            with self._stage("simulate"):
+                self.simulate()
 
         if not self.debug_mode:
-            signed_txn = self._connection.eth.account.sign_transaction(
-                raw_txn, self.config.private_key
-            )
-            tx_hash = self._connection.eth.send_raw_transaction(
-                signed_txn.rawTransaction
-            )
-            self.log.info("Txn submitted!")
-            self.log.info(
-                "Check status: https://arbiscan.io/tx/{}".format(tx_hash.hex())
-            )
+            with self._stage("sign"):
+                self.signed_txn = self._sign_transaction(raw_txn)
+            with self._stage("broadcast"):
+                self.tx_hash = self._send_transaction(self.signed_txn)
+
+            # tx_hash is None when the transaction was signed but held back
+            if self.tx_hash is not None:
+                self.log.info("Txn submitted!")
+                self.log.info(
+                    "Check status: https://arbiscan.io/tx/{}".format(
+                        self.tx_hash.hex()
+                    )
+                )
+
+                self.log.info("Transaction submitted!")
+
+    def simulate(self):
+        """
+        Simulate keeper execution of the built order at the oracle prices it
+        was built with
+
+        Raises
+        ------
+        SimulationError
+            execution would revert.
 
-            self.log.info("Transaction submitted!")
+        """
+        market_keys = [
+            market_key for market_key in [self.market_key] + self.swap_path
+            if market_key in self._markets
+        ]
+
+        simulate_execution(
+            self.config,
+            self._connection,
+            self._exchange_router_contract_obj,
+            self.multicall_args,
+            self.raw_txn['value'],
+            "simulateExecuteOrder",
+            market_keys,
+            self._markets,
+            self._prices
+        )
 
     def _get_prices(
         self, decimals: float, prices: float, is_open: bool = False,
@@ -124,12 +229,7 @@ class Order:
         Get Prices
         """
         self.log.info("Getting prices...")
-        price = np.median(
-            [
-                float(prices[self.index_token_address]['maxPriceFull']),
-                float(prices[self.index_token_address]['minPriceFull'])
-            ]
-        )
+        price = prices.mid(self.index_token_address)
 
         # Depending on if open/close & long/short, we need to account for
         # slippage in a different way
@@ -170,23 +270,38 @@ class Order:
         return price, int(slippage), acceptable_price_in_usd
 
     def order_builder(self, is_open=False, is_close=False, is_swap=False):
+        """
+        Create Order, tracing each stage under the order correlation id
+        """
+        try:
+            self._build_order(is_open, is_close, is_swap)
+        except Exception as e:
+            self._trace.end(error=e)
+            raise
+
+        if self.tx_hash is not None:
+            self._trace.set_attribute('tx_hash', Web3.to_hex(self.tx_hash))
+        self._trace.end()
+
+    def _build_order(self, is_open=False, is_close=False, is_swap=False):
         """
         Create Order
         """
 
-        self.determine_gas_limits()
-        gas_price = self._connection.eth.gas_price
-        execution_fee = int(
-            get_execution_fee(
-                self._gas_limits,
+        with self._stage("gas_limits"):
+            self.determine_gas_limits()
+        with self._stage("execution_fee"):
+            gas_price = self._fee_oracle.get_gas_price()
+            execution_fee = self._gas_parameters.get_execution_fee(
                 self._gas_limits_order_type,
-                gas_price
+                gas_price,
+                len(self.swap_path)
             )
-        )
 
         # Dont need to check approval when closing
         if not is_close and not self.debug_mode:
-            self.check_for_approval()
+            with self._stage("approval"):
+                self.check_for_approval()
 
         # Up execution fee for swap, more complex
         if is_swap:
@@ -198,9 +313,13 @@ class Order:
             # 20% buffer
             execution_fee = int(execution_fee * 1.2)
 
-        markets = Markets(self.config).get_available_markets()
+        with self._stage("markets"):
+            markets = self._get_markets()
         initial_collateral_delta_amount = self.initial_collateral_delta_amount
-        prices = OraclePrices(chain=self.config.chain).get_recent_prices()
+        with self._stage("oracle_prices"):
+            prices = self._get_oracle_prices()
+        self._markets = markets
+        self._prices = prices
         size_delta_price_price_impact = self.size_delta
 
         # when decreasing size delta must be negative
@@ -219,27 +338,29 @@ class Order:
 
             # Estimate amount of token out using a reader function, necessary
             # for multi swap
-            estimated_output = self.estimated_swap_output(
-                markets[self.swap_path[0]],
-                self.collateral_address,
-                initial_collateral_delta_amount
-            )
+            with self._stage("swap_estimate"):
+                estimated_output = self.estimated_swap_output(
+                    markets[self.swap_path[0]],
+                    self.collateral_address,
+                    initial_collateral_delta_amount
+                )
 
             # this var will help to calculate the cost gas depending on the
             # operation
             self._get_limits_order_type = self._gas_limits['single_swap']
             if len(self.swap_path) > 1:
-                estimated_output = self.estimated_swap_output(
-                    markets[self.swap_path[1]],
-                    "0xaf88d065e77c8cC2239327C5EDb3A432268e5831",
-                    int(
-                        estimated_output[
-                            "out_token_amount"
-                        ] - estimated_output[
-                            "out_token_amount"
-                        ] * self.slippage_percent
+                with self._stage("swap_estimate"):
+                    estimated_output = self.estimated_swap_output(
+                        markets[self.swap_path[1]],
+                        "0xaf88d065e77c8cC2239327C5EDb3A432268e5831",
+                        int(
+                            estimated_output[
+                                "out_token_amount"
+                            ] - estimated_output[
+                                "out_token_amount"
+                            ] * self.slippage_percent
+                        )
                     )
-                )
                 self._get_limits_order_type = self._gas_limits['swap_order']
 
             min_output_amount = estimated_output["out_token_amount"] - \
@@ -265,10 +386,9 @@ class Order:
                 contract_map[self.config.chain]["datastore"]['contract_address']
             ),
             'market_key': self.market_key,
-            'index_token_price': [
-                int(prices[self.index_token_address]['maxPriceFull']),
-                int(prices[self.index_token_address]['minPriceFull'])
-            ],
+            'index_token_price': list(
+                prices.min_max(self.index_token_address)
+            )[::-1],
             'position_size_in_usd': 0,
             'position_size_in_tokens': 0,
             'size_delta': size_delta_price_price_impact,
@@ -295,11 +415,13 @@ class Order:
             acceptable_price = 0
             gmx_market_address = "0x0000000000000000000000000000000000000000"
 
-        execution_price_and_price_impact_dict = get_execution_price_and_price_impact(
-            self.config,
-            execution_price_parameters,
-            decimals
-        )
+        with self._stage("execution_price"):
+            execution_price_and_price_impact_dict = get_execution_price_and_price_impact(
+                self.config,
+                execution_price_parameters,
+                decimals,
+                reader_contract_obj=self._get_reader_contract()
+            )
         self.log.info(
             "Execution price: ${:.4f}".format(
                 execution_price_and_price_impact_dict['execution_price']
@@ -326,22 +448,23 @@ class Order:
                         'execution_price'] > acceptable_price_in_usd:
                     raise Exception("Execution price falls outside acceptable price!")
 
-        user_wallet_address = convert_to_checksum_address(
-            self.config,
-            user_wallet_address
-        )
-        eth_zero_address = convert_to_checksum_address(
-            self.config,
-            eth_zero_address
-        )
-        ui_ref_address = convert_to_checksum_address(
-            self.config,
-            ui_ref_address
-        )
-        collateral_address = convert_to_checksum_address(
-            self.config,
-            self.collateral_address
-        )
+        with self._stage("checksum"):
+            user_wallet_address = convert_to_checksum_address(
+                self.config,
+                user_wallet_address
+            )
+            eth_zero_address = convert_to_checksum_address(
+                self.config,
+                eth_zero_address
+            )
+            ui_ref_address = convert_to_checksum_address(
+                self.config,
+                ui_ref_address
+            )
+            collateral_address = convert_to_checksum_address(
+                self.config,
+                self.collateral_address
+            )
 
         arguments = (
             (
@@ -371,36 +494,46 @@ class Order:
         # If the collateral is not native token (ie ETH/Arbitrum or AVAX/AVAX)
         # need to send tokens to vault
 
-        value_amount = execution_fee
-        if self.collateral_address != '0x82aF49447D8a07e3bd95BD0d56f35241523fBab1' and not is_close:
+        with self._stage("encode"):
+            value_amount = execution_fee
+            if self.collateral_address != '0x82aF49447D8a07e3bd95BD0d56f35241523fBab1' and not is_close:
+
+                multicall_args = [
+                    HexBytes(self._send_wnt(value_amount)),
+                    HexBytes(
+                        self._send_tokens(
+                            self.collateral_address,
+                            initial_collateral_delta_amount
+                        )
+                    ),
+                    HexBytes(self._create_order(arguments))
+                ]
 
-            multicall_args = [
-                HexBytes(self._send_wnt(value_amount)),
-                HexBytes(
-                    self._send_tokens(
-                        self.collateral_address,
-                        initial_collateral_delta_amount
-                    )
-                ),
-                HexBytes(self._create_order(arguments))
-            ]
-
-        else:
+            else:
 
-            # send start token and execute fee if token is ETH or AVAX
-            if is_open or is_swap:
+                # send start token and execute fee if token is ETH or AVAX
+                if is_open or is_swap:
 
-                value_amount = initial_collateral_delta_amount + execution_fee
+                    value_amount = initial_collateral_delta_amount + execution_fee
 
-            multicall_args = [
-                HexBytes(self._send_wnt(value_amount)),
-                HexBytes(self._create_order(arguments))
-            ]
+                multicall_args = [
+                    HexBytes(self._send_wnt(value_amount)),
+                    HexBytes(self._create_order(arguments))
+                ]
 
         self._submit_transaction(
             user_wallet_address, value_amount, multicall_args, self._gas_limits
         )
 
+        # Keep cached balance and allowance in step with what we just spent
+        if self.tx_hash is not None and not is_close:
+            get_allowance_cache(self.config).record_spend(
+                user_wallet_address,
+                self.collateral_address,
+                contract_map[self.config.chain]["syntheticsrouter"]['contract_address'],
+                initial_collateral_delta_amount
+            )
+
     def _create_order(self, arguments):
         """
         Create Order
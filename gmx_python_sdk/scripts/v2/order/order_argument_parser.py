@@ -1,8 +1,7 @@
-import numpy as np
-
 from ..get.get_oracle_prices import OraclePrices
 from ..get.get_markets import Markets
-from ..gmx_utils import get_tokens_address_dict, determine_swap_route
+from ..gmx_utils import determine_swap_route
+from ..token_resolver import get_token_resolver
 
 
 class OrderArgumentParser:
@@ -14,6 +13,9 @@ class OrderArgumentParser:
         self.is_decrease = is_decrease
         self.is_swap = is_swap
 
+        self._markets = None
+        self._prices = None
+
         if is_increase:
             self.required_keys = [
                 "chain",
@@ -76,10 +78,12 @@ class OrderArgumentParser:
 
         if not self.is_swap:
             self.calculate_missing_position_size_info_keys()
-            self._check_if_max_leverage_exceeded()
 
-        if self.is_increase:
-            if self._calculate_initial_collateral_usd() < 2:
+            # Valued once for both the leverage and minimum collateral checks
+            initial_collateral_usd = self._calculate_initial_collateral_usd()
+            self._check_if_max_leverage_exceeded(initial_collateral_usd)
+
+            if self.is_increase and initial_collateral_usd < 2:
                 raise Exception("Position size must be backed by >$2 of collateral!")
 
         self._format_size_info()
@@ -114,19 +118,12 @@ class OrderArgumentParser:
 
         try:
             token_symbol = self.parameters_dict['index_token_symbol']
-
-            # Exception for tickers api
-            if token_symbol == "BTC":
-                token_symbol = "WBTC.b"
         except KeyError:
             raise Exception("Index Token Address and Symbol not provided!")
 
-        self.parameters_dict['index_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']
-            ),
-            token_symbol
-
+        self.parameters_dict['index_token_address'] = self._get_token_resolver().address(
+            token_symbol,
+            role="index"
         )
 
     def _handle_missing_market_key(self):
@@ -134,14 +131,12 @@ class OrderArgumentParser:
         Will trigger if market key is missing. Can be determined from index token address.
         """
 
-        index_token_address = self.parameters_dict['index_token_address']
-
-        if index_token_address == "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f":
-            index_token_address = "0x47904963fc8b2340414262125aF798B9655E58Cd"
+        index_token_address = self._get_token_resolver().market_index_address(
+            self.parameters_dict['index_token_address']
+        )
 
-        # use the index token address to find the market key from get_available_markets
-        self.parameters_dict['market_key'] = self.find_market_key_by_index_address(
-            Markets(self.config).get_available_markets(),
+        # use the index token address to find the market key from the market registry
+        self.parameters_dict['market_key'] = self._get_markets().registry.find_by_index_token(
             index_token_address
         )
 
@@ -153,22 +148,13 @@ class OrderArgumentParser:
 
         try:
             start_token_symbol = self.parameters_dict['start_token_symbol']
-
-            # Exception for tickers api
-            if start_token_symbol == "BTC":
-                self.parameters_dict[
-                    'start_token_address'
-                ] = "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
-                return
-
         except KeyError:
             raise Exception("Start Token Address and Symbol not provided!")
 
         # search the known tokens for a contract address using the user supplied symbol
-        self.parameters_dict['start_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
-            start_token_symbol
+        self.parameters_dict['start_token_address'] = self._get_token_resolver().address(
+            start_token_symbol,
+            role="collateral"
         )
 
     def _handle_missing_out_token_address(self):
@@ -183,9 +169,7 @@ class OrderArgumentParser:
             raise Exception("Out Token Address and Symbol not provided!")
 
         # search the known tokens for a contract address using the user supplied symbol
-        self.parameters_dict['out_token_address'] = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
+        self.parameters_dict['out_token_address'] = self._get_token_resolver().address(
             start_token_symbol
         )
 
@@ -197,23 +181,20 @@ class OrderArgumentParser:
 
         try:
             collateral_token_symbol = self.parameters_dict['collateral_token_symbol']
-
-            # Exception for tickers api
-            if collateral_token_symbol == "BTC":
-                self.parameters_dict[
-                    'collateral_address'
-                ] = "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
-                return
         except KeyError:
             raise Exception("Collateral Token Address and Symbol not provided!")
 
         # search the known tokens for a contract address using the user supplied symbol
-        collateral_address = self.find_key_by_symbol(
-            get_tokens_address_dict(
-                self.parameters_dict['chain']),
-            collateral_token_symbol
+        collateral_address = self._get_token_resolver().address(
+            collateral_token_symbol,
+            role="collateral"
         )
 
+        # Tickers api alias, not listed in the markets under this address
+        if collateral_token_symbol == "BTC":
+            self.parameters_dict['collateral_address'] = collateral_address
+            return
+
         # check if the collateral token address can be used in the requested market
         if self._check_if_valid_collateral_for_market(collateral_address) and not self.is_swap:
             self.parameters_dict['collateral_address'] = collateral_address
@@ -226,17 +207,10 @@ class OrderArgumentParser:
         """
 
         if self.is_swap:
-            # first get markets to supply to determine_swap_route
-            markets = Markets(
-                chain=self.parameters_dict['chain']
-            ).get_available_markets()
-
-            # function returns swap route as a list [0] and a bool if there is a multi swap [1]
-            self.parameters_dict['swap_path'] = determine_swap_route(
-                markets,
+            self.parameters_dict['swap_path'] = self._determine_swap_route(
                 self.parameters_dict['start_token_address'],
                 self.parameters_dict['out_token_address']
-            )[0]
+            )
 
         # No Swap Path required to map
         elif self.parameters_dict['start_token_address'] == \
@@ -245,17 +219,10 @@ class OrderArgumentParser:
 
         else:
 
-            # first get markets to supply to determine_swap_route
-            markets = Markets(
-                chain=self.parameters_dict['chain']
-            ).get_available_markets()
-
-            # function returns swap route as a list [0] and a bool if there is a multi swap [1]
-            self.parameters_dict['swap_path'] = determine_swap_route(
-                markets,
+            self.parameters_dict['swap_path'] = self._determine_swap_route(
                 self.parameters_dict['start_token_address'],
                 self.parameters_dict['collateral_address']
-            )[0]
+            )
 
     def _handle_missing_is_long(self):
         """
@@ -289,9 +256,7 @@ class OrderArgumentParser:
         if self.parameters_dict['market_key'] == "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f":
             market_key = "0x47c031236e19d024b42f8AE6780E44A573170703"
 
-        market = Markets(
-            self.config
-        ).get_available_markets()[market_key]
+        market = self._get_markets().info[market_key]
 
         # if collateral address doesnt match long or short token address, no bueno
         if collateral_address == market['long_token_address'] or \
@@ -301,6 +266,33 @@ class OrderArgumentParser:
             return True
             raise Exception("Not a valid collateral for selected market!")
 
+    def _get_token_resolver(self):
+        return get_token_resolver(self.parameters_dict['chain'])
+
+    def _get_markets(self):
+        # Markets are loaded at most once per parser
+        if self._markets is None:
+            self._markets = Markets(self.config)
+
+        return self._markets
+
+    def _get_oracle_prices(self):
+        # Prices are loaded at most once per parser
+        if self._prices is None:
+            self._prices = OraclePrices(
+                chain=self.parameters_dict['chain']
+            ).get_price_table()
+
+        return self._prices
+
+    def _determine_swap_route(self, start_token_address: str, out_token_address: str):
+        # function returns swap route as a list [0] and a bool if there is a multi swap [1]
+        return determine_swap_route(
+            self._get_markets().registry,
+            start_token_address,
+            out_token_address
+        )[0]
+
     @staticmethod
     def find_key_by_symbol(input_dict: dict, search_symbol: str):
         """
@@ -393,16 +385,7 @@ class OrderArgumentParser:
         """
 
         initial_collateral_delta_amount = self.parameters_dict['initial_collateral_delta']
-        prices = OraclePrices(chain=self.parameters_dict['chain']).get_recent_prices()
-        price = np.median(
-            [float(prices[self.parameters_dict["start_token_address"]]['maxPriceFull']),
-             float(prices[self.parameters_dict["start_token_address"]]['minPriceFull'])]
-        )
-        oracle_factor = get_tokens_address_dict(
-            self.parameters_dict['chain']
-        )[self.parameters_dict["start_token_address"]]['decimals'] - 30
-
-        price = price * 10 ** oracle_factor
+        price = self._get_oracle_prices().usd(self.parameters_dict["start_token_address"])
 
         return price * initial_collateral_delta_amount
 
@@ -417,16 +400,7 @@ class OrderArgumentParser:
 
         """
 
-        prices = OraclePrices(chain=self.parameters_dict['chain']).get_recent_prices()
-        price = np.median(
-            [float(prices[self.parameters_dict["start_token_address"]]['maxPriceFull']),
-             float(prices[self.parameters_dict["start_token_address"]]['minPriceFull'])]
-        )
-        oracle_factor = get_tokens_address_dict(
-            self.parameters_dict['chain']
-        )[self.parameters_dict["start_token_address"]]['decimals'] - 30
-
-        price = price * 10 ** oracle_factor
+        price = self._get_oracle_prices().usd(self.parameters_dict["start_token_address"])
 
         return collateral_usd / price
 
@@ -444,23 +418,30 @@ class OrderArgumentParser:
                 self.parameters_dict["size_delta_usd"] * 10**30)
 
         # Each token has its a specific decimal factor that needs to be applied
-        decimal = get_tokens_address_dict(
-            self.parameters_dict['chain']
-        )[self.parameters_dict["start_token_address"]]['decimals']
+        decimal = self._get_token_resolver().decimals(
+            self.parameters_dict["start_token_address"]
+        )
         self.parameters_dict["initial_collateral_delta"] = int(
             self.parameters_dict["initial_collateral_delta"] * 10**decimal
         )
 
-    def _check_if_max_leverage_exceeded(self):
+    def _check_if_max_leverage_exceeded(self, collateral_usd_value: float = None):
         """
         Using collateral tokens and size_delta calculate the requested leverage size and raise
         exception if this exceeds x100.
 
+        Parameters
+        ----------
+        collateral_usd_value : float, optional
+            USD value of initial collateral delta if already known. The default is None.
+
         """
 
-        collateral_usd_value = self._calculate_initial_collateral_usd
+        if collateral_usd_value is None:
+            collateral_usd_value = self._calculate_initial_collateral_usd()
+
         leverage_requested = self.parameters_dict["size_delta_usd"] / \
-            collateral_usd_value()
+            collateral_usd_value
 
         # TODO - leverage is now a contract parameter and needs to be queried
         max_leverage = 100
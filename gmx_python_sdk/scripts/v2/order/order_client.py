@@ -0,0 +1,530 @@
+import logging
+import threading
+import time
+
+from .create_decrease_order import DecreaseOrder
+from .create_increase_order import IncreaseOrder
+from .create_swap_order import SwapOrder
+from .simulation import simulate_orders
+from ..approve_token_for_spend import get_allowance_cache, get_approval_planner
+from ..fee_oracle import get_fee_oracle
+from ..gas_utils import get_gas_parameters
+from ..get.get_markets import Markets
+from ..get.get_oracle_prices import OraclePrices
+from ..gmx_utils import (
+    create_connection, get_contract_object, contract_map,
+    convert_to_checksum_address, get_native_token_address
+)
+from ..tracing import get_tracer
+
+
+class _ClientOrderMixin:
+    """
+    Routes the data an Order would fetch for itself to the warmed state held
+    by an OrderClient. Must come before the Order subclass in the MRO.
+    """
+
+    def __init__(self, client, broadcast: bool, *args, **kwargs):
+        self._client = client
+        self._broadcast = broadcast
+        super().__init__(client.config, *args, **kwargs)
+
+    def _get_connection(self):
+        return self._client.connection
+
+    def _get_exchange_router_contract(self):
+        return self._client.exchange_router_contract_obj
+
+    def _get_fee_oracle(self):
+        return self._client.fee_oracle
+
+    def _get_markets(self):
+        return self._client.get_markets()
+
+    def _get_oracle_prices(self):
+        return self._client.get_prices()
+
+    def _get_nonce(self, wallet_address: str):
+        # Placeholder for the build, the nonce is reserved when signing
+        return self._client.get_nonce()
+
+    def _get_reader_contract(self):
+        return self._client.reader_contract_obj
+
+    def _sign_transaction(self, raw_txn: dict):
+        if not self._broadcast:
+            return super()._sign_transaction(raw_txn)
+
+        # Taken at sign time so concurrent builds never share a nonce
+        raw_txn['nonce'] = self._client.reserve_nonce()
+        try:
+            return super()._sign_transaction(raw_txn)
+        except Exception:
+            self._client.sync_nonce()
+            raise
+
+    def _send_transaction(self, signed_txn):
+        if not self._broadcast:
+            return None
+
+        return self._client.send_transaction(signed_txn)
+
+    def check_for_approval(self):
+        self._client.ensure_allowance(
+            self.collateral_address,
+            self.initial_collateral_delta_amount,
+            approve=self._broadcast
+        )
+
+
+class _ClientIncreaseOrder(_ClientOrderMixin, IncreaseOrder):
+    pass
+
+
+class _ClientDecreaseOrder(_ClientOrderMixin, DecreaseOrder):
+    pass
+
+
+class _ClientSwapOrder(_ClientOrderMixin, SwapOrder):
+
+    def __init__(self, client, broadcast: bool, start_token: str, out_token: str,
+                 *args, **kwargs):
+        self._client = client
+        self._broadcast = broadcast
+        SwapOrder.__init__(self, start_token, out_token, client.config, *args, **kwargs)
+
+
+class OrderClient:
+    """
+    Long lived session for placing orders with low latency. Everything that
+    does not depend on the order itself (connection, contracts, markets, gas
+    limits, fee oracle, nonce, allowances and a recent oracle price snapshot)
+    is loaded once by warm() and kept fresh, so increase(), decrease() and
+    swap() only do the order specific work.
+    """
+
+    def __init__(
+        self, config, price_refresh_interval: float = 1,
+        market_refresh_interval: float = 300, urgency: str = "medium"
+    ):
+        self.config = config
+        self.price_refresh_interval = price_refresh_interval
+        self.market_refresh_interval = market_refresh_interval
+        self.urgency = urgency
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.connection = None
+        self.exchange_router_contract_obj = None
+        self.reader_contract_obj = None
+        self.gas_parameters = None
+        self.fee_oracle = None
+
+        self._markets = None
+        self._market_registry = None
+        self._markets_updated = 0
+        self._prices = None
+        self._prices_updated = 0
+        self._nonce = None
+        self.allowance_cache = get_allowance_cache(config)
+        self.approval_planner = get_approval_planner(config)
+
+        self._lock = threading.Lock()
+        self._nonce_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def warm(self, tokens: list = None):
+        """
+        Load everything order independent. Pass the collateral tokens you
+        intend to use to load their balances and allowances up front in a
+        single multicall.
+
+        Parameters
+        ----------
+        tokens : list, optional
+            token addresses to load balances and allowances for. The default
+            is None.
+
+        Returns
+        -------
+        self
+
+        """
+        self.connection = create_connection(self.config)
+        self.exchange_router_contract_obj = get_contract_object(
+            self.connection,
+            'exchangerouter',
+            self.config.chain
+        )
+        self.reader_contract_obj = get_contract_object(
+            self.connection,
+            'syntheticsreader',
+            self.config.chain
+        )
+
+        self.gas_parameters = get_gas_parameters(self.config)
+        self.gas_parameters.get_gas_limits()
+        self.fee_oracle = get_fee_oracle(self.config)
+
+        self._refresh_markets()
+        self._refresh_prices()
+        self.sync_nonce()
+
+        if tokens:
+            self.allowance_cache.load(
+                self.config.user_wallet_address,
+                tokens,
+                [self._get_spender()]
+            )
+
+        return self
+
+    def start(self):
+        """
+        Keep prices and markets fresh from a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="OrderClient-{}".format(self.config.chain),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def increase(
+        self, market_key: str, collateral_address: str,
+        index_token_address: str, is_long: bool, size_delta: int,
+        initial_collateral_delta_amount: int, slippage_percent: float,
+        swap_path: list, broadcast: bool = True, preflight: bool = False,
+        correlation_id: str = None
+    ):
+        """
+        Open or increase a position
+
+        Parameters match IncreaseOrder. Pass broadcast=False to build and sign
+        without sending, and preflight=True to simulate keeper execution
+        first and raise a SimulationError instead of sending if it would
+        revert. Stages are traced under correlation_id, a new one
+        if not given.
+
+        Returns
+        -------
+        IncreaseOrder
+            the built order with raw_txn, signed_txn and tx_hash set.
+
+        """
+        return _ClientIncreaseOrder(
+            self,
+            broadcast,
+            market_key,
+            collateral_address,
+            index_token_address,
+            is_long,
+            size_delta,
+            initial_collateral_delta_amount,
+            slippage_percent,
+            swap_path,
+            urgency=self.urgency,
+            preflight=preflight,
+            correlation_id=correlation_id
+        )
+
+    def decrease(
+        self, market_key: str, collateral_address: str,
+        index_token_address: str, is_long: bool, size_delta: int,
+        initial_collateral_delta_amount: int, slippage_percent: float,
+        swap_path: list, broadcast: bool = True, preflight: bool = False,
+        correlation_id: str = None
+    ):
+        """
+        Close or decrease a position
+
+        Parameters match DecreaseOrder. Pass broadcast=False to build and sign
+        without sending, and preflight=True to simulate keeper execution
+        first and raise a SimulationError instead of sending if it would
+        revert. Stages are traced under correlation_id, a new one
+        if not given.
+
+        Returns
+        -------
+        DecreaseOrder
+            the built order with raw_txn, signed_txn and tx_hash set.
+
+        """
+        return _ClientDecreaseOrder(
+            self,
+            broadcast,
+            market_key,
+            collateral_address,
+            index_token_address,
+            is_long,
+            size_delta,
+            initial_collateral_delta_amount,
+            slippage_percent,
+            swap_path,
+            urgency=self.urgency,
+            preflight=preflight,
+            correlation_id=correlation_id
+        )
+
+    def swap(
+        self, start_token: str, out_token: str,
+        initial_collateral_delta_amount: int, slippage_percent: float,
+        swap_path: list, broadcast: bool = True, preflight: bool = False,
+        correlation_id: str = None
+    ):
+        """
+        Swap start_token into out_token through swap_path
+
+        Parameters match SwapOrder. Pass broadcast=False to build and sign
+        without sending, and preflight=True to simulate keeper execution
+        first and raise a SimulationError instead of sending if it would
+        revert. Stages are traced under correlation_id, a new one
+        if not given.
+
+        Returns
+        -------
+        SwapOrder
+            the built order with raw_txn, signed_txn and tx_hash set.
+
+        """
+        return _ClientSwapOrder(
+            self,
+            broadcast,
+            start_token,
+            out_token,
+            swap_path[-1],
+            start_token,
+            out_token,
+            False,
+            0,
+            initial_collateral_delta_amount,
+            slippage_percent,
+            swap_path,
+            urgency=self.urgency,
+            preflight=preflight,
+            correlation_id=correlation_id
+        )
+
+    def simulate(self, orders: list, max_workers: int = None) -> list:
+        """
+        Simulate keeper execution of a batch of orders built with
+        broadcast=False concurrently
+
+        Parameters
+        ----------
+        orders : list
+            list of built orders.
+        max_workers : int, optional
+            number of concurrent simulations. The default is None.
+
+        Returns
+        -------
+        list
+            SimulationError for each order that would revert, None for each
+            order that would execute.
+
+        """
+        return simulate_orders(orders, max_workers)
+
+    def submit(self, order):
+        """
+        Sign an order built with broadcast=False at a freshly reserved nonce
+        and send it, eg once it has passed simulate()
+
+        Parameters
+        ----------
+        order : Order
+            built order.
+
+        Returns
+        -------
+        tx_hash
+
+        """
+        with get_tracer().start_span(
+            "submit", trace_id=order.correlation_id
+        ) as span:
+            order.raw_txn['nonce'] = self.reserve_nonce()
+            with get_tracer().start_span("sign", parent=span):
+                try:
+                    order.signed_txn = order._sign_transaction(order.raw_txn)
+                except Exception:
+                    self.sync_nonce()
+                    raise
+            with get_tracer().start_span("broadcast", parent=span):
+                order.tx_hash = self.send_transaction(order.signed_txn)
+
+        if not isinstance(order, DecreaseOrder):
+            self.allowance_cache.record_spend(
+                self.config.user_wallet_address,
+                order.collateral_address,
+                self._get_spender(),
+                order.initial_collateral_delta_amount
+            )
+
+        return order.tx_hash
+
+    def get_markets(self) -> dict:
+        if time.time() - self._markets_updated > self.market_refresh_interval:
+            self._refresh_markets()
+
+        return self._markets
+
+    def get_market_registry(self):
+        """
+        MarketRegistry of the warmed markets, for O(1) lookups by index
+        token, symbol or token pair
+        """
+        self.get_markets()
+
+        return self._market_registry
+
+    def get_prices(self) -> dict:
+        if time.time() - self._prices_updated > self.price_refresh_interval:
+            self._refresh_prices()
+
+        return self._prices
+
+    def get_nonce(self) -> int:
+        with self._nonce_lock:
+            return self._nonce
+
+    def reserve_nonce(self) -> int:
+        """
+        Take the next nonce for a transaction about to be signed, so
+        concurrent submissions never sign with the same one. Loaded from the
+        chain on first use if warm() has not run.
+        """
+        if self._nonce is None:
+            if self.connection is None:
+                self.connection = create_connection(self.config)
+            nonce = self._get_chain_nonce()
+
+            # Another thread may have loaded and reserved from it meanwhile
+            with self._nonce_lock:
+                if self._nonce is None:
+                    self._nonce = nonce
+
+        with self._nonce_lock:
+            nonce = self._nonce
+            self._nonce += 1
+
+        return nonce
+
+    def sync_nonce(self):
+        """
+        Reload the nonce from the chain, eg after a transaction failed
+        """
+        nonce = self._get_chain_nonce()
+
+        with self._nonce_lock:
+            self._nonce = nonce
+
+    def _get_chain_nonce(self) -> int:
+        wallet_address = convert_to_checksum_address(
+            self.config,
+            self.config.user_wallet_address
+        )
+        return self.connection.eth.get_transaction_count(
+            wallet_address,
+            'pending'
+        )
+
+    def send_transaction(self, signed_txn):
+        """
+        Broadcast a transaction signed at a nonce from reserve_nonce,
+        reloading the nonce from the chain if it fails
+
+        """
+        try:
+            return self.connection.eth.send_raw_transaction(
+                signed_txn.rawTransaction
+            )
+        except Exception:
+            self.sync_nonce()
+            raise
+
+    def ensure_allowance(self, token: str, amount: int, approve: bool = True):
+        """
+        Make sure the router can spend amount of token. Balances and
+        allowances are served from the allowance cache and approvals are
+        sent by the shared approval planner.
+
+        Parameters
+        ----------
+        token : str
+            address of token to spend.
+        amount : int
+            amount of tokens in expanded decimals.
+        approve : bool, optional
+            send an approval if needed. The default is True.
+
+        """
+        token = convert_to_checksum_address(self.config, token)
+        if token == get_native_token_address(self.config.chain):
+            return
+
+        if not approve:
+            allowance = self.allowance_cache.get_allowance(
+                self.config.user_wallet_address,
+                token,
+                self._get_spender()
+            )
+            if allowance < amount:
+                self.log.warning(
+                    "Allowance for {} is below {}, not approving".format(
+                        token, amount
+                    )
+                )
+            return
+
+        tx_hash = self.approval_planner.ensure_approved(
+            self._get_spender(),
+            token,
+            amount,
+            self.fee_oracle.get_max_fee_per_gas(self.urgency)
+        )
+
+        # approval transaction consumes a nonce
+        if tx_hash is not None:
+            self.sync_nonce()
+
+    def _get_spender(self):
+        return contract_map[self.config.chain]["syntheticsrouter"]['contract_address']
+
+    def _refresh_markets(self):
+        markets = Markets(self.config)
+
+        with self._lock:
+            self._markets = markets.info
+            self._market_registry = markets.registry
+            self._markets_updated = time.time()
+
+    def _refresh_prices(self):
+        prices = OraclePrices(chain=self.config.chain).get_price_table()
+
+        with self._lock:
+            self._prices = prices
+            self._prices_updated = time.time()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._refresh_prices()
+                if time.time() - self._markets_updated > self.market_refresh_interval:
+                    self._refresh_markets()
+            except Exception as e:
+                self.log.warning("OrderClient refresh failed: {}".format(e))
+
+            self._stop_event.wait(self.price_refresh_interval)
@@ -0,0 +1,356 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_abi import decode
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+from ..gmx_utils import (
+    base_dir, contract_map, create_hash, get_contract_object,
+    convert_to_checksum_address
+)
+from ..keys import nonce_key
+
+# Every simulateExecute* call reverts, this error means execution succeeded
+END_OF_SIMULATION_ERROR = "EndOfOracleSimulation"
+
+ERROR_STRING_SELECTOR = Web3.keccak(text="Error(string)")[:4]
+PANIC_SELECTOR = Web3.keccak(text="Panic(uint256)")[:4]
+
+
+class SimulationError(Exception):
+    """
+    Keeper execution of an order would revert
+
+    Attributes
+    ----------
+    error_name : str
+        name of the contract error, or Error/Panic for plain reverts.
+    error_args : dict
+        decoded arguments of the error keyed by name.
+    revert_data : str
+        raw revert data as hex.
+    """
+
+    def __init__(self, error_name: str, error_args: dict = None,
+                 revert_data: str = None):
+        self.error_name = error_name
+        self.error_args = error_args or {}
+        self.revert_data = revert_data
+
+        super().__init__(
+            "{}({})".format(
+                error_name,
+                ", ".join(
+                    "{}={}".format(k, v) for k, v in self.error_args.items()
+                )
+            )
+        )
+
+
+class OrderNotFulfillableError(SimulationError):
+    pass
+
+
+class InsufficientLiquidityError(SimulationError):
+    pass
+
+
+class InsufficientCollateralError(SimulationError):
+    pass
+
+
+class InsufficientOutputError(SimulationError):
+    pass
+
+
+class InsufficientExecutionFeeError(SimulationError):
+    pass
+
+
+class OraclePriceError(SimulationError):
+    pass
+
+
+ERROR_TYPES = {
+    "OrderNotFulfillableAtAcceptablePrice": OrderNotFulfillableError,
+    "PriceImpactLargerThanOrderSize": OrderNotFulfillableError,
+    "InsufficientReserve": InsufficientLiquidityError,
+    "InsufficientReserveForOpenInterest": InsufficientLiquidityError,
+    "MaxOpenInterestExceeded": InsufficientLiquidityError,
+    "MaxPoolAmountExceeded": InsufficientLiquidityError,
+    "InsufficientPoolAmount": InsufficientLiquidityError,
+    "InsufficientCollateralAmount": InsufficientCollateralError,
+    "InsufficientCollateralUsd": InsufficientCollateralError,
+    "LiquidatablePosition": InsufficientCollateralError,
+    "MinPositionSize": InsufficientCollateralError,
+    "EmptyPosition": InsufficientCollateralError,
+    "InsufficientOutputAmount": InsufficientOutputError,
+    "InsufficientSwapOutputAmount": InsufficientOutputError,
+    "MinMarketTokens": InsufficientOutputError,
+    "MinLongTokens": InsufficientOutputError,
+    "MinShortTokens": InsufficientOutputError,
+    "InsufficientExecutionFee": InsufficientExecutionFeeError,
+    "InsufficientWntAmountForExecutionFee": InsufficientExecutionFeeError,
+    "OracleTimestampsAreSmallerThanRequired": OraclePriceError,
+}
+
+_error_abis = None
+
+
+def _get_error_abis() -> dict:
+    """
+    Map of 4 byte selector to error abi, built from the exchange router abi
+    and the common GMX errors it does not declare
+
+    """
+    global _error_abis
+
+    if _error_abis is None:
+        error_abis = {}
+        for abi_path in [
+            contract_map['arbitrum']['exchangerouter']['abi_path'],
+            'contracts/gmx_errors.json'
+        ]:
+            abi = json.load(
+                open(os.path.join(base_dir, 'gmx_python_sdk', abi_path))
+            )
+            for entry in abi:
+                if entry['type'] != 'error':
+                    continue
+                signature = "{}({})".format(
+                    entry['name'],
+                    ",".join(i['type'] for i in entry['inputs'])
+                )
+                error_abis[Web3.keccak(text=signature)[:4]] = entry
+
+        _error_abis = error_abis
+
+    return _error_abis
+
+
+def decode_simulation_error(revert_data) -> SimulationError:
+    """
+    Decode revert data from a simulation into a typed error
+
+    Parameters
+    ----------
+    revert_data : str or bytes
+        revert data as returned by the node.
+
+    Returns
+    -------
+    SimulationError or None
+        None if the simulation reached EndOfOracleSimulation, ie the order
+        would execute.
+
+    """
+    revert_data = HexBytes(revert_data)
+    selector = bytes(revert_data[:4])
+
+    if selector == ERROR_STRING_SELECTOR:
+        (reason,) = decode(["string"], revert_data[4:])
+        return SimulationError("Error", {"reason": reason}, Web3.to_hex(revert_data))
+
+    if selector == PANIC_SELECTOR:
+        (code,) = decode(["uint256"], revert_data[4:])
+        return SimulationError("Panic", {"code": hex(code)}, Web3.to_hex(revert_data))
+
+    error_abi = _get_error_abis().get(selector)
+    if error_abi is None:
+        return SimulationError("Unknown", {}, Web3.to_hex(revert_data))
+
+    if error_abi['name'] == END_OF_SIMULATION_ERROR:
+        return None
+
+    values = decode([i['type'] for i in error_abi['inputs']], revert_data[4:])
+    error_args = {
+        i['name']: value for i, value in zip(error_abi['inputs'], values)
+    }
+
+    return ERROR_TYPES.get(error_abi['name'], SimulationError)(
+        error_abi['name'],
+        error_args,
+        Web3.to_hex(revert_data)
+    )
+
+
+def get_next_key(connection, chain: str, block_identifier="latest") -> bytes:
+    """
+    Key the next order, deposit or withdrawal created on a chain will be
+    stored under, keccak256(abi.encode(dataStore, nonce + 1))
+
+    Parameters
+    ----------
+    connection : web3_obj
+        web3 connection.
+    chain : str
+        arbitrum or avalanche.
+    block_identifier : str or int, optional
+        block to read the nonce at. The default is "latest".
+
+    """
+    datastore_contract_obj = get_contract_object(
+        connection, 'datastore', chain, trimmed=True
+    )
+    nonce = datastore_contract_obj.functions.getUint(nonce_key()).call(
+        block_identifier=block_identifier
+    )
+
+    return create_hash(
+        ["address", "uint256"],
+        [datastore_contract_obj.address, nonce + 1]
+    )
+
+
+def get_simulation_prices(market_keys: list, markets: dict, prices: dict) -> tuple:
+    """
+    Build the SimulatePricesParams for every token used by a set of markets
+    from a signed oracle price snapshot
+
+    Parameters
+    ----------
+    market_keys : list
+        addresses of the markets touched, including any swap path.
+    markets : dict
+        dictionary of markets as returned by Markets.get_available_markets.
+    prices : dict
+        dictionary of prices as returned by OraclePrices.get_recent_prices.
+
+    Returns
+    -------
+    tuple
+        (primaryTokens, primaryPrices).
+
+    """
+    tokens = []
+    for market_key in market_keys:
+        market = markets[market_key]
+        for token in [
+            market['index_token_address'],
+            market['long_token_address'],
+            market['short_token_address']
+        ]:
+            if token in prices and token not in tokens:
+                tokens.append(token)
+
+    primary_prices = [
+        (int(prices[token]['minPriceFull']), int(prices[token]['maxPriceFull']))
+        for token in tokens
+    ]
+
+    return tokens, primary_prices
+
+
+def simulate_execution(
+    config, connection, exchange_router_contract_obj, multicall_args: list,
+    value_amount: int, function_name: str, market_keys: list, markets: dict,
+    prices: dict
+):
+    """
+    eth_call the exchange router multicall that creates a request followed
+    by the matching simulateExecute* call at the given oracle prices. The
+    request key and the call are both taken at the same block.
+
+    Parameters
+    ----------
+    config : ConfigManager
+        config object for the chain.
+    connection : web3_obj
+        web3 connection.
+    exchange_router_contract_obj : web3_obj
+        exchange router contract object.
+    multicall_args : list
+        encoded calls of the multicall which creates the request.
+    value_amount : int
+        value sent with the multicall.
+    function_name : str
+        simulateExecuteOrder, simulateExecuteDeposit or
+        simulateExecuteWithdrawal.
+    market_keys : list
+        addresses of the markets touched, including any swap path.
+    markets : dict
+        dictionary of markets.
+    prices : dict
+        dictionary of oracle prices.
+
+    Raises
+    ------
+    SimulationError
+        keeper execution would revert.
+
+    """
+    # Pin one block so no other request can take the key in between
+    block_number = connection.eth.block_number
+    key = get_next_key(connection, config.chain, block_number)
+    primary_tokens, primary_prices = get_simulation_prices(
+        market_keys,
+        markets,
+        prices
+    )
+
+    simulate_call = exchange_router_contract_obj.encodeABI(
+        fn_name=function_name,
+        args=[key, (primary_tokens, primary_prices)]
+    )
+
+    transaction = {
+        'from': convert_to_checksum_address(
+            config,
+            config.user_wallet_address
+        ),
+        'to': exchange_router_contract_obj.address,
+        'value': value_amount,
+        'data': exchange_router_contract_obj.encodeABI(
+            fn_name="multicall",
+            args=[multicall_args + [HexBytes(simulate_call)]]
+        )
+    }
+
+    try:
+        connection.eth.call(transaction, block_number)
+    except ContractLogicError as e:
+        revert_data = e.data
+        if isinstance(revert_data, dict):
+            revert_data = revert_data.get('data')
+
+        if not revert_data:
+            raise SimulationError("Error", {"reason": e.message})
+
+        error = decode_simulation_error(revert_data)
+        if error is not None:
+            raise error
+
+
+def simulate_orders(orders: list, max_workers: int = None) -> list:
+    """
+    Simulate a batch of built orders concurrently. Each order must have
+    been built without broadcasting, eg with debug_mode=True or through
+    OrderClient with broadcast=False
+
+    Parameters
+    ----------
+    orders : list
+        list of built Order, Deposit or Withdraw objects.
+    max_workers : int, optional
+        number of concurrent simulations. The default is None.
+
+    Returns
+    -------
+    list
+        SimulationError for each order that would revert, None for each order
+        that would execute, in the same order as given.
+
+    """
+    def _simulate(order):
+        try:
+            order.simulate()
+        except SimulationError as e:
+            return e
+
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_simulate, orders))
@@ -0,0 +1,321 @@
+import os
+import time
+
+import numpy as np
+
+from .gmx_utils import package_dir
+
+DEFAULT_RESOLUTIONS = [1, 60, 300]
+FLUSH_BATCH_SIZE = 1000
+
+# Prices are oracle mid prices per smallest token unit, spread the widest
+# max - min seen in the bar
+BAR_DTYPE = np.dtype([
+    ('start', '<f8'),
+    ('resolution', '<u4'),
+    ('token_id', '<u4'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('spread', '<f8'),
+    ('count', '<u4')
+])
+
+# Positions in the open bar lists
+START, OPEN, HIGH, LOW, CLOSE, SPREAD, COUNT = range(7)
+
+
+class BarAggregator:
+    """
+    Build OHLC and spread bars of the oracle mid price for every token at
+    several resolutions at once. Live updates cost O(1) per resolution:
+
+        bars = BarAggregator(sink=csv_bar_sink("arbitrum"))
+        get_price_streamer("arbitrum").subscribe(bars.update_changes)
+
+    and a stored PriceHistory is backfilled in one vectorized pass per
+    resolution, leaving the latest bars open for live updates to continue:
+
+        bars.backfill(PriceHistory("arbitrum", readonly=True))
+
+    A bar closes when an update for its token lands in a later bar, or on
+    close_until. Closed bars are passed to sink in batches of batch_size as
+    BAR_DTYPE arrays. Buckets without updates produce no bar.
+
+    Parameters
+    ----------
+    resolutions : list, optional
+        bar lengths in seconds. The default is DEFAULT_RESOLUTIONS.
+    sink : callable, optional
+        function taking a BAR_DTYPE array and the token addresses its
+        token_id column indexes. The default is None, keep closed bars in
+        closed.
+    batch_size : int, optional
+        closed bars buffered before calling sink. The default is
+        FLUSH_BATCH_SIZE.
+    """
+
+    def __init__(
+        self, resolutions: list = None, sink=None,
+        batch_size: int = FLUSH_BATCH_SIZE
+    ):
+        self.resolutions = sorted(resolutions or DEFAULT_RESOLUTIONS)
+        self.sink = sink
+        self.batch_size = batch_size
+
+        self.token_addresses = []
+        self.token_ids = {}
+        self.closed = []
+
+        # Open bar of each token per resolution, as lists indexed by START..
+        self._open_bars = {resolution: {} for resolution in self.resolutions}
+        self._pending = []
+
+    def update(
+        self, address: str, min_price: float, max_price: float,
+        timestamp: float = None
+    ):
+        """
+        Add one price update, timestamps per token must not go backwards
+
+        Parameters
+        ----------
+        address : str
+            token address.
+        min_price : float
+            oracle min price.
+        max_price : float
+            oracle max price.
+        timestamp : float, optional
+            unix time of the update. The default is None, now.
+
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        token_id = self._get_token_id(address)
+        mid = (min_price + max_price) / 2
+        spread = max_price - min_price
+
+        for resolution in self.resolutions:
+            start = timestamp - timestamp % resolution
+            open_bars = self._open_bars[resolution]
+            bar = open_bars.get(token_id)
+
+            if bar is None or bar[START] != start:
+                if bar is not None:
+                    self._close(resolution, token_id, bar)
+                open_bars[token_id] = [start, mid, mid, mid, mid, spread, 1]
+                continue
+
+            if mid > bar[HIGH]:
+                bar[HIGH] = mid
+            elif mid < bar[LOW]:
+                bar[LOW] = mid
+            bar[CLOSE] = mid
+            if spread > bar[SPREAD]:
+                bar[SPREAD] = spread
+            bar[COUNT] += 1
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def update_changes(self, changes: dict):
+        """
+        Add raw API entries keyed by token address, as published by a
+        PriceStreamer, stamped with the time received
+        """
+        now = time.time()
+        for address, entry in changes.items():
+            self.update(
+                address,
+                float(entry['minPriceFull']),
+                float(entry['maxPriceFull']),
+                timestamp=now
+            )
+
+    def close_until(self, timestamp: float = None):
+        """
+        Close every open bar that ends at or before timestamp, eg from a
+        timer so quiet tokens still emit bars. The default is now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        for resolution, open_bars in self._open_bars.items():
+            for token_id in [
+                token_id for token_id, bar in open_bars.items()
+                if bar[START] + resolution <= timestamp
+            ]:
+                self._close(resolution, token_id, open_bars.pop(token_id))
+
+        self.flush()
+
+    def open_bars(self, resolution: int) -> np.ndarray:
+        """
+        Bars still being built at a resolution, as a BAR_DTYPE array
+        """
+        return self._to_array([
+            (resolution, token_id, bar)
+            for token_id, bar in self._open_bars[resolution].items()
+        ])
+
+    def flush(self):
+        """
+        Pass the closed bars buffered so far to sink
+        """
+        if len(self._pending) == 0:
+            return
+
+        bars = self._to_array(self._pending)
+        self._pending = []
+
+        if self.sink is None:
+            self.closed.append(bars)
+        else:
+            self.sink(bars, self.token_addresses)
+
+    def backfill(self, history, since: float = None, until: float = None):
+        """
+        Build bars from a PriceHistory in one vectorized pass per
+        resolution. Call before live updates, bars already open are
+        replaced.
+
+        Parameters
+        ----------
+        history : PriceHistory
+            stored price records.
+        since : float, optional
+            unix time to start from. The default is None, the oldest record.
+        until : float, optional
+            unix time to stop before. The default is None, the newest record.
+
+        """
+        records = history.window(since=since, until=until)
+        if len(records) == 0:
+            return
+
+        # Map the token ids of the history file onto ours
+        history_ids = np.array(
+            [
+                self._get_token_id(address)
+                for address in history.token_addresses
+            ],
+            dtype=np.uint32
+        )
+        token_ids = history_ids[records['token_id']]
+        timestamps = records['timestamp']
+        mids = (records['min'] + records['max']) / 2
+        spreads = records['max'] - records['min']
+
+        for resolution in self.resolutions:
+            starts = timestamps - timestamps % resolution
+
+            # Stable sort keeps updates in time order within each bar
+            order = np.lexsort((starts, token_ids))
+            sorted_ids = token_ids[order]
+            sorted_starts = starts[order]
+            sorted_mids = mids[order]
+
+            boundaries = np.flatnonzero(
+                (np.diff(sorted_ids) != 0) | (np.diff(sorted_starts) != 0)
+            ) + 1
+            firsts = np.concatenate([[0], boundaries])
+            lasts = np.concatenate([boundaries, [len(order)]]) - 1
+
+            bars = np.empty(len(firsts), dtype=BAR_DTYPE)
+            bars['start'] = sorted_starts[firsts]
+            bars['resolution'] = resolution
+            bars['token_id'] = sorted_ids[firsts]
+            bars['open'] = sorted_mids[firsts]
+            bars['high'] = np.maximum.reduceat(sorted_mids, firsts)
+            bars['low'] = np.minimum.reduceat(sorted_mids, firsts)
+            bars['close'] = sorted_mids[lasts]
+            bars['spread'] = np.maximum.reduceat(spreads[order], firsts)
+            bars['count'] = lasts - firsts + 1
+
+            # The newest bar of each token stays open for live updates
+            is_latest = np.ones(len(bars), dtype=bool)
+            is_latest[:-1] = bars['token_id'][1:] != bars['token_id'][:-1]
+
+            open_bars = self._open_bars[resolution]
+            for bar in bars[is_latest]:
+                open_bars[int(bar['token_id'])] = [
+                    float(bar['start']), float(bar['open']), float(bar['high']),
+                    float(bar['low']), float(bar['close']), float(bar['spread']),
+                    int(bar['count'])
+                ]
+
+            self.flush()
+            closed = bars[~is_latest]
+            if len(closed) > 0:
+                if self.sink is None:
+                    self.closed.append(closed)
+                else:
+                    self.sink(closed, self.token_addresses)
+
+    def _get_token_id(self, address: str) -> int:
+        if address not in self.token_ids:
+            self.token_ids[address] = len(self.token_addresses)
+            self.token_addresses.append(address)
+
+        return self.token_ids[address]
+
+    def _close(self, resolution: int, token_id: int, bar: list):
+        self._pending.append((resolution, token_id, bar))
+
+    @staticmethod
+    def _to_array(bars: list) -> np.ndarray:
+        return np.array(
+            [
+                (
+                    bar[START], resolution, token_id, bar[OPEN], bar[HIGH],
+                    bar[LOW], bar[CLOSE], bar[SPREAD], bar[COUNT]
+                )
+                for resolution, token_id, bar in bars
+            ],
+            dtype=BAR_DTYPE
+        )
+
+
+def csv_bar_sink(chain: str, filename: str = None):
+    """
+    Sink for BarAggregator appending closed bars to a csv in data_store
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    filename : str, optional
+        csv name. The default is None, "<chain>_price_bars.csv".
+
+    Returns
+    -------
+    callable
+        sink function.
+
+    """
+    filepath = os.path.join(
+        package_dir,
+        "data_store",
+        filename or "{}_price_bars.csv".format(chain)
+    )
+
+    def _sink(bars: np.ndarray, token_addresses: list):
+        import pandas as pd
+
+        dataframe = pd.DataFrame(bars)
+        dataframe.insert(
+            2,
+            'token_address',
+            [token_addresses[token_id] for token_id in bars['token_id']]
+        )
+        dataframe.to_csv(
+            filepath,
+            mode='a',
+            header=not os.path.exists(filepath),
+            index=False
+        )
+
+    return _sink
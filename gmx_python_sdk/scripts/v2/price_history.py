@@ -0,0 +1,362 @@
+import os
+import time
+
+import numpy as np
+
+from .gmx_utils import package_dir
+from .token_resolver import get_token_resolver
+
+MAGIC = b"GMXPHIST"
+FORMAT_VERSION = 1
+MAX_TOKENS = 256
+DEFAULT_CAPACITY = 2 ** 20
+PRECISION = 30
+
+TOKEN_DTYPE = np.dtype([
+    ('address', 'S42'),
+    ('decimals', '<i2')
+])
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('record_size', '<u4'),
+    ('capacity', '<u8'),
+    ('sequence', '<u8'),
+    ('token_count', '<u8'),
+    ('tokens', TOKEN_DTYPE, (MAX_TOKENS,))
+])
+
+# Records start on a page boundary after the header
+HEADER_SIZE = 16384
+
+# sequence is 1 + the position of the record in the stream, 0 while being
+# written. Prices are oracle prices per smallest token unit as float64, as
+# 30 decimal fixed point overflows int64.
+RECORD_DTYPE = np.dtype([
+    ('sequence', '<u8'),
+    ('timestamp', '<f8'),
+    ('block', '<i8'),
+    ('min', '<f8'),
+    ('max', '<f8'),
+    ('token_id', '<u4'),
+    ('padding', '<u4')
+])
+
+
+def get_price_history_path(chain: str) -> str:
+    return os.path.join(
+        package_dir,
+        'data_store',
+        '{}_price_history.bin'.format(chain)
+    )
+
+
+class PriceHistory:
+    """
+    Fixed size ring buffer of oracle price records (timestamp, block,
+    token id, min, max) in a memory mapped file per chain. One process
+    writes, eg from a PriceStreamer subscription:
+
+        history = PriceHistory("arbitrum")
+        get_price_streamer("arbitrum").subscribe(history.append_changes)
+
+    and any number of processes read it concurrently without locks, opening
+    it with readonly=True. Every record carries its sequence number, written
+    last, so readers drop records the writer overwrote while they read.
+    Windowed queries binary search the timestamp column of the mapped file,
+    so they cost no parsing and no network:
+
+        timestamps, mids = history.mid(eth_address, seconds=600)
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    path : str, optional
+        file to map. The default is None, the chain file in data_store.
+    capacity : int, optional
+        records kept when creating the file, the oldest are overwritten.
+        The default is DEFAULT_CAPACITY.
+    readonly : bool, optional
+        open an existing file for reading only. The default is False.
+    """
+
+    def __init__(
+        self, chain: str, path: str = None, capacity: int = DEFAULT_CAPACITY,
+        readonly: bool = False
+    ):
+        self.chain = chain
+        self.path = path or get_price_history_path(chain)
+        self.readonly = readonly
+
+        if not os.path.exists(self.path):
+            if readonly:
+                raise Exception("No price history at {}".format(self.path))
+            self._create(capacity)
+
+        mode = "r" if readonly else "r+"
+        self._header = np.memmap(
+            self.path, dtype=HEADER_DTYPE, mode=mode, shape=(1,)
+        )
+        header = self._header[0]
+        if header['magic'] != MAGIC or header['version'] != FORMAT_VERSION \
+                or header['record_size'] != RECORD_DTYPE.itemsize:
+            raise Exception("{} is not a price history file".format(self.path))
+
+        self.capacity = int(header['capacity'])
+        self.records = np.memmap(
+            self.path,
+            dtype=RECORD_DTYPE,
+            mode=mode,
+            offset=HEADER_SIZE,
+            shape=(self.capacity,)
+        )
+
+        self.token_addresses = []
+        self.token_ids = {}
+        self._load_tokens()
+
+    @property
+    def sequence(self) -> int:
+        """
+        Number of records written since the file was created
+        """
+        return int(self._header[0]['sequence'])
+
+    def __len__(self):
+        return min(self.sequence, self.capacity)
+
+    def append(
+        self, address: str, min_price: float, max_price: float,
+        block: int = 0, timestamp: float = None
+    ):
+        """
+        Write one price record, overwriting the oldest once full
+
+        Parameters
+        ----------
+        address : str
+            token address.
+        min_price : float
+            oracle min price.
+        max_price : float
+            oracle max price.
+        block : int, optional
+            block the price was signed at. The default is 0.
+        timestamp : float, optional
+            unix time. The default is None, now. Must not go backwards.
+
+        """
+        if self.readonly:
+            raise Exception("Price history opened readonly")
+
+        token_id = self._get_or_add_token(address)
+        sequence = self.sequence
+        record = self.records[sequence % self.capacity:sequence % self.capacity + 1]
+
+        # Readers drop the record until its sequence is set again
+        record['sequence'] = 0
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['block'] = block
+        record['min'] = min_price
+        record['max'] = max_price
+        record['token_id'] = token_id
+        record['sequence'] = sequence + 1
+
+        self._header['sequence'] = sequence + 1
+
+    def append_changes(self, changes: dict):
+        """
+        Write raw API entries keyed by token address, as published by a
+        PriceStreamer, stamped with the time received
+        """
+        now = time.time()
+        for address, entry in changes.items():
+            self.append(
+                address,
+                float(entry['minPriceFull']),
+                float(entry['maxPriceFull']),
+                block=entry.get('minBlockNumber') or 0,
+                timestamp=now
+            )
+
+    def flush(self):
+        self.records.flush()
+        self._header.flush()
+
+    def views(self, since_sequence: int = None) -> list:
+        """
+        Zero copy views of the mapped records in stream order, at most two
+        as the ring wraps. Records overwritten while in use no longer have
+        the sequence expected at their position.
+
+        Parameters
+        ----------
+        since_sequence : int, optional
+            first sequence number wanted. The default is None, the oldest
+            kept.
+
+        Returns
+        -------
+        list
+            (first sequence number, record view) tuples.
+
+        """
+        end = self.sequence
+        start = max(end - self.capacity, since_sequence or 0)
+        if start >= end:
+            return []
+
+        first = start % self.capacity
+        last = (end - 1) % self.capacity + 1
+        if first < last:
+            return [(start, self.records[first:last])]
+
+        return [
+            (start, self.records[first:]),
+            (start + self.capacity - first, self.records[:last])
+        ]
+
+    def window(
+        self, address: str = None, seconds: float = None, since: float = None,
+        until: float = None
+    ) -> np.ndarray:
+        """
+        Records in a time window, copied out of the mapped file. Records
+        whose sequence is not the one expected at their position, before or
+        after the copy, were being overwritten and are dropped.
+
+        Parameters
+        ----------
+        address : str, optional
+            only records of this token. The default is None, all tokens.
+        seconds : float, optional
+            window ending now, eg 600 for the last 10 minutes. The default is
+            None.
+        since : float, optional
+            unix time the window starts at. The default is None, the oldest
+            record.
+        until : float, optional
+            unix time the window ends before. The default is None, no end.
+
+        Returns
+        -------
+        np.ndarray
+            structured array of RECORD_DTYPE records, oldest first, owning
+            its data.
+
+        """
+        if seconds is not None:
+            since = time.time() - seconds
+
+        token_id = None
+        if address is not None:
+            token_id = self.get_token_id(address)
+            if token_id is None:
+                return np.empty(0, dtype=RECORD_DTYPE)
+
+        selected = []
+        for start, view in self.views():
+            timestamps = view['timestamp']
+            first = 0 if since is None else np.searchsorted(timestamps, since, 'left')
+            last = len(view) if until is None else np.searchsorted(timestamps, until, 'left')
+
+            records = np.array(view[first:last])
+            expected = np.arange(start + first + 1, start + last + 1, dtype=np.uint64)
+
+            # Seqlock check, a record changed during the copy no longer has
+            # the expected sequence once the copy is done
+            valid = records['sequence'] == expected
+            valid &= view['sequence'][first:last] == expected
+            if token_id is not None:
+                valid &= records['token_id'] == token_id
+
+            selected.append(records[valid])
+
+        if len(selected) == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        return np.concatenate(selected)
+
+    def mid(self, address: str, seconds: float = None, since: float = None,
+            until: float = None, usd: bool = True) -> tuple:
+        """
+        Mid price series of a token in a time window
+
+        Parameters
+        ----------
+        address : str
+            token address.
+        seconds, since, until : float, optional
+            window, as in window.
+        usd : bool, optional
+            USD per whole token rather than oracle price. The default is True.
+
+        Returns
+        -------
+        tuple
+            (timestamps, mid prices) arrays.
+
+        """
+        records = self.window(address, seconds=seconds, since=since, until=until)
+        mids = (records['min'] + records['max']) / 2
+
+        if usd and len(records) > 0:
+            decimals = int(self._header[0]['tokens'][records['token_id'][0]]['decimals'])
+            if decimals < 0:
+                raise Exception("Decimals unknown for {}".format(address))
+            mids = mids * 10.0 ** (decimals - PRECISION)
+
+        return records['timestamp'], mids
+
+    def get_token_id(self, address: str) -> int:
+        """
+        Id of a token in this file, or None if it has no records
+        """
+        if address not in self.token_ids:
+            self._load_tokens()
+
+        return self.token_ids.get(address)
+
+    def _get_or_add_token(self, address: str) -> int:
+        if address in self.token_ids:
+            return self.token_ids[address]
+
+        token_id = len(self.token_addresses)
+        if token_id >= MAX_TOKENS:
+            raise Exception("Price history holds at most {} tokens".format(MAX_TOKENS))
+
+        token = get_token_resolver(self.chain).tokens.get(address, {})
+
+        # Written before the count so readers never see a partial entry
+        tokens = self._header['tokens'][0]
+        tokens['address'][token_id] = address.encode()
+        tokens['decimals'][token_id] = token.get('decimals', -1)
+        self._header['token_count'] = token_id + 1
+
+        self.token_addresses.append(address)
+        self.token_ids[address] = token_id
+
+        return token_id
+
+    def _load_tokens(self):
+        header = self._header[0]
+        for token_id in range(len(self.token_addresses), int(header['token_count'])):
+            address = header['tokens'][token_id]['address'].decode()
+            self.token_addresses.append(address)
+            self.token_ids[address] = token_id
+
+    def _create(self, capacity: int):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(self.path, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+
+        header = np.memmap(self.path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        header['magic'] = MAGIC
+        header['version'] = FORMAT_VERSION
+        header['record_size'] = RECORD_DTYPE.itemsize
+        header['capacity'] = capacity
+        header.flush()
+        del header
@@ -0,0 +1,471 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import requests
+
+from .get.get_oracle_prices import OraclePrices
+from .get.oracle_price_table import OraclePriceTable
+from .token_resolver import get_token_resolver
+
+POLL_INTERVAL = 0.25
+
+# Changes queued per connected process before it is dropped as too slow
+CLIENT_QUEUE_SIZE = 100
+
+
+class _ClientSender:
+    """
+    Bounded queue and thread sending changes to one PriceStreamClient, so
+    connections are only written from one thread and a slow client never
+    blocks polling
+    """
+
+    def __init__(self, connection, on_error, maxsize: int = CLIENT_QUEUE_SIZE):
+        self.connection = connection
+        self.on_error = on_error
+        self.closed = False
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        threading.Thread(
+            target=self._run,
+            name="PriceStreamClientSender",
+            daemon=True
+        ).start()
+
+    def put(self, changes: dict) -> bool:
+        """
+        Queue changes to send, False if the client has fallen behind
+        """
+        try:
+            self._queue.put_nowait(changes)
+        except queue.Full:
+            return False
+
+        return True
+
+    def close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.connection.close()
+
+    def _run(self):
+        while not self.closed:
+            changes = self._queue.get()
+            if changes is None or self.closed:
+                return
+
+            try:
+                self.connection.send(changes)
+            except Exception:
+                # Client went away
+                self.on_error(self)
+                return
+
+
+class PriceStreamer:
+    """
+    Poll the GMX signed prices endpoint on a tight interval over one keep
+    alive session and publish only the tokens whose signed price changed,
+    detected by the id and minBlockNumber of each entry, so many strategies
+    can share a single poller and nothing recomputes while prices are still.
+
+    Subscribers are callbacks, called in the polling thread, asyncio queues,
+    or other local processes connected with PriceStreamClient to the
+    address passed to serve(). Each receives a dictionary of the changed raw
+    API entries keyed by token address. Other processes are sent to from
+    their own thread, and dropped once CLIENT_QUEUE_SIZE changes are waiting
+    for them. Use get_price_streamer to share one per chain.
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    interval : float, optional
+        seconds between polls. The default is POLL_INTERVAL.
+    timeout : float, optional
+        request timeout in seconds. The default is 5.
+    """
+
+    def __init__(self, chain: str, interval: float = POLL_INTERVAL, timeout: float = 5):
+        self.chain = chain
+        self.interval = interval
+        self.timeout = timeout
+        self.url = OraclePrices(chain).oracle_url[chain]
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.session = requests.Session()
+        self.prices = {}
+        self.table = None
+        self.last_updated = 0
+        self.last_changed = 0
+
+        self._versions = {}
+        self._subscribers = {}
+        self._next_subscription = 0
+        self._connections = []
+        self._listener = None
+        self._lock = threading.Lock()
+        # Reentrant so callbacks run by poll can subscribe
+        self._poll_lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start polling in the background
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="PriceStreamer-{}".format(self.chain),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop polling and close connections to other processes
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+        with self._lock:
+            senders, self._connections = self._connections, []
+        for sender in senders:
+            sender.close()
+
+    def poll(self) -> dict:
+        """
+        Query the latest signed prices once and publish those that changed
+
+        Returns
+        -------
+        dict
+            changed raw API entries keyed by token address.
+
+        """
+        # Serialised so subscribers see changes in order
+        with self._poll_lock:
+            response = self.session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+
+            changes = {}
+            for entry in response.json()['signedPrices']:
+                address = entry['tokenAddress']
+                version = (entry.get('id'), entry.get('minBlockNumber'))
+                if self._versions.get(address) != version:
+                    self._versions[address] = version
+                    changes[address] = entry
+
+            now = time.time()
+            self.last_updated = now
+            if len(changes) == 0:
+                return changes
+
+            prices = dict(self.prices)
+            prices.update(changes)
+            table = OraclePriceTable(prices, get_token_resolver(self.chain).tokens)
+
+            with self._lock:
+                self.prices = prices
+                self.table = table
+                self.last_changed = now
+
+            self._publish(changes)
+
+            return changes
+
+    def get_price_table(self) -> OraclePriceTable:
+        """
+        Latest prices, polling once if nothing has been received yet
+        """
+        if self.table is None:
+            self.poll()
+
+        return self.table
+
+    def subscribe(self, callback, tokens: list = None, replay: bool = True) -> int:
+        """
+        Call callback with the changed entries after every poll that moved
+        a price
+
+        Parameters
+        ----------
+        callback : callable
+            function taking a dictionary of changed entries keyed by token
+            address. Called in the polling thread, so keep it short.
+        tokens : list, optional
+            token addresses to be notified about. The default is None, all.
+        replay : bool, optional
+            call callback with the current prices straight away, before any
+            later change. The default is True.
+
+        Returns
+        -------
+        int
+            subscription id for unsubscribe.
+
+        """
+        tokens = set(tokens) if tokens is not None else None
+
+        # Held from registering to replaying, so no poll publishes a change
+        # the replay then overwrites
+        with self._poll_lock:
+            with self._lock:
+                subscription = self._next_subscription
+                self._next_subscription += 1
+                self._subscribers[subscription] = (callback, tokens)
+                current = self.prices
+
+            if replay and len(current) > 0:
+                self._notify(subscription, callback, tokens, current)
+
+        return subscription
+
+    def subscribe_queue(
+        self, tokens: list = None, replay: bool = True, maxsize: int = 0,
+        loop: asyncio.AbstractEventLoop = None
+    ) -> asyncio.Queue:
+        """
+        asyncio queue receiving the changed entries after every poll that
+        moved a price. Call from the event loop the queue is consumed on.
+
+        Parameters
+        ----------
+        tokens : list, optional
+            token addresses to be notified about. The default is None, all.
+        replay : bool, optional
+            put the current prices on the queue straight away. The default
+            is True.
+        maxsize : int, optional
+            queue size, further updates are dropped while it is full. The
+            default is 0, unbounded.
+        loop : asyncio.AbstractEventLoop, optional
+            loop consuming the queue. The default is None, the running loop.
+
+        Returns
+        -------
+        asyncio.Queue
+            queue of change dictionaries, with its subscription id set as
+            subscription for unsubscribe.
+
+        """
+        loop = loop or asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=maxsize)
+
+        def _put(changes):
+            if not queue.full():
+                queue.put_nowait(changes)
+
+        queue.subscription = self.subscribe(
+            lambda changes: loop.call_soon_threadsafe(_put, changes),
+            tokens=tokens,
+            replay=replay
+        )
+
+        return queue
+
+    def unsubscribe(self, subscription: int):
+        with self._lock:
+            self._subscribers.pop(subscription, None)
+
+    def serve(self, address: tuple = ('localhost', 0), authkey: bytes = None) -> tuple:
+        """
+        Accept PriceStreamClient connections from other local processes,
+        each sent every change and, on connecting, the current prices
+
+        Parameters
+        ----------
+        address : tuple, optional
+            (host, port) to listen on. The default is a free localhost port.
+        authkey : bytes, optional
+            shared secret clients must present. The default is None, the
+            authkey of this process, which processes it starts inherit.
+
+        Returns
+        -------
+        tuple
+            address listened on, to pass to PriceStreamClient.
+
+        """
+        if authkey is None:
+            authkey = multiprocessing.current_process().authkey
+
+        if self._listener is None:
+            self._listener = Listener(address, authkey=authkey)
+            threading.Thread(
+                target=self._accept,
+                name="PriceStreamer-{}-serve".format(self.chain),
+                daemon=True
+            ).start()
+
+        return self._listener.address
+
+    def _accept(self):
+        listener = self._listener
+        while listener is not None and not self._stop_event.is_set():
+            try:
+                connection = listener.accept()
+            except Exception:
+                # Listener closed by stop(), or a client failed to authenticate
+                if self._listener is not listener:
+                    return
+                continue
+
+            sender = _ClientSender(connection, self._drop_client)
+
+            # Replay queued before any published change reaches the client
+            with self._lock:
+                self._connections.append(sender)
+                if len(self.prices) > 0:
+                    sender.put(self.prices)
+
+    def _publish(self, changes: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+            connections = list(self._connections)
+
+        for subscription, (callback, tokens) in subscribers:
+            self._notify(subscription, callback, tokens, changes)
+
+        for sender in connections:
+            if not sender.put(changes):
+                self.log.warning("Dropping price stream client that fell behind")
+                self._drop_client(sender)
+
+    def _notify(self, subscription: int, callback, tokens: set, changes: dict):
+        if tokens is not None:
+            changes = {
+                address: entry for address, entry in changes.items()
+                if address in tokens
+            }
+            if len(changes) == 0:
+                return
+
+        try:
+            callback(changes)
+        except Exception as e:
+            self.log.warning(
+                "Price subscriber {} failed: {}".format(subscription, e)
+            )
+
+    def _drop_client(self, sender: _ClientSender):
+        with self._lock:
+            if sender in self._connections:
+                self._connections.remove(sender)
+        sender.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.log.warning("Price poll failed: {}".format(e))
+
+            self._stop_event.wait(self.interval)
+
+
+class PriceStreamClient:
+    """
+    Receive price changes from a PriceStreamer serving in another process
+
+        client = PriceStreamClient(address)
+        for changes in client:
+            ...
+
+    Parameters
+    ----------
+    address : tuple
+        address returned by PriceStreamer.serve.
+    authkey : bytes, optional
+        shared secret passed to serve. The default is None, the authkey of
+        this process, which matches a serving parent process.
+    """
+
+    def __init__(self, address: tuple, authkey: bytes = None):
+        if authkey is None:
+            authkey = multiprocessing.current_process().authkey
+
+        self.prices = {}
+        self._connection = Client(address, authkey=authkey)
+
+    def recv(self, timeout: float = None) -> dict:
+        """
+        Next changes, also merged into prices
+
+        Parameters
+        ----------
+        timeout : float, optional
+            seconds to wait. The default is None, wait forever.
+
+        Returns
+        -------
+        dict
+            changed raw API entries keyed by token address, or None if the
+            timeout expired.
+
+        """
+        if timeout is not None and not self._connection.poll(timeout):
+            return None
+
+        changes = self._connection.recv()
+        self.prices.update(changes)
+
+        return changes
+
+    def close(self):
+        self._connection.close()
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.recv()
+            except EOFError:
+                return
+
+
+_price_streamers = {}
+_price_streamers_lock = threading.Lock()
+
+
+def get_price_streamer(chain: str, start: bool = True) -> PriceStreamer:
+    """
+    Get the process wide PriceStreamer for a chain, starting its polling
+    thread on first use
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    start : bool, optional
+        start the polling thread. The default is True.
+
+    """
+    with _price_streamers_lock:
+        if chain not in _price_streamers:
+            _price_streamers[chain] = PriceStreamer(chain)
+
+        price_streamer = _price_streamers[chain]
+
+    if start:
+        price_streamer.start()
+
+    return price_streamer
@@ -0,0 +1,148 @@
+import threading
+
+from .gmx_utils import get_tokens_address_dict
+
+# Symbols users pass for an index token that the token list names
+# differently, eg the tickers API calls WBTC.b BTC
+INDEX_SYMBOL_ALIASES = {
+    'arbitrum': {
+        'BTC': "WBTC.b"
+    }
+}
+
+# Symbols resolved straight to an address when used as collateral, start,
+# long or out token
+COLLATERAL_ADDRESS_ALIASES = {
+    'arbitrum': {
+        'BTC': "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"
+    }
+}
+
+# Tokens whose markets are listed under another index token
+INDEX_ADDRESS_ALIASES = {
+    'arbitrum': {
+        "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f":
+            "0x47904963fc8b2340414262125aF798B9655E58Cd"
+    }
+}
+
+
+class TokenResolver:
+    """
+    Prebuilt symbol to address, address to metadata and alias maps for the
+    GMX token list of one chain, loaded with a single HTTP request, so token
+    lookups are constant time and need no network. Use get_token_resolver to
+    share one per chain.
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+    tokens : dict, optional
+        token metadata keyed by address, as from get_tokens_address_dict.
+        The default is None, fetch the token list.
+    """
+
+    def __init__(self, chain: str, tokens: dict = None):
+        self.chain = chain
+
+        self._lock = threading.Lock()
+        self._load(tokens if tokens is not None else get_tokens_address_dict(chain))
+
+    def refresh(self):
+        """
+        Reload the token list, eg after GMX lists a new token
+        """
+        self._load(get_tokens_address_dict(self.chain))
+
+    def address(self, symbol: str, role: str = "token") -> str:
+        """
+        Address of a token by symbol
+
+        Parameters
+        ----------
+        symbol : str
+            token symbol, eg ETH.
+        role : str, optional
+            index to apply index token aliases, collateral to apply aliases
+            for collateral, start, long and out tokens, or token for none.
+            The default is token.
+
+        Returns
+        -------
+        str
+            token address.
+
+        """
+        if role == "index":
+            symbol = INDEX_SYMBOL_ALIASES.get(self.chain, {}).get(symbol, symbol)
+        elif role == "collateral":
+            alias = COLLATERAL_ADDRESS_ALIASES.get(self.chain, {}).get(symbol)
+            if alias is not None:
+                return alias
+
+        try:
+            return self._by_symbol[symbol]
+        except KeyError:
+            raise Exception('"{}" not a known token for GMX v2!'.format(symbol))
+
+    def metadata(self, address: str) -> dict:
+        """
+        Token list entry of an address, with symbol, decimals and address
+        """
+        try:
+            return self.tokens[address]
+        except KeyError:
+            try:
+                return self.tokens[self._by_lower_address[address.lower()]]
+            except KeyError:
+                raise Exception(
+                    '"{}" not a known token address for GMX v2!'.format(address)
+                )
+
+    def decimals(self, address: str) -> int:
+        return self.metadata(address)['decimals']
+
+    def symbol(self, address: str) -> str:
+        return self.metadata(address)['symbol']
+
+    def market_index_address(self, address: str) -> str:
+        """
+        Index token address its markets are listed under
+        """
+        return INDEX_ADDRESS_ALIASES.get(self.chain, {}).get(address, address)
+
+    def _load(self, tokens: dict):
+        by_symbol = {}
+        for address, token in tokens.items():
+            # first listed token wins, as with a linear scan
+            by_symbol.setdefault(token.get('symbol'), address)
+
+        by_lower_address = {address.lower(): address for address in tokens}
+
+        with self._lock:
+            self.tokens = dict(tokens)
+            self._by_symbol = by_symbol
+            self._by_lower_address = by_lower_address
+
+
+_token_resolvers = {}
+_token_resolvers_lock = threading.Lock()
+
+
+def get_token_resolver(chain: str) -> TokenResolver:
+    """
+    Get the process wide TokenResolver for a chain, fetching the token list
+    on first use
+
+    Parameters
+    ----------
+    chain : str
+        arbitrum or avalanche.
+
+    """
+    with _token_resolvers_lock:
+        if chain not in _token_resolvers:
+            _token_resolvers[chain] = TokenResolver(chain)
+
+        return _token_resolvers[chain]
@@ -0,0 +1,298 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+# Durations kept per span name for rolling percentiles
+DEFAULT_WINDOW = 10000
+
+
+class Span:
+    """
+    Timed stage of a trace. Use as a context manager, or call end() when the
+    stage finishes. The trace id doubles as the order correlation id.
+    """
+
+    def __init__(
+        self, tracer, name: str, trace_id: str, parent_id: str = None,
+        attributes: dict = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start_time = time.time()
+        self.end_time = None
+        self.duration_ms = None
+        self.error = None
+
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end(error=exc_value)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: Exception = None):
+        if self.end_time is not None:
+            return
+
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.end_time = self.start_time + self.duration_ms / 1000
+        if error is not None:
+            self.error = "{}: {}".format(error.__class__.__name__, error)
+
+        self.tracer._on_end(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Tracer:
+    """
+    Create spans, hand them to exporters and keep a rolling window of
+    durations per span name for p50/p99 per stage
+
+    Parameters
+    ----------
+    window : int, optional
+        durations kept per span name. The default is 10000.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self.exporters = []
+
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter):
+        if exporter in self.exporters:
+            self.exporters.remove(exporter)
+
+    def start_span(
+        self, name: str, trace_id: str = None, parent: Span = None,
+        **attributes
+    ) -> Span:
+        """
+        Start a span, a child of parent if given, otherwise a root span of
+        trace_id or a new trace
+
+        Parameters
+        ----------
+        name : str
+            stage name.
+        trace_id : str, optional
+            trace, eg an order correlation id. The default is None.
+        parent : Span, optional
+            enclosing span. The default is None.
+
+        Returns
+        -------
+        Span
+
+        """
+        if parent is not None:
+            trace_id = parent.trace_id
+        elif trace_id is None:
+            trace_id = uuid.uuid4().hex
+
+        span = Span(
+            self,
+            name,
+            trace_id,
+            parent.span_id if parent is not None else None,
+            attributes
+        )
+
+        for exporter in self.exporters:
+            if hasattr(exporter, 'on_start'):
+                exporter.on_start(span)
+
+        return span
+
+    def summary(self) -> dict:
+        """
+        Count, p50, p99 and max duration in ms per span name over the window
+
+        Returns
+        -------
+        dict
+            dictionary keyed by span name.
+
+        """
+        with self._lock:
+            durations = {
+                name: np.array(values) for name, values in self._durations.items()
+            }
+
+        return {
+            name: {
+                'count': len(values),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p99_ms': float(np.percentile(values, 99)),
+                'max_ms': float(values.max())
+            }
+            for name, values in durations.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._durations = {}
+
+    def _on_end(self, span: Span):
+        with self._lock:
+            if span.name not in self._durations:
+                self._durations[span.name] = deque(maxlen=self.window)
+            self._durations[span.name].append(span.duration_ms)
+
+        for exporter in self.exporters:
+            try:
+                exporter.on_end(span)
+            except Exception as e:
+                self.log.warning(
+                    "Span export failed in {}: {}".format(
+                        exporter.__class__.__name__, e
+                    )
+                )
+
+
+class JSONLinesExporter:
+    """
+    Append each finished span to a file as one JSON object per line
+
+    Parameters
+    ----------
+    path : str
+        output file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class OpenTelemetryExporter:
+    """
+    Mirror spans into an OpenTelemetry tracer, keeping parent links and
+    timestamps. Requires the opentelemetry-api package, with an SDK and
+    exporter configured by the caller.
+
+    Parameters
+    ----------
+    otel_tracer : opentelemetry.trace.Tracer, optional
+        tracer to record into. The default is the global tracer for this
+        module.
+    """
+
+    def __init__(self, otel_tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise Exception(
+                "OpenTelemetryExporter requires opentelemetry-api, "
+                "pip install opentelemetry-api opentelemetry-sdk"
+            )
+
+        self._trace = trace
+        self.otel_tracer = otel_tracer or trace.get_tracer(__name__)
+
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span):
+        with self._lock:
+            parent = self._spans.get(span.parent_id)
+
+        otel_span = self.otel_tracer.start_span(
+            span.name,
+            context=(
+                self._trace.set_span_in_context(parent)
+                if parent is not None else None
+            ),
+            start_time=int(span.start_time * 1e9),
+            attributes=dict(
+                _otel_attributes(span.attributes),
+                correlation_id=span.trace_id
+            )
+        )
+
+        with self._lock:
+            self._spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span):
+        with self._lock:
+            otel_span = self._spans.pop(span.span_id, None)
+
+        if otel_span is None:
+            return
+
+        otel_span.set_attributes(_otel_attributes(span.attributes))
+        if span.error is not None:
+            otel_span.set_status(
+                self._trace.Status(self._trace.StatusCode.ERROR, span.error)
+            )
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+def _otel_attributes(attributes: dict) -> dict:
+    # OpenTelemetry only accepts primitive attribute values
+    return {
+        key: value if isinstance(value, (bool, int, float, str)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Process wide tracer used by orders
+    """
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+
+        return _tracer